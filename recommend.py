@@ -10,8 +10,13 @@ import os
 import subprocess
 import argparse
 import json
+import threading
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+from profiling import add_profile_argument, load_summaries, print_summary, resolve_profile_dir
+
 # UTF-8 handling for Windows
 if sys.platform == 'win32':
     import io
@@ -19,48 +24,89 @@ if sys.platform == 'win32':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 
-def run_step(description, command, capture_output=False, verbose=False):
+def parse_tokens(stderr):
+    """Extract the token count a stage logged to stderr (0 if none)."""
+    tokens = 0
+    for line in stderr.split('\n'):
+        if 'Tokens used:' in line or 'tokens_used' in line:
+            try:
+                # Try to extract number from "Tokens used: 2569" format
+                if 'Tokens used:' in line:
+                    tokens = int(line.split('Tokens used:')[1].split()[0])
+                # Try to extract from JSON format
+                elif 'tokens_used' in line and '{' in line:
+                    data = json.loads(line)
+                    tokens = data.get('tokens_used', 0)
+            except:
+                pass
+    return tokens
+
+
+def run_pipeline(steps, verbose=False):
     """
-    Run a pipeline step and handle errors.
+    Run pipeline stages connected by OS pipes (stdout of each feeds stdin of the next).
+
+    Args:
+        steps: list of (description, argv) tuples
 
     Returns:
         tuple: (success: bool, output: str, tokens: int)
     """
-    if verbose:
-        print(f"🔧 {description}...", file=sys.stderr)
-
     # Use appropriate encoding for Windows
     encoding = 'cp1252' if sys.platform == 'win32' else 'utf-8'
 
+    if verbose:
+        for description, _argv in steps:
+            print(f"🔧 {description}...", file=sys.stderr)
+
+    processes = []
+    stderr_chunks = []
+    drainers = []
+
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            encoding=encoding,
-            errors='replace'
-        )
-
-        if result.returncode != 0:
+        previous_stdout = None
+        for _description, argv in steps:
+            proc = subprocess.Popen(
+                argv,
+                stdin=previous_stdout if previous_stdout is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            if previous_stdout is not None:
+                previous_stdout.close()  # Let upstream get SIGPIPE if downstream exits
+            previous_stdout = proc.stdout
+            processes.append(proc)
+
+            # Drain stderr concurrently so a chatty stage cannot block on a full pipe
+            chunks = []
+            drainer = threading.Thread(target=lambda p=proc, c=chunks: c.append(p.stderr.read()))
+            drainer.start()
+            stderr_chunks.append(chunks)
+            drainers.append(drainer)
+
+        output = processes[-1].stdout.read()
+        for proc in processes:
+            proc.wait()
+        for drainer in drainers:
+            drainer.join()
+
+    except Exception as e:
+        print(f"❌ Error ejecutando pipeline: {str(e)}", file=sys.stderr)
+        for proc in processes:
+            proc.kill()
+        return False, None, 0
+
+    total_tokens = 0
+    for (description, _argv), proc, chunks in zip(steps, processes, stderr_chunks):
+        stderr = b''.join(chunks).decode(encoding, errors='replace')
+
+        if proc.returncode != 0:
             print(f"❌ Error en {description}", file=sys.stderr)
-            print(result.stderr, file=sys.stderr)
+            print(stderr, file=sys.stderr)
             return False, None, 0
 
-        # Extract token count from stderr if present
-        tokens = 0
-        for line in result.stderr.split('\n'):
-            if 'Tokens used:' in line or 'tokens_used' in line:
-                try:
-                    # Try to extract number from "Tokens used: 2569" format
-                    if 'Tokens used:' in line:
-                        tokens = int(line.split('Tokens used:')[1].split()[0])
-                    # Try to extract from JSON format
-                    elif 'tokens_used' in line and '{' in line:
-                        data = json.loads(line)
-                        tokens = data.get('tokens_used', 0)
-                except:
-                    pass
+        tokens = parse_tokens(stderr)
+        total_tokens += tokens
 
         if verbose:
             if tokens > 0:
@@ -68,11 +114,17 @@ def run_step(description, command, capture_output=False, verbose=False):
             else:
                 print(f"✓ {description} completado", file=sys.stderr)
 
-        return True, result.stdout, tokens
+    return True, output.decode(encoding, errors='replace'), total_tokens
 
-    except Exception as e:
-        print(f"❌ Error ejecutando {description}: {str(e)}", file=sys.stderr)
-        return False, None, 0
+
+def print_profile_summary(profile_dir, wall_seconds):
+    """Print the per-stage tables each script wrote with --profile."""
+    print(f"\n{'='*60}", file=sys.stderr)
+    print(f"Perfil por etapa (pipeline: {wall_seconds * 1000:.0f}ms de reloj)", file=sys.stderr)
+    for summary in load_summaries(profile_dir):
+        print_summary(summary)
+    print(f"Perfiles (.pstats / .tracemalloc): {profile_dir}", file=sys.stderr)
+    print(f"{'='*60}\n", file=sys.stderr)
 
 
 def main():
@@ -84,6 +136,9 @@ Examples:
   python recommend.py "Me gusta la ciencia ficción hard y las distopías"
   python recommend.py --verbose "Quiero una novela atrapante"
   python recommend.py --quiet "I love dark fantasy"
+  python recommend.py "Quiero una novela atrapante" --profile
+  python recommend.py --session ana "Quiero fantasía oscura"
+  python recommend.py --session ana "algo más ligero"
         """
     )
 
@@ -105,8 +160,48 @@ Examples:
         help='Suppress all progress messages, only show recommendations'
     )
 
+    parser.add_argument(
+        '--catalog',
+        metavar='ID',
+        help='Catalog edition to search (data/catalogs/<ID>/; default: data/)'
+    )
+
+    parser.add_argument(
+        '--no-mmr',
+        action='store_true',
+        help='Send every search candidate to the presenter instead of a diverse subset'
+    )
+
+    parser.add_argument(
+        '--no-relax',
+        action='store_true',
+        help='Do not relax language, maturity or genre filters when they leave too few books'
+    )
+
+    parser.add_argument(
+        '--session',
+        metavar='ID',
+        help='Keep a conversation: follow-up messages refine the previous recommendations'
+    )
+
+    parser.add_argument(
+        '--cache-variants',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Reuse presenter responses for identical profiles and candidates, keeping up to N phrasings'
+    )
+
+    add_profile_argument(parser)
+
     args = parser.parse_args()
 
+    # session.py runs every turn in one process: no per-stage profiles or presenter cache
+    if args.session and args.profile is not None:
+        parser.error('--profile cannot be combined with --session')
+    if args.session and args.cache_variants > 0:
+        parser.error('--cache-variants cannot be combined with --session')
+
     # Validate input
     if not args.user_input or not args.user_input.strip():
         print("❌ Error: Please provide your reading preferences", file=sys.stderr)
@@ -122,77 +217,69 @@ Examples:
         sys.exit(1)
 
     verbose = args.verbose and not args.quiet
-    total_tokens = 0
 
     # Determine project root
     project_root = Path(__file__).parent
-
-    # Step 1: Extract profile
-    success, output, tokens = run_step(
-        "Extrayendo perfil de usuario",
-        f'python "{project_root}/scripts/extract_profile.py" "{args.user_input}"',
-        capture_output=True,
-        verbose=verbose
-    )
+    scripts_dir = project_root / 'scripts'
+
+    # Diverse candidate subset (MMR) keeps the presenter prompt small
+    search_args = [] if args.no_mmr else ['--mmr']
+    if args.no_relax:
+        search_args.append('--no-relax')
+    if args.catalog:
+        search_args += ['--catalog', args.catalog]
+    present_args = ['--cache-variants', str(args.cache_variants)] if args.cache_variants > 0 else []
+
+    # Every stage writes its own <script>-<stage>.pstats files into one directory
+    profile_args = []
+    profile_dir = resolve_profile_dir(args.profile, project_root)
+    if profile_dir is not None:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profile_args = ['--profile', str(profile_dir)]
+
+    # Stages hand off minified JSON over pipes: criteria -> {criteria, results} -> markdown.
+    # All three start at once; search and presentation warm up (catalog, indexes,
+    # model, system prompt) while profile extraction is still waiting on the API,
+    # so wall-clock time approaches max(extraction, warmup) rather than the sum.
+    start_time = time.time()
+    if args.session:
+        # One process keeps profile, query vector and scores between turns
+        session_args = ['--session', args.session]
+        if args.no_mmr:
+            session_args.append('--no-mmr')
+        if args.no_relax:
+            session_args.append('--no-relax')
+        if args.catalog:
+            session_args += ['--catalog', args.catalog]
+        steps = [
+            ("Refinando recomendaciones",
+             [sys.executable, str(scripts_dir / 'session.py'), *session_args, args.user_input]),
+        ]
+    else:
+        steps = [
+            ("Extrayendo perfil de usuario",
+             [sys.executable, str(scripts_dir / 'extract_profile.py'), '--pipe', *profile_args, args.user_input]),
+            ("Buscando libros similares",
+             [sys.executable, str(scripts_dir / 'vector_search.py'), '-', '--bundle', *search_args, *profile_args]),
+            ("Generando recomendaciones",
+             [sys.executable, str(scripts_dir / 'present_recommendations.py'), '--bundle', '-', *present_args, *profile_args]),
+        ]
+    success, markdown, total_tokens = run_pipeline(steps, verbose=verbose)
+    wall_seconds = time.time() - start_time
+
+    if profile_dir is not None and not args.quiet:
+        print_profile_summary(profile_dir, wall_seconds)
 
     if not success:
         sys.exit(1)
 
-    total_tokens += tokens
-
-    # Parse output to get criteria file path
-    try:
-        result = json.loads(output)
-        if result['status'] != 'success':
-            print(f"❌ Error: {result.get('message', 'Unknown error')}", file=sys.stderr)
-            sys.exit(1)
-        criteria_file = result['file']
-    except:
-        print("❌ Error: Could not parse extract_profile output", file=sys.stderr)
-        sys.exit(1)
-
-    # Step 2: Vector search
-    search_results_file = project_root / '.cache' / 'search_results.json'
-    success, output, tokens = run_step(
-        "Buscando libros similares",
-        f'python "{project_root}/scripts/vector_search.py" "{criteria_file}"',
-        capture_output=True,
-        verbose=verbose
-    )
-
-    if not success:
-        sys.exit(1)
-
-    total_tokens += tokens
-
-    # Save search results
-    try:
-        search_results_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(search_results_file, 'w', encoding='utf-8') as f:
-            f.write(output)
-    except Exception as e:
-        print(f"❌ Error saving search results: {str(e)}", file=sys.stderr)
-        sys.exit(1)
-
-    # Step 3: Present recommendations
-    success, markdown, tokens = run_step(
-        "Generando recomendaciones",
-        f'python "{project_root}/scripts/present_recommendations.py" --criteria "{criteria_file}" --results "{search_results_file}"',
-        capture_output=True,
-        verbose=verbose
-    )
-
-    if not success:
-        sys.exit(1)
-
-    total_tokens += tokens
-
     # Show summary if verbose
     if verbose:
         print(f"\n{'='*60}", file=sys.stderr)
         print(f"Total tokens: {total_tokens:,}", file=sys.stderr)
         cost = (total_tokens / 1_000_000) * 3  # Rough estimate at $3/MTok
         print(f"Costo estimado: ${cost:.4f}", file=sys.stderr)
+        print(f"Tiempo total: {wall_seconds:.1f}s", file=sys.stderr)
         print(f"{'='*60}\n", file=sys.stderr)
 
     # Output recommendations
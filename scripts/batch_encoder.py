@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-batching front for the sentence-transformers model.
+
+Concurrent searches each need one short query encoded. Encoding them one at
+a time wastes most of the transformer's batch efficiency, so BatchEncoder
+queues texts from all callers and a single worker thread runs one batched
+`model.encode()` per window: whichever comes first of `max_batch` texts
+or `max_wait_ms` after the first one arrived. Each caller blocks until its
+own rows come back. Same call shape as model.encode(), so it drops in
+wherever the model is used.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class BatchEncoder:
+    """Coalesces encode() calls from many threads into batched model calls."""
+
+    def __init__(self, model, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def encode(self, sentences, **_kwargs):
+        """Encode a string (-> 1-D vector) or a list of strings (-> 2-D array)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.model.encode([])
+
+        future = Future()
+        self._worker_queue().put((texts, future))
+        vectors = future.result()
+        return vectors[0] if single else vectors
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _worker_queue(self):
+        # Threads do not survive fork: each process starts its own worker
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._run, args=(self._queue,),
+                                     name='batch-encoder', daemon=True).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _collect(self, requests):
+        """Block for the first request, then gather more until the batch is full or the window closes."""
+        pending = [requests.get()]
+        count = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = requests.get(timeout=timeout) if timeout > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            count += len(item[0])
+        return pending
+
+    def _run(self, requests):
+        while True:
+            pending = self._collect(requests)
+            texts = [text for item_texts, _future in pending for text in item_texts]
+            try:
+                vectors = np.asarray(self.model.encode(texts, batch_size=len(texts)))
+            except Exception as e:
+                for _texts, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
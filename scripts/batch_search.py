@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk search for offline jobs (e.g. precomputing candidates for every stored
+user profile) without one vector_search.py process per criteria file.
+
+Reads criteria as JSONL (a bare criteria object per line, or
+{"id": ..., "criteria": {...}}), composes every query vector at once (all
+texts that need the model go through a single encode() call), scores each
+chunk of queries against the catalog with one matrix-matrix product and
+selects per-query top-k under boolean filter masks. Results stream to stdout
+as NDJSON, one line per input: {"id", "criteria", "results", "catalog"}, so
+each line is also a valid present_recommendations.py --bundle.
+
+Same filters, candidate pools and liked-books handling as vector_search.search().
+
+Usage:
+    python scripts/batch_search.py profiles.jsonl > candidates.ndjson
+    python scripts/batch_search.py - --catalog es --mmr < profiles.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from fingerprint import DEFAULT_CATALOG, catalog_data_dir
+from handoff import STDIN_MARKER, dumps, make_bundle
+from vector_search import (
+    MMR_LAMBDA, RELAX_MIN_RESULTS, blend_liked_query, build_query_terms, build_query_text, diversify_pools,
+    mark_relaxed, open_resources, relax_criteria, vocab_query_embedding,
+)
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PRIMARY_K = 10
+SECONDARY_K = 5
+CHUNK_SIZE = 512  # Queries scored per matrix product (bounds memory to CHUNK_SIZE x books)
+
+
+def read_records(lines):
+    """
+    Parse JSONL criteria records.
+
+    Returns:
+        list: (id, criteria or None, error or None) per non-blank line;
+        ids default to the 1-based line number.
+    """
+    records = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            records.append((line_no, None, f"Invalid JSON: {str(e)}"))
+            continue
+        if isinstance(entry, dict) and isinstance(entry.get('criteria'), dict):
+            records.append((entry.get('id', line_no), entry['criteria'], None))
+        elif isinstance(entry, dict):
+            records.append((line_no, entry, None))
+        else:
+            records.append((line_no, None, "Record is not a JSON object"))
+    return records
+
+
+def compose_query_matrix(queries, vocab, get_model, dim):
+    """
+    Batched compose_query_embedding(): one row per criteria dict.
+
+    Known vocabulary terms are summed from the table; full query texts (no
+    table, or no terms) and out-of-vocabulary terms from every query are
+    deduplicated and encoded in a single model call.
+
+    Args:
+        queries: Criteria dicts
+        vocab: (term -> row, matrix) from load_vocab_table(), or None
+        get_model: Zero-arg callable returning the model (only called if needed)
+        dim: Embedding dimension
+
+    Returns:
+        np.ndarray: (len(queries), dim) float32 query matrix (rows unnormalized)
+    """
+    matrix = np.zeros((len(queries), dim), dtype=np.float32)
+    known = ([], [], [])  # query index, vocab row, weight
+    encoded = {}  # text -> position in the encode batch
+    uses = []  # (query index, text, weight or None for a full query text)
+
+    for qi, criteria in enumerate(queries):
+        terms = build_query_terms(criteria)
+        if vocab is None or not terms:
+            text = build_query_text(criteria)
+            encoded.setdefault(text, len(encoded))
+            uses.append((qi, text, None))
+            continue
+        index = vocab[0]
+        for term, weight in terms:
+            if term in index:
+                known[0].append(qi)
+                known[1].append(index[term])
+                known[2].append(weight)
+            else:
+                encoded.setdefault(term, len(encoded))
+                uses.append((qi, term, weight))
+
+    if known[0]:
+        rows = vocab[1][known[1]]
+        norms = np.linalg.norm(rows, axis=1)
+        norms[norms == 0] = 1.0
+        weights = np.asarray(known[2], dtype=np.float32) / norms
+        np.add.at(matrix, np.asarray(known[0]), rows * weights[:, None])
+
+    if encoded:
+        print(f"[*] Encoding {len(encoded)} text(s) in one batch...", file=sys.stderr)
+        vectors = np.asarray(get_model().encode(list(encoded), batch_size=64), dtype=np.float32)
+        for qi, text, weight in uses:
+            vector = vectors[encoded[text]]
+            if weight is None:
+                matrix[qi] += vector
+            else:
+                matrix[qi] += weight * vector / (np.linalg.norm(vector) or 1.0)
+
+    return matrix
+
+
+class FilterColumns:
+    """Catalog attributes as arrays, so each query's filters become boolean masks."""
+
+    def __init__(self, books):
+        self.genre = np.array([str(b.get('genre')) for b in books])
+        self.maturity = np.array([b.get('maturity_level', 4) for b in books], dtype=np.float32)
+        language = np.array([str(b.get('language', 'en')) for b in books])
+        self.any_language = (language == 'both') | (language == 'any')
+        self.language = language
+
+    def base_mask(self, criteria, excluded_rows):
+        """Maturity, language and books_read filters (the genre is applied per pool)."""
+        mask = np.ones(len(self.genre), dtype=bool)
+        if criteria.get('maturity_level'):
+            mask &= self.maturity >= criteria['maturity_level']
+        if 'language_preference' in criteria and criteria['language_preference'] != 'any':
+            mask &= (self.language == criteria['language_preference']) | self.any_language
+        mask[excluded_rows] = False
+        return mask
+
+
+def top_k_rows(scores, mask, k):
+    """Rows of the k best scores under `mask`, best first (ties in catalog order, like rank())."""
+    candidates = np.flatnonzero(mask)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+class BatchSearcher:
+    """Runs search() semantics for many queries over one loaded catalog."""
+
+    def __init__(self, resources, primary_k=PRIMARY_K, secondary_k=SECONDARY_K, mmr_lambda=None, relax=True):
+        self.resources = resources
+        self.relax = relax
+        self.books = resources.books
+        self.primary_k = primary_k
+        self.secondary_k = secondary_k
+        self.mmr_lambda = mmr_lambda
+        self.columns = FilterColumns(self.books)
+        self.unit_matrix = np.asarray(resources.matrix, dtype=np.float32) / resources.norms[:, None]
+        self.embedded = np.any(self.unit_matrix != 0, axis=1)
+
+    def rows_of(self, ids):
+        row_of = self.resources.row_of
+        return np.fromiter((row_of[i] for i in ids if i in row_of), dtype=np.int64)
+
+    def liked_rows(self, criteria):
+        """Catalog rows of the liked books (empty if none of them has an embedding)."""
+        titles = criteria.get('books_liked') or []
+        rows = self.rows_of(self.resources.title_index.resolve_ids(titles)) if titles else []
+        if not len(rows) or not self.embedded[rows].any():
+            return np.empty(0, dtype=np.int64)
+        return np.sort(rows)
+
+    def query_matrix(self, queries):
+        """
+        Composed queries; liked-book queries use the liked-book centroid, blended
+        with the composed query only when the vocabulary table covers it.
+        """
+        liked = [self.liked_rows(c) for c in queries]
+        dim = self.resources.matrix.shape[1]
+        plain = [i for i, rows in enumerate(liked) if not len(rows)]
+        matrix = np.zeros((len(queries), dim), dtype=np.float32)
+        if plain:
+            matrix[plain] = compose_query_matrix([queries[i] for i in plain], self.resources.vocab,
+                                                 self.resources.get_model, dim)
+        for i, rows in enumerate(liked):
+            if len(rows):
+                rows = rows[self.embedded[rows]]  # Centroid of the embedded ones
+                centroid = np.mean(np.asarray(self.resources.matrix[rows], dtype=np.float32), axis=0)
+                query = vocab_query_embedding(queries[i], self.resources.vocab)
+                matrix[i] = centroid if query is None else blend_liked_query(centroid, query)
+        return matrix, liked
+
+    def results(self, scores, rows, pool):
+        return [dict(self.books[r], similarity=float(scores[r]), genre_pool=pool) for r in rows]
+
+    def pools(self, criteria, scores, base, universe):
+        """search_pools() over `universe` with precomputed scores."""
+        primary_mask = base & universe
+        if criteria.get('primary_genre'):
+            primary_mask &= np.isin(self.columns.genre, criteria['primary_genre'])
+        primary_rows = top_k_rows(scores, primary_mask, self.primary_k)
+
+        secondary = []
+        if criteria.get('secondary_genres'):
+            remaining = base & universe
+            remaining[primary_rows] = False
+            for genre in criteria['secondary_genres']:
+                rows = top_k_rows(scores, remaining & (self.columns.genre == genre), self.secondary_k)
+                secondary.extend(self.results(scores, rows, 'secondary'))
+            secondary.sort(key=lambda b: b['similarity'], reverse=True)
+            secondary = secondary[:self.secondary_k]
+
+        return self.results(scores, primary_rows, 'primary'), secondary
+
+    def search_one(self, criteria, scores, liked):
+        read_ids = self.resources.title_index.resolve_ids(criteria.get('books_read') or [])
+        filter_criteria, relaxed = criteria, []
+        if self.relax:
+            filter_criteria, relaxed = relax_criteria(criteria, self.resources.filter_counts,
+                                                      self.resources.genre_adjacency, read_ids)
+        base = self.columns.base_mask(filter_criteria, self.rows_of(read_ids))
+        everything = np.ones(len(self.books), dtype=bool)
+
+        if len(liked):
+            # Neighbor-graph candidates first, whole catalog minus the liked books as fallback
+            everything[liked] = False
+            primary, secondary = [], []
+            graph = self.resources.graph
+            if graph:
+                neighbors = self.rows_of(n for r in liked for n, _score in graph.get(self.books[r]['id'], []))
+                universe = np.zeros(len(self.books), dtype=bool)
+                universe[neighbors] = True
+                universe[liked] = False
+                primary, secondary = self.pools(filter_criteria, scores, base, universe)
+            if len(primary) < RELAX_MIN_RESULTS:
+                primary, secondary = self.pools(filter_criteria, scores, base, everything)
+        else:
+            primary, secondary = self.pools(filter_criteria, scores, base, everything)
+
+        if self.mmr_lambda is not None:
+            primary, secondary = diversify_pools(primary, secondary, self.resources.unit_vectors, self.mmr_lambda)
+        if relaxed:
+            mark_relaxed(primary + secondary, criteria, relaxed)
+        return primary + secondary
+
+    def search_chunk(self, queries):
+        """Search a chunk of criteria dicts; one matrix-matrix product scores all of them."""
+        if not queries:
+            return []
+        query_matrix, liked = self.query_matrix(queries)
+        norms = np.linalg.norm(query_matrix, axis=1)
+        norms[norms == 0] = 1.0
+        scores = (query_matrix / norms[:, None]) @ self.unit_matrix.T
+        return [self.search_one(c, scores[i], liked[i]) for i, c in enumerate(queries)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search many criteria records in one pass (JSONL in, NDJSON out)')
+    parser.add_argument('input', help="JSONL file of criteria records, or '-' for stdin")
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG, metavar='ID',
+                        help='Catalog to search: data/catalogs/<ID>/ (default: data/)')
+    parser.add_argument('--mmr', type=float, nargs='?', const=MMR_LAMBDA, default=None, metavar='LAMBDA',
+                        help=f'Reduce candidates to a diverse set (default lambda: {MMR_LAMBDA})')
+    parser.add_argument('--no-relax', action='store_true',
+                        help='Keep the filters as given even when they leave too few candidates')
+    parser.add_argument('--primary-k', type=int, default=PRIMARY_K, help=f'Primary pool size (default: {PRIMARY_K})')
+    parser.add_argument('--secondary-k', type=int, default=SECONDARY_K,
+                        help=f'Secondary pool size (default: {SECONDARY_K})')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f'Queries scored per matrix product (default: {CHUNK_SIZE})')
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    try:
+        data_dir = catalog_data_dir(project_root, args.catalog)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.input == STDIN_MARKER:
+        records = read_records(sys.stdin)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            records = read_records(f)
+    valid = sum(1 for _id, _criteria, error in records if error is None)
+    print(f"[*] Read {len(records)} records ({len(records) - valid} invalid)", file=sys.stderr)
+
+    print(f"[*] Loading catalog '{args.catalog}'...", file=sys.stderr)
+    resources = open_resources(project_root, data_dir / 'catalog_with_embeddings.json', data_dir)
+    searcher = BatchSearcher(resources, args.primary_k, args.secondary_k, args.mmr, not args.no_relax)
+    load_seconds = time.perf_counter() - start
+
+    # Records stream out in input order; invalid ones get an error line in place
+    search_start = time.perf_counter()
+    chunk_size = max(1, args.chunk_size)
+    for offset in range(0, len(records), chunk_size):
+        chunk = records[offset:offset + chunk_size]
+        results = iter(searcher.search_chunk([c for _, c, error in chunk if error is None]))
+        for record_id, criteria, error in chunk:
+            if error is not None:
+                print(dumps({'id': record_id, 'error': error}))
+            else:
+                print(dumps({'id': record_id, **make_bundle(criteria, next(results), args.catalog)}))
+        sys.stdout.flush()
+    search_seconds = time.perf_counter() - search_start
+
+    rate = valid / search_seconds if search_seconds > 0 else 0.0
+    print(f"[OK] Searched {valid} queries against {len(resources.books)} books in {search_seconds:.2f}s "
+          f"({rate:.0f} queries/s; load {load_seconds:.2f}s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
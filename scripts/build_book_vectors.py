@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompute multi-vector book representations.
+generate_book_embedding() folds a whole book into one vector and keeps only
+the first 200 characters of the synopsis. Here each book gets several unit
+vectors instead: one for its metadata (title, author, genre, mood, pacing),
+one for its tropes, and one per synopsis chunk. They are stored flat
+(vectors, kinds) with a CSR offsets index (book i owns rows
+offsets[i]:offsets[i+1]), so search scores every vector with one
+matrix-vector product and pools per book with np.maximum.reduceat().
+The run ends with a storage and latency report against the single-vector
+matrix.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from fingerprint import DEFAULT_CATALOG, catalog_data_dir
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+KINDS = ('metadata', 'tropes', 'synopsis')
+KIND_WEIGHTS = np.array([1.0, 1.0, 0.5], dtype=np.float32)  # For weighted pooling, indexed by kind
+SYNOPSIS_CHUNK_CHARS = 300
+MAX_SYNOPSIS_CHUNKS = 8
+ENCODE_BATCH_SIZE = 64
+REPORT_QUERIES = 200
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def chunk_synopsis(text, size=SYNOPSIS_CHUNK_CHARS, max_chunks=MAX_SYNOPSIS_CHUNKS):
+    """Pack whole sentences into chunks of at most `size` characters (longer sentences are cut)."""
+    chunks = []
+    current = ''
+    for sentence in SENTENCE_END.split(text.strip()):
+        while len(sentence) > size:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:size])
+            sentence = sentence[size:].lstrip()
+        if current and len(current) + 1 + len(sentence) > size:
+            chunks.append(current)
+            current = ''
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks[:max_chunks]
+
+
+def book_texts(book):
+    """
+    Texts to embed for one book.
+
+    Returns:
+        list: (kind index, text) tuples; the metadata text is always present
+    """
+    subgenres = book.get('subgenres')
+    mood = book.get('mood')
+    metadata = ' '.join(filter(None, [
+        book['title'],
+        f"by {book['author']}",
+        book['genre'],
+        ' '.join(subgenres) if isinstance(subgenres, list) else book.get('subgenre', ''),
+        ' '.join(mood) if isinstance(mood, list) else mood or '',
+        book.get('pacing', ''),
+    ]))
+
+    texts = [(KINDS.index('metadata'), metadata)]
+    if book.get('tropes'):
+        texts.append((KINDS.index('tropes'), ' '.join(book['tropes'])))
+    texts.extend((KINDS.index('synopsis'), chunk) for chunk in chunk_synopsis(book.get('synopsis', '')))
+    return texts
+
+
+def build_book_vectors(books, model, batch_size=ENCODE_BATCH_SIZE):
+    """
+    Encode every book's texts in batched model calls.
+
+    Returns:
+        tuple: (offsets, kinds, vectors) with L2-normalized float32 vectors
+    """
+    offsets = [0]
+    kinds = []
+    texts = []
+    for book in books:
+        for kind, text in book_texts(book):
+            kinds.append(kind)
+            texts.append(text)
+        offsets.append(len(texts))
+
+    vectors = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.asarray(offsets, dtype=np.int64), np.asarray(kinds, dtype=np.int8), vectors / norms
+
+
+def save_book_vectors(path, ids, offsets, kinds, vectors):
+    """Write the vectors as an .npz archive (float32 embeddings barely compress)."""
+    np.savez(path, ids=np.asarray(ids), offsets=offsets, kinds=kinds, vectors=vectors)
+
+
+def load_book_vectors(path):
+    """
+    Load vectors written by this script.
+
+    Returns:
+        dict: ids (list), offsets, kinds, vectors arrays, or None if the file is missing.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with np.load(path, allow_pickle=False) as data:
+        return {
+            'ids': data['ids'].tolist(),
+            'offsets': data['offsets'],
+            'kinds': data['kinds'],
+            'vectors': data['vectors'],
+        }
+
+
+def pool_scores(similarities, offsets, kinds, pooling='max'):
+    """
+    Pool per-vector similarities into one score per book.
+
+    Args:
+        similarities: (total_vectors,) cosine of each stored vector to the query
+        offsets: (n_books + 1,) CSR index; every book must own at least one row
+        pooling: 'max' (best-matching part of the book) or 'weighted' (KIND_WEIGHTS mean)
+    """
+    starts = offsets[:-1]
+    if pooling == 'max':
+        return np.maximum.reduceat(similarities, starts)
+    weights = KIND_WEIGHTS[kinds]
+    return np.add.reduceat(similarities * weights, starts) / np.add.reduceat(weights, starts)
+
+
+def single_vector_matrix(books, dim):
+    """The catalog's one-vector-per-book matrix, normalized, as search uses it."""
+    matrix = np.zeros((len(books), dim), dtype=np.float32)
+    for i, book in enumerate(books):
+        if book.get('embedding'):
+            matrix[i] = book['embedding']
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def median_ms(func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def report_overhead(books, offsets, kinds, vectors, n_queries=REPORT_QUERIES):
+    """Print storage and per-query scoring cost of the multi-vector index vs. one vector per book."""
+    matrix = single_vector_matrix(books, vectors.shape[1])
+    counts = np.diff(offsets)
+    multi_bytes = vectors.nbytes + offsets.nbytes + kinds.nbytes
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.integers(0, len(vectors), size=n_queries)]
+    single_ms = median_ms(lambda q: matrix @ q, queries)
+    max_ms = median_ms(lambda q: pool_scores(vectors @ q, offsets, kinds, 'max'), queries)
+    weighted_ms = median_ms(lambda q: pool_scores(vectors @ q, offsets, kinds, 'weighted'), queries)
+
+    print("\n[*] Overhead vs. single-vector search:")
+    print(f"     Vectors per book: {counts.mean():.2f} (max {counts.max()}; "
+          + ', '.join(f"{kind}: {int((kinds == i).sum())}" for i, kind in enumerate(KINDS)) + ")")
+    print(f"     Storage: {multi_bytes / 1024:.1f}KB vs {matrix.nbytes / 1024:.1f}KB "
+          f"({multi_bytes / max(matrix.nbytes, 1):.2f}x)")
+    print(f"     Scoring (median of {n_queries} queries): single {single_ms:.3f}ms, "
+          f"max {max_ms:.3f}ms ({max_ms / max(single_ms, 1e-9):.2f}x), "
+          f"weighted {weighted_ms:.3f}ms ({weighted_ms / max(single_ms, 1e-9):.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute multi-vector book representations')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG, metavar='ID',
+                        help='Catalog to process: data/catalogs/<ID>/ (default: data/)')
+    parser.add_argument('--report-only', action='store_true',
+                        help='Skip encoding; print the overhead report for the existing book_vectors.npz')
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    try:
+        data_dir = catalog_data_dir(project_root, args.catalog)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        sys.exit(1)
+    catalog_path = data_dir / 'catalog_with_embeddings.json'
+    output_path = data_dir / 'book_vectors.npz'
+
+    if not catalog_path.exists():
+        print(f"[ERROR] Catalog with embeddings not found at {catalog_path}")
+        print("        Run: python scripts/generate_embeddings.py first")
+        sys.exit(1)
+
+    print(f"[*] Reading catalog from {catalog_path}...")
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if isinstance(catalog, list):
+        books = catalog
+    elif isinstance(catalog, dict) and 'books' in catalog:
+        books = catalog['books']
+    else:
+        print("[ERROR] Catalog format not recognized")
+        sys.exit(1)
+    print(f"[OK] Found {len(books)} books\n")
+
+    if args.report_only:
+        stored = load_book_vectors(output_path)
+        if stored is None:
+            print(f"[ERROR] {output_path} not found; run without --report-only first")
+            sys.exit(1)
+        if stored['ids'] != [b['id'] for b in books]:
+            print("[ERROR] book_vectors.npz was built from a different catalog; rebuild it")
+            sys.exit(1)
+        report_overhead(books, stored['offsets'], stored['kinds'], stored['vectors'])
+        return
+
+    print("[*] Loading sentence-transformers model (all-MiniLM-L6-v2)...")
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    print("[OK] Model loaded successfully\n")
+
+    print("[*] Encoding metadata, trope and synopsis-chunk texts...")
+    offsets, kinds, vectors = build_book_vectors(books, model)
+    save_book_vectors(output_path, [b['id'] for b in books], offsets, kinds, vectors)
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"[OK] Done! Book vectors saved to {output_path}")
+    print(f"     Total size: {size_kb:.1f}KB")
+    print(f"     Books: {len(books)}")
+    print(f"     Vectors: {len(vectors)}")
+
+    report_overhead(books, offsets, kinds, vectors)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompute a k-nearest-neighbor graph over the catalog embeddings.
+Each book gets its k most similar books (cosine similarity) plus the
+hand-maintained `similar_to` entries. The graph is stored in CSR form
+(ids, offsets, neighbors, scores) so "more like the books I liked"
+searches become lookups instead of model encodes.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+DEFAULT_K = 10
+BLOCK_SIZE = 1024  # Rows scored per matrix product (bounds memory to BLOCK_SIZE x N)
+
+
+def embedding_matrix(books):
+    """Stack book embeddings into an L2-normalized float32 matrix (zero rows for missing)."""
+    dim = next((len(b['embedding']) for b in books if b.get('embedding')), 0)
+    matrix = np.zeros((len(books), dim), dtype=np.float32)
+    for i, book in enumerate(books):
+        if book.get('embedding'):
+            matrix[i] = book['embedding']
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def compute_neighbors(books, k=DEFAULT_K):
+    """
+    Compute the neighbor lists for every book.
+
+    Returns:
+        tuple: (offsets, neighbors, scores) CSR arrays, neighbors sorted by
+        descending score within each row.
+    """
+    matrix = embedding_matrix(books)
+    n = len(books)
+    k = min(k, n - 1)
+    id_to_index = {b['id']: i for i, b in enumerate(books)}
+
+    offsets = [0]
+    neighbors = []
+    scores = []
+
+    for start in range(0, n, BLOCK_SIZE):
+        block = matrix[start:start + BLOCK_SIZE] @ matrix.T
+        for row, sims in enumerate(block):
+            i = start + row
+            sims[i] = -np.inf  # A book is not its own neighbor
+
+            top = np.argpartition(-sims, k - 1)[:k] if k > 0 else np.array([], dtype=np.int64)
+            chosen = set(int(j) for j in top)
+
+            # Keep curated links even when they fall outside the top k
+            for similar_id in books[i].get('similar_to', []):
+                j = id_to_index.get(similar_id)
+                if j is not None and j != i:
+                    chosen.add(j)
+
+            ordered = sorted(chosen, key=lambda j: sims[j], reverse=True)
+            neighbors.extend(ordered)
+            scores.extend(float(sims[j]) for j in ordered)
+            offsets.append(len(neighbors))
+
+    return (
+        np.asarray(offsets, dtype=np.int32),
+        np.asarray(neighbors, dtype=np.int32),
+        np.asarray(scores, dtype=np.float32),
+    )
+
+
+def save_neighbor_graph(path, ids, offsets, neighbors, scores, k):
+    """Write the graph as a compressed .npz archive."""
+    np.savez_compressed(
+        path,
+        ids=np.asarray(ids),
+        offsets=offsets,
+        neighbors=neighbors,
+        scores=scores,
+        k=np.int32(k),
+    )
+
+
+def load_neighbor_graph(path):
+    """
+    Load a neighbor graph written by this script.
+
+    Returns:
+        dict: book id -> list of (neighbor_id, score), or None if the file is missing.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with np.load(path, allow_pickle=False) as data:
+        ids = data['ids'].tolist()
+        offsets = data['offsets']
+        neighbors = data['neighbors']
+        scores = data['scores']
+
+    graph = {}
+    for i, book_id in enumerate(ids):
+        start, end = offsets[i], offsets[i + 1]
+        graph[book_id] = [
+            (ids[j], float(s)) for j, s in zip(neighbors[start:end], scores[start:end])
+        ]
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute k-NN neighbor graph from catalog embeddings')
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help=f'Neighbors per book (default: {DEFAULT_K})')
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    catalog_path = project_root / 'data' / 'catalog_with_embeddings.json'
+    output_path = project_root / 'data' / 'neighbor_graph.npz'
+
+    if not catalog_path.exists():
+        print(f"[ERROR] Catalog with embeddings not found at {catalog_path}")
+        print("        Run: python scripts/generate_embeddings.py first")
+        sys.exit(1)
+
+    print(f"[*] Reading catalog from {catalog_path}...")
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if isinstance(catalog, list):
+        books = catalog
+    elif isinstance(catalog, dict) and 'books' in catalog:
+        books = catalog['books']
+    else:
+        print("[ERROR] Catalog format not recognized")
+        sys.exit(1)
+
+    if len(books) < 2:
+        print("[ERROR] Need at least 2 books to build a neighbor graph")
+        sys.exit(1)
+
+    print(f"[OK] Found {len(books)} books\n")
+
+    print(f"[*] Computing {args.k} nearest neighbors per book...")
+    offsets, neighbors, scores = compute_neighbors(books, args.k)
+
+    save_neighbor_graph(output_path, [b['id'] for b in books], offsets, neighbors, scores, args.k)
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"[OK] Done! Neighbor graph saved to {output_path}")
+    print(f"     Total size: {size_kb:.1f}KB")
+    print(f"     Books: {len(books)}")
+    print(f"     Edges: {len(neighbors)}")
+
+
+if __name__ == '__main__':
+    main()
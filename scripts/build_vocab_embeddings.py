@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompute embeddings for the query vocabulary.
+Query texts are assembled from tropes, moods, pacing values, themes and
+genres, so every term seen in the catalog or in the schema enums is encoded
+once here. vector_search.py composes query vectors from these rows and only
+loads the model for out-of-vocabulary terms.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+def as_list(value):
+    """Normalize a str-or-list catalog field to a list."""
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def schema_enum_terms(schema):
+    """Collect every string enum value from a JSON schema (recursively)."""
+    terms = set()
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == 'enum' and isinstance(value, list):
+                terms.update(v for v in value if isinstance(v, str))
+            else:
+                terms.update(schema_enum_terms(value))
+    elif isinstance(schema, list):
+        for item in schema:
+            terms.update(schema_enum_terms(item))
+    return terms
+
+
+def collect_vocabulary(books, schemas):
+    """Return the sorted set of terms build_query_text() can emit."""
+    terms = set()
+    for book in books:
+        terms.update(as_list(book.get('tropes')))
+        terms.update(as_list(book.get('mood')))
+        terms.update(as_list(book.get('themes')))
+        terms.update(as_list(book.get('pacing')))
+        terms.update(as_list(book.get('genre')))
+        terms.update(as_list(book.get('subgenre')))
+
+    for schema in schemas:
+        terms.update(schema_enum_terms(schema))
+
+    terms.discard('any')  # Never part of a query
+    return sorted(terms)
+
+
+def load_vocab_table(path):
+    """
+    Load a vocabulary table written by this script.
+
+    Returns:
+        tuple: (term -> row index dict, float32 matrix) or None if missing.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with np.load(path, allow_pickle=False) as data:
+        terms = data['terms'].tolist()
+        vectors = data['vectors'].astype(np.float32)
+
+    return {term: i for i, term in enumerate(terms)}, vectors
+
+
+def main():
+    from sentence_transformers import SentenceTransformer
+
+    project_root = Path(__file__).parent.parent
+    catalog_path = project_root / 'data' / 'catalog.json'
+    output_path = project_root / 'data' / 'vocab_embeddings.npz'
+
+    print(f"[*] Reading catalog from {catalog_path}...")
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if isinstance(catalog, list):
+        books = catalog
+    elif isinstance(catalog, dict) and 'books' in catalog:
+        books = catalog['books']
+    else:
+        print("[ERROR] Catalog format not recognized")
+        sys.exit(1)
+
+    schemas = []
+    for schema_path in sorted((project_root / 'schemas').glob('*.schema.json')):
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            schemas.append(json.load(f))
+
+    terms = collect_vocabulary(books, schemas)
+    print(f"[OK] Collected {len(terms)} vocabulary terms\n")
+
+    print(f"[*] Loading sentence-transformers model ({MODEL_NAME})...")
+    model = SentenceTransformer(MODEL_NAME)
+    print("[OK] Model loaded successfully\n")
+
+    print("[*] Encoding vocabulary...")
+    vectors = model.encode(terms, batch_size=64, convert_to_numpy=True).astype(np.float32)
+
+    np.savez_compressed(output_path, terms=np.asarray(terms), vectors=vectors)
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"[OK] Done! Vocabulary embeddings saved to {output_path}")
+    print(f"     Total size: {size_kb:.1f}KB")
+    print(f"     Terms: {len(terms)}")
+    print(f"     Embedding dimensions: {vectors.shape[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Loaded catalogs for long-running processes serving several storefronts or
+language editions.
+
+Catalogs are loaded on first request (data/ for 'default',
+data/catalogs/<id>/ otherwise) and kept in an LRU bounded by a memory
+budget: when the estimated size of the loaded catalogs exceeds it, the least
+recently used ones are dropped. Queries already running on an evicted
+catalog finish normally; they hold their own reference. All catalogs share
+one QueryEncoder (vocabulary table and model).
+
+check_for_updates() hot-reloads catalogs whose files were regenerated: the
+new index is built on a background thread while the old one keeps serving,
+then swapped in with one dict assignment. Queries that already hold the old
+SearchResources finish on it; later ones get the new version.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from fingerprint import DEFAULT_CATALOG, catalog_data_dir
+from vector_search import QueryEncoder, SearchResources
+
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+MB = 1024 * 1024
+
+# A regenerated catalog must be untouched this long before it is reloaded,
+# so a file that is still being written is not picked up half-way
+RELOAD_SETTLE_SECONDS = 2.0
+
+
+class CatalogRegistry:
+    """Memory-budgeted LRU of SearchResources keyed by catalog id."""
+
+    def __init__(self, project_root, memory_budget=DEFAULT_MEMORY_BUDGET, mmap_embeddings=False,
+                 encoder=None, preloaded=None, multi_vector=None):
+        """
+        Args:
+            preloaded: SearchResources already loaded for the default catalog
+            multi_vector: Pooling for multi-vector scoring ('max', 'weighted') or None
+        """
+        self.project_root = Path(project_root)
+        self.memory_budget = memory_budget
+        self.mmap_embeddings = mmap_embeddings
+        self.multi_vector = multi_vector
+        self.encoder = encoder or (preloaded.encoder if preloaded else QueryEncoder(self.project_root))
+
+        self._loaded = OrderedDict()  # catalog id -> (SearchResources, estimated bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # catalog id -> lock held while it loads
+        self._reloading = set()
+        self.loads = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.failed_reloads = 0
+
+        if preloaded is not None:
+            self._insert(DEFAULT_CATALOG, preloaded)
+
+    def data_dir(self, catalog_id):
+        """Validate a catalog id and return its data directory (raises ValueError)."""
+        return catalog_data_dir(self.project_root, catalog_id)
+
+    def peek(self, catalog_id=None):
+        """Return the catalog if it is loaded (marking it recently used), else None."""
+        with self._lock:
+            entry = self._loaded.get(catalog_id or DEFAULT_CATALOG)
+            if entry is None:
+                return None
+            self._loaded.move_to_end(catalog_id or DEFAULT_CATALOG)
+            return entry[0]
+
+    def get(self, catalog_id=None):
+        """Return the loaded catalog, loading it (once, even under concurrency) if needed."""
+        catalog_id = catalog_id or DEFAULT_CATALOG
+
+        with self._lock:
+            entry = self._loaded.get(catalog_id)
+            if entry is not None:
+                self._loaded.move_to_end(catalog_id)
+                return entry[0]
+            load_lock = self._loading.setdefault(catalog_id, threading.Lock())
+
+        with load_lock:
+            try:
+                with self._lock:
+                    entry = self._loaded.get(catalog_id)
+                    if entry is not None:
+                        self._loaded.move_to_end(catalog_id)
+                        return entry[0]
+
+                data_dir = self.data_dir(catalog_id)
+                resources = SearchResources(self.project_root, mmap_embeddings=self.mmap_embeddings,
+                                            data_dir=data_dir, encoder=self.encoder,
+                                            multi_vector=self.multi_vector)
+                self._insert(catalog_id, resources)
+                return resources
+            finally:
+                # Loaded or failed: either way the next caller must not wait on this lock
+                with self._lock:
+                    if self._loading.get(catalog_id) is load_lock:
+                        del self._loading[catalog_id]
+
+    def _insert(self, catalog_id, resources):
+        size = resources.memory_bytes()
+        with self._lock:
+            if catalog_id in self._loaded:
+                self._bytes -= self._loaded.pop(catalog_id)[1]
+            self._loaded[catalog_id] = (resources, size)
+            self._bytes += size
+            self.loads += 1
+
+            # Evict least recently used catalogs, never the one just loaded
+            while self._bytes > self.memory_budget and len(self._loaded) > 1:
+                evicted_id, (_resources, evicted_size) = next(iter(self._loaded.items()))
+                del self._loaded[evicted_id]
+                self._bytes -= evicted_size
+                self.evictions += 1
+                print(f"♻️  Evicted catalog '{evicted_id}' ({evicted_size / MB:.1f}MB)", file=sys.stderr)
+
+        print(f"📚 Loaded catalog '{catalog_id}': {len(resources.books)} books, ~{size / MB:.1f}MB "
+              f"({self._bytes / MB:.1f}/{self.memory_budget / MB:.1f}MB budget)", file=sys.stderr)
+
+    # Hot reload
+
+    def check_for_updates(self):
+        """
+        Start a background reload for each loaded catalog whose files changed.
+
+        Returns:
+            list: Catalog ids being reloaded
+        """
+        if self.encoder.refresh():
+            print("🔄 Reloaded vocabulary table", file=sys.stderr)
+
+        with self._lock:
+            loaded = [(catalog_id, resources) for catalog_id, (resources, _size) in self._loaded.items()]
+
+        started = []
+        for catalog_id, resources in loaded:
+            if catalog_id in self._reloading or resources.fingerprint() == resources.version:
+                continue
+            try:
+                if time.time() - resources.catalog_path.stat().st_mtime < RELOAD_SETTLE_SECONDS:
+                    continue  # Still being written: try again on the next check
+            except FileNotFoundError:
+                continue  # Being replaced: keep serving the loaded version
+
+            self._reloading.add(catalog_id)
+            threading.Thread(target=self._reload, args=(catalog_id, resources),
+                             name=f'reload-{catalog_id}', daemon=True).start()
+            started.append(catalog_id)
+        return started
+
+    def _reload(self, catalog_id, old):
+        try:
+            self._build_and_swap(catalog_id, old)
+        finally:
+            self._reloading.discard(catalog_id)
+
+    def _build_and_swap(self, catalog_id, old):
+        start = time.perf_counter()
+        try:
+            new = SearchResources(self.project_root, old.catalog_path,
+                                  mmap_embeddings=isinstance(old.matrix, np.memmap),
+                                  data_dir=old.data_dir, encoder=self.encoder, multi_vector=old.multi_vector)
+            new.graph  # Load lazily-built parts now so the first query after the swap pays nothing
+            if new.multi_vector:
+                new.book_vectors
+            size = new.memory_bytes()
+        except Exception as e:
+            self.failed_reloads += 1
+            print(f"⚠️  Reload of catalog '{catalog_id}' failed, still serving the loaded version: {str(e)}",
+                  file=sys.stderr)
+            return
+
+        with self._lock:
+            entry = self._loaded.get(catalog_id)
+            if entry is None or entry[0] is not old:
+                return  # Evicted or replaced meanwhile
+            self._loaded[catalog_id] = (new, size)  # Keeps its LRU position
+            self._bytes += size - entry[1]
+            self.reloads += 1
+
+        print(f"🔄 Reloaded catalog '{catalog_id}': {len(new.books)} books, version {new.version} "
+              f"({(time.perf_counter() - start) * 1000:.0f}ms in background)", file=sys.stderr)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': {cid: {'books': len(r.books), 'mb': round(size / MB, 1), 'version': r.version}
+                           for cid, (r, size) in self._loaded.items()},
+                'mb': round(self._bytes / MB, 1),
+                'budget_mb': round(self.memory_budget / MB, 1),
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'reloads': self.reloads,
+                'failed_reloads': self.failed_reloads,
+            }
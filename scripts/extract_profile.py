@@ -5,14 +5,22 @@ Extracts structured user reading preferences from natural language using Anthrop
 Supports bilingual input (ES/EN).
 """
 
+import argparse
+import functools
 import json
 import sys
 import os
 import re
 from pathlib import Path
-from anthropic import Anthropic
+
 import jsonschema
 
+from handoff import dumps
+from llm_client import get_client
+from profiling import StageProfiler, add_profile_argument, resolve_profile_dir
+from request_state import new_request_id, prune_stale_workspaces, requests_root
+from schema_registry import get_registry
+
 
 def load_file(path, encoding='utf-8'):
     """Load file content as string."""
@@ -26,13 +34,14 @@ def load_json(path, encoding='utf-8'):
         return json.load(f)
 
 
+@functools.lru_cache(maxsize=4)
 def build_system_prompt(project_root):
-    """Build the system prompt by combining all necessary reference files."""
+    """Build the system prompt by combining all necessary reference files (cached per process)."""
     # Load the extraction rules
     extractor_rules = load_file(project_root / '.claude' / 'agents' / 'profile-extractor.md')
 
     # Load the JSON schema
-    schema = load_json(project_root / 'schemas' / 'user-profile.schema.json')
+    schema = get_registry(project_root / 'schemas').schemas['user-profile']
     schema_str = json.dumps(schema, indent=2)
 
     # Load genre mapping and adjacency
@@ -91,19 +100,26 @@ def strip_markdown_fences(text):
     return text.strip()
 
 
-def extract_profile(user_input, api_key, project_root):
+def extract_profile(user_input, api_key, project_root, output_path=None, client=None):
     """
     Extract user profile using Anthropic API.
 
+    Args:
+        output_path: Where to persist the profile JSON. None keeps it in memory
+            only (the `criteria` key); callers that need a file pass a
+            request-scoped path so concurrent runs never share one.
+
     Returns dict with:
         - status: "success" or "error"
-        - file: path to criteria.json (if success)
+        - criteria: the validated profile dict (if success)
+        - file: path to the written profile (if success and output_path)
         - message: error message (if error)
         - tokens_used: token count from API
     """
     try:
-        # Initialize Anthropic client
-        client = Anthropic(api_key=api_key)
+        # Initialize Anthropic client (long-running callers pass a shared one)
+        if client is None:
+            client = get_client(api_key)
 
         # Build system prompt
         system_prompt = build_system_prompt(project_root)
@@ -139,10 +155,9 @@ def extract_profile(user_input, api_key, project_root):
                 "message": f"Invalid JSON from API: {str(e)}\nResponse was: {response_text[:200]}..."
             }
 
-        # Validate against schema
-        schema = load_json(project_root / 'schemas' / 'user-profile.schema.json')
+        # Validate against schema (compiled validator cached per process)
         try:
-            jsonschema.validate(profile_data, schema)
+            get_registry(project_root / 'schemas').validate(profile_data, 'user-profile')
             print("✓ Schema validation passed", file=sys.stderr)
         except jsonschema.ValidationError as e:
             return {
@@ -150,23 +165,23 @@ def extract_profile(user_input, api_key, project_root):
                 "message": f"Schema validation failed: {e.message}"
             }
 
-        # Create .cache directory if it doesn't exist
-        cache_dir = project_root / '.cache'
-        cache_dir.mkdir(parents=True, exist_ok=True)
-
-        # Write to .cache/criteria.json
-        output_path = cache_dir / 'criteria.json'
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, indent=2, ensure_ascii=False)
-
-        print(f"✓ Written to {output_path}", file=sys.stderr)
-
-        return {
+        result = {
             "status": "success",
-            "file": str(output_path),
+            "criteria": profile_data,
             "tokens_used": tokens_used
         }
 
+        if output_path is not None:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+
+            print(f"✓ Written to {output_path}", file=sys.stderr)
+            result["file"] = str(output_path)
+
+        return result
+
     except Exception as e:
         return {
             "status": "error",
@@ -176,16 +191,26 @@ def extract_profile(user_input, api_key, project_root):
 
 def main():
     """Main entry point."""
-    # Check arguments
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description='Extract a structured reading profile from natural language')
+    parser.add_argument('user_input', nargs='?', help='Reading preferences in natural language (ES or EN)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--pipe', action='store_true',
+                      help='Write the minified criteria to stdout for the next stage (status goes to stderr)')
+    mode.add_argument('--output', metavar='FILE', help='Where to write the profile JSON')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    pipe_mode = args.pipe
+    output_path = args.output
+
+    if not args.user_input:
         print(json.dumps({
             "status": "error",
-            "message": "Usage: python scripts/extract_profile.py \"<user_input>\""
+            "message": "Usage: python scripts/extract_profile.py [--pipe | --output <file>] [--profile [<dir>]] \"<user_input>\""
         }))
         sys.exit(1)
 
     # Get user input
-    user_input = sys.argv[1]
+    user_input = args.user_input
 
     # Get API key from environment
     api_key = os.environ.get('ANTHROPIC_API_KEY')
@@ -200,11 +225,36 @@ def main():
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
 
-    # Extract profile
-    result = extract_profile(user_input, api_key, project_root)
+    profiler = StageProfiler(resolve_profile_dir(args.profile, project_root), 'extract_profile')
 
-    # Output result to stdout
-    print(json.dumps(result, ensure_ascii=False))
+    # Extract profile
+    if not pipe_mode and output_path is None:
+        # Unique per-request file; the consumer removes its directory when done
+        prune_stale_workspaces(project_root)
+        output_path = requests_root(project_root) / new_request_id() / 'criteria.json'
+
+    with profiler.stage('client'):
+        client = get_client(api_key)
+    with profiler.stage('prompt'):
+        try:
+            build_system_prompt(project_root)
+        except OSError:
+            pass  # Reported by extract_profile below
+    with profiler.stage('extract'):
+        result = extract_profile(user_input, api_key, project_root,
+                                 output_path=None if pipe_mode else output_path, client=client)
+    criteria = result.pop("criteria", None)
+    profiler.report()
+
+    if pipe_mode:
+        # Pipe mode: stdout carries only the minified criteria for the next stage,
+        # the status line goes to stderr
+        print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+        if criteria is not None:
+            print(dumps(criteria))
+    else:
+        # Output result to stdout
+        print(json.dumps(result, ensure_ascii=False))
 
     # Exit with appropriate code
     sys.exit(0 if result["status"] == "success" else 1)
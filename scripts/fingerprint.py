@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Canonical keys for deduplicating and caching pipeline work.
+Two inputs that would produce the same stage output map to the same key.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+# Fields whose order carries no meaning (sorted before hashing)
+UNORDERED_FIELDS = ('books_read', 'books_liked', 'books_disliked', 'secondary_genres')
+
+# Fields that never influence search or presentation
+IGNORED_FIELDS = ('raw_input',)
+
+# Profile fields the presenter writes about (the rest only shape the candidate set)
+PRESENTATION_FIELDS = (
+    'interaction_language', 'primary_genre', 'secondary_genres', 'themes_liked',
+    'themes_disliked', 'mood_preference', 'complexity_preference', 'books_liked',
+    'books_disliked',
+)
+
+
+def normalize_input(text):
+    """Normalize free-text user input: Unicode NFC, case-folded, whitespace collapsed."""
+    return ' '.join(unicodedata.normalize('NFC', text).casefold().split())
+
+
+def canonical_criteria(criteria):
+    """Return criteria with ignored fields dropped and unordered lists sorted."""
+    canonical = {k: v for k, v in criteria.items() if k not in IGNORED_FIELDS}
+    for field in UNORDERED_FIELDS:
+        if isinstance(canonical.get(field), list):
+            canonical[field] = sorted(canonical[field], key=str)
+    return canonical
+
+
+def stable_hash(data):
+    """SHA-256 hex digest of the canonical JSON encoding of `data`."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def input_hash(text):
+    """Key for a raw user message."""
+    return stable_hash(normalize_input(text))
+
+
+def criteria_hash(criteria):
+    """Key for a criteria dict (order- and raw_input-insensitive)."""
+    return stable_hash(canonical_criteria(criteria))
+
+
+def presentation_hash(criteria, candidate_ids):
+    """Key for a presenter call: relevant profile fields plus the ordered candidate ids."""
+    canonical = canonical_criteria(criteria)
+    profile = {k: canonical[k] for k in PRESENTATION_FIELDS if k in canonical}
+    return stable_hash([profile, list(candidate_ids)])
+
+
+DEFAULT_CATALOG = 'default'
+CATALOG_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+
+def catalog_data_dir(project_root, catalog_id=None):
+    """
+    Directory holding a catalog's artifacts: data/ for the default catalog,
+    data/catalogs/<id>/ for storefront or language editions.
+    """
+    project_root = Path(project_root)
+    if catalog_id in (None, DEFAULT_CATALOG):
+        return project_root / 'data'
+    if not CATALOG_ID_PATTERN.match(catalog_id):
+        raise ValueError(f"Invalid catalog id: {catalog_id!r}")
+    data_dir = project_root / 'data' / 'catalogs' / catalog_id
+    if not (data_dir / 'catalog_with_embeddings.json').exists():
+        raise ValueError(f"Unknown catalog: {catalog_id!r}")
+    return data_dir
+
+
+# Per-catalog files whose content changes search output (relative to the catalog's data dir)
+CATALOG_ARTIFACTS = (
+    'catalog_with_embeddings.json',
+    'neighbor_graph.npz',
+    'title-aliases.json',
+    'book_vectors.npz',
+)
+
+# Artifacts shared by every catalog (relative to the project root)
+SHARED_ARTIFACTS = (
+    'data/vocab_embeddings.npz',
+)
+
+
+def genre_adjacency_path(project_root, data_dir=None):
+    """The catalog's own genre-adjacency.json, else the shared data/genre-adjacency.json."""
+    project_root = Path(project_root)
+    if data_dir is not None and (Path(data_dir) / 'genre-adjacency.json').exists():
+        return Path(data_dir) / 'genre-adjacency.json'
+    return project_root / 'data' / 'genre-adjacency.json'
+
+
+def catalog_fingerprint(project_root, catalog_path=None, data_dir=None):
+    """
+    Version fingerprint of a catalog and its derived search artifacts.
+    Built from (path, size, mtime) only, so it costs a few stat() calls;
+    regenerating any artifact yields a new fingerprint.
+
+    Args:
+        data_dir: Directory holding the catalog's artifacts (default: <project_root>/data)
+    """
+    project_root = Path(project_root)
+    data_dir = Path(data_dir) if data_dir else project_root / 'data'
+    paths = [data_dir / name for name in CATALOG_ARTIFACTS] + [project_root / p for p in SHARED_ARTIFACTS]
+    paths.append(genre_adjacency_path(project_root, data_dir))
+    if catalog_path is not None:
+        paths[0] = Path(catalog_path)
+
+    parts = []
+    for path in paths:
+        try:
+            st = path.stat()
+            parts.append([str(path), st.st_size, st.st_mtime_ns])
+        except FileNotFoundError:
+            parts.append([str(path), None, None])
+    return stable_hash(parts)[:16]
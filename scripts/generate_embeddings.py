@@ -7,10 +7,13 @@ Combines book metadata (title, author, genre, tropes, mood, pacing) into
 """
 
 from sentence_transformers import SentenceTransformer
+import argparse
 import json
 import sys
 from pathlib import Path
 
+from schema_registry import format_error, get_registry
+
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     import codecs
@@ -40,6 +43,11 @@ def generate_book_embedding(book, model):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate embeddings for the book catalog')
+    parser.add_argument('--strict', action='store_true',
+                        help='Abort without writing if any entry fails book-entry schema validation')
+    args = parser.parse_args()
+
     # Determine base directory (project root)
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
@@ -71,6 +79,19 @@ def main():
         print(f"  [{i:2d}/{len(books)}] {book['title']:<50} by {book['author']}")
         book['embedding'] = generate_book_embedding(book, model)
 
+    print("\n[*] Validating entries against book-entry schema...")
+    failures = get_registry(project_root / 'schemas').validate_many(books, 'book-entry', fast=False)
+    if failures:
+        for i, errors in failures:
+            for error in errors:
+                print(f"  [WARN] {books[i]['id']}: {format_error(error)}")
+        print(f"[WARN] {len(failures)}/{len(books)} entries do not match the schema")
+        if args.strict:
+            print("[ERROR] Aborting (--strict)")
+            sys.exit(1)
+    else:
+        print(f"[OK] All {len(books)} entries valid")
+
     print("\n[*] Writing catalog with embeddings...")
 
     # Preserve original format
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact inter-stage hand-off format.
+Stages exchange single-line minified JSON over stdin/stdout pipes instead
+of pretty-printed temp files. Search results are projected down to the
+fields the presenter actually reads.
+"""
+
+import json
+import sys
+
+# Book fields the presenter uses to select and explain recommendations
+PRESENTER_FIELDS = (
+    'id', 'title', 'author', 'genre', 'subgenre', 'themes', 'mood', 'tropes',
+    'pacing', 'maturity_level', 'complexity', 'language', 'synopsis', 'year',
+    'cover_url', 'similarity', 'genre_pool', 'relaxed',
+)
+
+STDIN_MARKER = '-'
+
+
+def dumps(data):
+    """Serialize to minified single-line JSON."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def project(books, fields=PRESENTER_FIELDS):
+    """Keep only `fields` of each book (missing fields are skipped)."""
+    return [{k: book[k] for k in fields if k in book} for book in books]
+
+
+def make_bundle(criteria, results, catalog_id=None):
+    """Single message carrying everything the presenter needs."""
+    bundle = {'criteria': criteria, 'results': project(results)}
+    if catalog_id is not None:
+        bundle['catalog'] = catalog_id
+    return bundle
+
+
+def read_json(path):
+    """Read JSON from a file path, or from stdin when path is '-'."""
+    if str(path) == STDIN_MARKER:
+        return json.loads(sys.stdin.buffer.read().decode('utf-8'))
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
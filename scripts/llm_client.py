@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM client factory.
+Returns the Anthropic client, or a local stand-in when RECS_LLM_BACKEND=stub
+so the pipeline, service and load tests can run offline and without cost.
+
+RECS_LLM_BACKEND=record wraps the real client and saves every request/response
+pair as a fixture under RECS_LLM_FIXTURES (default fixtures/llm/), named by a
+hash of the request; RECS_LLM_BACKEND=replay answers from those fixtures
+without network access, sleeping RECS_REPLAY_LATENCY_MS per call ('recorded'
+for the latency measured while recording; default 0).
+
+The stub answers the calls the pipeline makes with schema-valid output:
+    - profile extraction: keyword heuristics over the user input
+    - profile delta (session follow-ups): keyword heuristics over the message
+    - presentation: the first candidates of the search results
+It sleeps RECS_STUB_LATENCY_MS (± RECS_STUB_JITTER_MS) per call to mimic API latency.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+from types import SimpleNamespace
+
+from fingerprint import stable_hash
+
+BACKEND_ENV = 'RECS_LLM_BACKEND'
+LATENCY_ENV = 'RECS_STUB_LATENCY_MS'
+JITTER_ENV = 'RECS_STUB_JITTER_MS'
+FIXTURES_ENV = 'RECS_LLM_FIXTURES'
+REPLAY_LATENCY_ENV = 'RECS_REPLAY_LATENCY_MS'
+DEFAULT_FIXTURES_DIR = Path(__file__).parent.parent / 'fixtures' / 'llm'
+
+# Keyword -> primary_genre, checked in order over accent-folded lowercase input
+GENRE_KEYWORDS = (
+    ('sci-fi', ('ciencia ficcion', 'science fiction', 'sci-fi', 'distopi', 'dystopi', 'space')),
+    ('fantasy', ('fantasia', 'fantasy', 'magia', 'magic', 'dragon')),
+    ('horror', ('terror', 'horror', 'miedo', 'scary')),
+    ('thriller', ('thriller', 'suspenso', 'misterio', 'mystery', 'policial', 'crime')),
+    ('romance', ('romance', 'romantic', 'romantico', 'amor', 'love story')),
+)
+MOOD_KEYWORDS = (
+    ('dark', ('dark', 'oscur', 'sombri')),
+    ('light', ('light', 'liger', 'divertid', 'funny')),
+    ('tense', ('atrapante', 'tense', 'tens', 'gripping')),
+    ('reflective', ('reflexiv', 'reflective', 'filosof', 'philosoph')),
+    ('adventurous', ('aventura', 'adventur')),
+)
+SPANISH_MARKERS = re.compile(r'\b(me|gusta|quiero|libro|libros|leí|lei|novela|una|que|y|de)\b')
+
+PROFILE_MARKER = '# USER PROFILE'
+CANDIDATES_MARKER = '# CANDIDATE BOOKS (from vector search)'
+CANDIDATES_END = '\nSelect the best 3 books'
+SHOWN_MARKER = '# SHOWN BOOKS'
+FOLLOW_UP_MARKER = '# FOLLOW-UP MESSAGE'
+REJECT_KEYWORDS = ('ese no', 'esa no', 'not that one', 'otro', 'another', 'ya lo lei', 'already read')
+
+
+def backend():
+    """Selected backend: '' (Anthropic), 'stub', 'record' or 'replay'."""
+    return os.environ.get(BACKEND_ENV, '').lower()
+
+
+def use_stub():
+    """True when the local stand-in is selected."""
+    return backend() == 'stub'
+
+
+def fixtures_dir():
+    return Path(os.environ.get(FIXTURES_ENV) or DEFAULT_FIXTURES_DIR)
+
+
+def get_client(api_key):
+    """Anthropic client, or StubClient / FixtureClient as selected by RECS_LLM_BACKEND."""
+    if use_stub():
+        return StubClient(
+            latency_ms=float(os.environ.get(LATENCY_ENV, '0')),
+            jitter_ms=float(os.environ.get(JITTER_ENV, '0')),
+        )
+    if backend() == 'replay':
+        return FixtureClient(ReplayMessages(fixtures_dir(), os.environ.get(REPLAY_LATENCY_ENV, '0')))
+
+    from anthropic import Anthropic
+    client = Anthropic(api_key=api_key)
+    if backend() == 'record':
+        return FixtureClient(RecordingMessages(client.messages, fixtures_dir()))
+    return client
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def fold(text):
+    """Lowercase and strip accents."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def first_match(text, table, default):
+    for value, keywords in table:
+        if any(k in text for k in keywords):
+            return value
+    return default
+
+
+def stub_profile(user_input):
+    """Schema-valid user profile derived from keywords in the input."""
+    folded = fold(user_input)
+    language = 'es' if len(SPANISH_MARKERS.findall(folded)) >= 2 else 'en'
+    primary = first_match(folded, GENRE_KEYWORDS, 'literary-fiction')
+    secondary = 'fantasy' if primary == 'sci-fi' else 'sci-fi'
+    return {
+        'primary_genre': primary,
+        'secondary_genres': [secondary],
+        'themes_liked': [],
+        'themes_disliked': [],
+        'mood_preference': first_match(folded, MOOD_KEYWORDS, 'any'),
+        'complexity_preference': 'any',
+        'language_preference': 'any',
+        'books_read': [],
+        'books_liked': [],
+        'books_disliked': [],
+        'interaction_language': language,
+        'raw_input': user_input,
+    }
+
+
+def stub_delta(user_message):
+    """Profile delta for a session follow-up, from keywords in the message."""
+    shown = section_json(user_message, SHOWN_MARKER, FOLLOW_UP_MARKER)
+    folded = fold(user_message[user_message.index(FOLLOW_UP_MARKER) + len(FOLLOW_UP_MARKER):])
+
+    delta = {}
+    mood = first_match(folded, MOOD_KEYWORDS, None)
+    if mood:
+        delta['set'] = {'mood_preference': mood, 'mood': [mood]}
+    genre = first_match(folded, GENRE_KEYWORDS, None)
+    if genre:
+        delta.setdefault('set', {})['primary_genre'] = genre
+    if shown and any(k in folded for k in REJECT_KEYWORDS):
+        delta['exclude'] = [shown[0]['id']]
+    return delta
+
+
+def section_json(message, start_marker, end_marker=None):
+    """Decode the JSON block that follows a heading in the presenter message."""
+    start = message.index(start_marker) + len(start_marker)
+    text = message[start:message.index(end_marker, start)] if end_marker else message[start:]
+    value, _ = json.JSONDecoder().raw_decode(text.strip())
+    return value
+
+
+def stub_presentation(user_message):
+    """Recommendation JSON plus markdown built from the first candidates."""
+    criteria = section_json(user_message, PROFILE_MARKER, CANDIDATES_MARKER)
+    candidates = section_json(user_message, CANDIDATES_MARKER, CANDIDATES_END)
+    if not candidates:
+        raise ValueError('stub presenter received no candidates')
+
+    language = criteria.get('interaction_language', 'en')
+    primary = [b for b in candidates if b.get('genre_pool') != 'secondary'] or candidates
+    secondary = [b for b in candidates if b.get('genre_pool') == 'secondary'] or candidates
+    picks = {
+        'best_match': primary[0],
+        'discovery': primary[1] if len(primary) > 1 else primary[0],
+        'secondary_match': secondary[0],
+    }
+
+    data = {
+        kind: {
+            'book': {k: str(book.get(k, '')) for k in ('id', 'title', 'author', 'genre')},
+            'type': kind,
+            'score': round(min(max(float(book.get('similarity', 0.5)), 0.0), 1.0), 3),
+            'explanation': f"Stub explanation for {book.get('title', '')}.",
+        }
+        for kind, book in picks.items()
+    }
+    data['metadata'] = {
+        'total_candidates_evaluated': len(candidates),
+        'primary_genre': criteria.get('primary_genre', ''),
+        'secondary_genre_used': picks['secondary_match'].get('genre', ''),
+        'interaction_language': language,
+    }
+
+    headings = (('Mejor Elección', 'Descubrimiento', 'Desde Otra Categoría', 'de') if language == 'es'
+                else ('Best Match', 'Discovery', 'From Another Genre', 'by'))
+    lines = []
+    for heading, kind in zip(headings[:3], ('best_match', 'discovery', 'secondary_match')):
+        book = data[kind]['book']
+        lines += ['---', '', f"### {heading}", f"**{book['title']}** {headings[3]} {book['author']}",
+                  '', data[kind]['explanation'], '']
+    lines.append('---')
+
+    return json.dumps(data, ensure_ascii=False, indent=2) + '\n\n' + '\n'.join(lines)
+
+
+class StubMessages:
+    def __init__(self, latency_ms, jitter_ms):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def create(self, model, max_tokens, system, messages, temperature=None, **_kwargs):
+        """Same call shape and response attributes the pipeline uses from the Anthropic SDK."""
+        user_message = messages[-1]['content']
+
+        if CANDIDATES_MARKER in user_message:
+            text = stub_presentation(user_message)
+        elif FOLLOW_UP_MARKER in user_message:
+            text = json.dumps(stub_delta(user_message), ensure_ascii=False)
+        else:
+            text = json.dumps(stub_profile(user_message), ensure_ascii=False)
+
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        return SimpleNamespace(
+            content=[SimpleNamespace(type='text', text=text)],
+            usage=SimpleNamespace(input_tokens=estimate_tokens(system) + estimate_tokens(user_message),
+                                  output_tokens=estimate_tokens(text)),
+            model=model,
+        )
+
+
+class StubClient:
+    """Offline stand-in for anthropic.Anthropic (messages.create only)."""
+
+    def __init__(self, latency_ms=0, jitter_ms=0):
+        self.messages = StubMessages(latency_ms, jitter_ms)
+
+
+# Record / replay
+
+class FixtureMissing(LookupError):
+    """Replay found no recorded response for a request."""
+
+
+def canonical_content(content):
+    """
+    Presenter messages with the candidate JSON replaced by [id, genre_pool, relaxed]
+    rows: similarities are formatted floats that can shift in the last digit
+    between machines or numpy builds without changing what the model is asked.
+    """
+    if not isinstance(content, str) or CANDIDATES_MARKER not in content or CANDIDATES_END not in content:
+        return content
+    try:
+        candidates = section_json(content, CANDIDATES_MARKER, CANDIDATES_END)
+    except ValueError:
+        return content
+    start = content.index(CANDIDATES_MARKER) + len(CANDIDATES_MARKER)
+    end = content.index(CANDIDATES_END, start)
+    return {
+        'text': content[:start] + content[end:],
+        'candidates': [[b.get('id'), b.get('genre_pool'), b.get('relaxed')] for b in candidates],
+    }
+
+
+def request_hash(model, max_tokens, system, messages, temperature=None):
+    """Fixture key: everything that determines the model's answer, in canonical form."""
+    messages = [dict(m, content=canonical_content(m.get('content'))) for m in messages]
+    return stable_hash([model, max_tokens, temperature, system, messages])[:32]
+
+
+def fixture_response(fixture):
+    """Response object with the attributes the pipeline reads from the SDK's Message."""
+    response = fixture['response']
+    return SimpleNamespace(
+        content=[SimpleNamespace(type='text', text=response['text'])],
+        usage=SimpleNamespace(input_tokens=response['input_tokens'], output_tokens=response['output_tokens']),
+        model=response['model'],
+    )
+
+
+class RecordingMessages:
+    """Passes calls through to the real API and saves each exchange as <hash>.json."""
+
+    def __init__(self, messages, directory):
+        self.messages = messages
+        self.directory = Path(directory)
+
+    def create(self, model, max_tokens, system, messages, temperature=None, **kwargs):
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+        start = time.perf_counter()
+        response = self.messages.create(model=model, max_tokens=max_tokens, system=system,
+                                        messages=messages, **kwargs)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        key = request_hash(model, max_tokens, system, messages, temperature)
+        fixture = {
+            'request': {
+                'model': model,
+                'max_tokens': max_tokens,
+                'temperature': temperature,
+                'system_sha256': hashlib.sha256(system.encode('utf-8')).hexdigest(),
+                'messages': messages,
+            },
+            'response': {
+                'text': response.content[0].text,
+                'input_tokens': response.usage.input_tokens,
+                'output_tokens': response.usage.output_tokens,
+                'model': response.model,
+            },
+            'latency_ms': latency_ms,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.directory / f'{key}.json')
+        return response
+
+
+class ReplayMessages:
+    """Answers from recorded fixtures; raises FixtureMissing for unseen requests."""
+
+    def __init__(self, directory, latency_ms='0'):
+        self.directory = Path(directory)
+        self.latency_ms = latency_ms
+
+    def create(self, model, max_tokens, system, messages, temperature=None, **_kwargs):
+        key = request_hash(model, max_tokens, system, messages, temperature)
+        try:
+            with open(self.directory / f'{key}.json', 'r', encoding='utf-8') as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            raise FixtureMissing(f"No recorded response for request {key} in {self.directory} "
+                                 f"(record it with {BACKEND_ENV}=record)")
+
+        delay = fixture.get('latency_ms', 0) if self.latency_ms == 'recorded' else float(self.latency_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return fixture_response(fixture)
+
+
+class FixtureClient:
+    """Stand-in for anthropic.Anthropic around recording or replaying messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
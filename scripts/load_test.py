@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load generator for the recommendation pipeline.
+Replays a JSONL corpus ({"input": "..."} per line) at a configurable
+concurrency and arrival rate against either:
+    - cli:     the three stage scripts, chained per request (per-stage wall time
+               includes each process's start-up)
+    - service: POST /recommend on a running service.py / prefork_server.py
+               (per-stage times come from the response's timings_ms)
+
+Reports throughput, p50/p95/p99 latency per stage, error rates and token
+totals. --stub runs the CLI stages against the local LLM stand-in
+(llm_client.py); for the service target, start the server with
+RECS_LLM_BACKEND=stub instead.
+
+Usage:
+    python scripts/load_test.py --stub --requests 50 --concurrency 4
+    python scripts/load_test.py --target service --url http://localhost:8080 --rate 5 --requests 200
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from llm_client import BACKEND_ENV, JITTER_ENV, LATENCY_ENV
+
+# Force UTF-8 output encoding on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_CORPUS = SCRIPTS_DIR.parent / 'data' / 'load-corpus.jsonl'
+TOKENS_PATTERN = re.compile(r'Tokens used: (\d+)')
+PERCENTILES = (50, 95, 99)
+
+
+def load_corpus(path):
+    """Read the 'input' field of each JSONL line (blank lines and lines without it are skipped)."""
+    inputs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, dict) and entry.get('input'):
+                inputs.append(entry['input'])
+    return inputs
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def ms_since(start):
+    return (time.perf_counter() - start) * 1000
+
+
+class CLITarget:
+    """Runs extract_profile -> vector_search -> present_recommendations per request."""
+
+    name = 'cli'
+
+    def __init__(self, env, timeout):
+        self.env = env
+        self.timeout = timeout
+
+    def run_stage(self, argv, stdin_data):
+        proc = subprocess.run(
+            [sys.executable, *argv], input=stdin_data, capture_output=True,
+            env=self.env, timeout=self.timeout,
+        )
+        stderr = proc.stderr.decode('utf-8', errors='replace')
+        tokens = sum(int(n) for n in TOKENS_PATTERN.findall(stderr))
+        return proc, tokens
+
+    def __call__(self, user_input):
+        stages = (
+            ('profile', [str(SCRIPTS_DIR / 'extract_profile.py'), '--pipe', user_input]),
+            ('search', [str(SCRIPTS_DIR / 'vector_search.py'), '-', '--bundle']),
+            ('present', [str(SCRIPTS_DIR / 'present_recommendations.py'), '--bundle', '-']),
+        )
+        timings, total_tokens, data = {}, 0, b''
+        for stage, argv in stages:
+            start = time.perf_counter()
+            proc, tokens = self.run_stage(argv, data)
+            timings[stage] = ms_since(start)
+            total_tokens += tokens
+            if proc.returncode != 0:
+                return {'error': f'{stage}_exit_{proc.returncode}', 'stages': timings, 'tokens': total_tokens}
+            data = proc.stdout
+        return {'error': None, 'stages': timings, 'tokens': total_tokens}
+
+
+class ServiceTarget:
+    """POSTs each input to /recommend on a running service."""
+
+    name = 'service'
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip('/') + '/recommend'
+        self.timeout = timeout
+
+    def __call__(self, user_input):
+        body = json.dumps({'input': user_input}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            return {'error': f'http_{e.code}', 'stages': {}, 'tokens': 0}
+        except (urllib.error.URLError, OSError) as e:
+            return {'error': type(getattr(e, 'reason', e)).__name__, 'stages': {}, 'tokens': 0}
+        return {'error': None, 'stages': payload.get('timings_ms', {}), 'tokens': payload.get('tokens_used', 0)}
+
+
+def arrival_offsets(count, rate, poisson):
+    """Seconds after start at which each request is released (all at 0 without a rate)."""
+    if not rate:
+        return [0.0] * count
+    offsets, t = [], 0.0
+    for _ in range(count):
+        offsets.append(t)
+        t += random.expovariate(rate) if poisson else 1.0 / rate
+    return offsets
+
+
+def run_load(target, inputs, count, concurrency, rate, poisson):
+    """
+    Replay `count` requests (cycling through inputs) and collect per-request records.
+
+    With a rate, requests are released on schedule regardless of completions
+    (open loop); 'queue' is the time a released request waited for a free
+    worker, and 'total' is measured from its scheduled release.
+    """
+    records = []
+    lock = threading.Lock()
+    offsets = arrival_offsets(count, rate, poisson)
+
+    def execute(i, scheduled):
+        started = time.perf_counter()
+        try:
+            record = target(inputs[i % len(inputs)])
+        except subprocess.TimeoutExpired:
+            record = {'error': 'timeout', 'stages': {}, 'tokens': 0}
+        except Exception as e:
+            record = {'error': type(e).__name__, 'stages': {}, 'tokens': 0}
+        record['stages']['queue'] = (started - scheduled) * 1000
+        record['stages']['total'] = ms_since(scheduled)
+        with lock:
+            records.append(record)
+            done = len(records)
+        if done % max(1, count // 10) == 0 or done == count:
+            print(f"   {done}/{count} completed", file=sys.stderr)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, offset in enumerate(offsets):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(execute, i, start + offset)
+    return records, time.perf_counter() - start
+
+
+def summarize(records, elapsed, target_name, concurrency, rate):
+    """Aggregate request records into the report dict."""
+    errors = Counter(r['error'] for r in records if r['error'])
+    ok = [r for r in records if not r['error']]
+
+    stage_names = []
+    for r in ok:
+        for name in r['stages']:
+            if name not in stage_names:
+                stage_names.append(name)
+
+    stages = {}
+    for name in stage_names:
+        values = sorted(r['stages'][name] for r in ok if name in r['stages'])
+        stages[name] = {
+            'count': len(values),
+            'mean_ms': round(sum(values) / len(values), 1),
+            **{f'p{q}_ms': round(percentile(values, q), 1) for q in PERCENTILES},
+            'max_ms': round(values[-1], 1),
+        }
+
+    tokens = sum(r['tokens'] for r in records)
+    return {
+        'target': target_name,
+        'concurrency': concurrency,
+        'arrival_rate': rate,
+        'requests': len(records),
+        'succeeded': len(ok),
+        'error_rate': round(sum(errors.values()) / len(records), 4) if records else 0.0,
+        'errors': dict(errors),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        'tokens_total': tokens,
+        'tokens_per_request': round(tokens / len(ok), 1) if ok else 0.0,
+        'stages': stages,
+    }
+
+
+def print_report(report):
+    print(f"\n{'=' * 72}")
+    print(f"Target: {report['target']}  concurrency: {report['concurrency']}  "
+          f"rate: {report['arrival_rate'] or 'closed loop'}")
+    print(f"Requests: {report['requests']}  succeeded: {report['succeeded']}  "
+          f"error rate: {report['error_rate']:.1%}  elapsed: {report['elapsed_s']}s")
+    print(f"Throughput: {report['throughput_rps']} req/s")
+    print(f"Tokens: {report['tokens_total']:,} total, {report['tokens_per_request']:,} per request")
+    for kind, n in sorted(report['errors'].items()):
+        print(f"   error {kind}: {n}")
+    print(f"\n{'stage':<10}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, s in report['stages'].items():
+        print(f"{name:<10}{s['count']:>7}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    print('=' * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a request corpus against the pipeline and report latency')
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS,
+                        help=f'JSONL file with one {{"input": "..."}} per line (default: {DEFAULT_CORPUS.name})')
+    parser.add_argument('--target', choices=('cli', 'service'), default='cli')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='Service base URL (--target service)')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='Total requests to send, cycling the corpus (default: corpus size)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Maximum requests in flight (default: 1)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Arrival rate in requests/second (default: closed loop, as fast as concurrency allows)')
+    parser.add_argument('--poisson', action='store_true', help='Exponential inter-arrival times instead of fixed')
+    parser.add_argument('--stub', action='store_true',
+                        help='Run CLI stages against the local LLM stand-in (no API key or network needed)')
+    parser.add_argument('--stub-latency-ms', type=float, default=500, help='Simulated LLM latency per call')
+    parser.add_argument('--stub-jitter-ms', type=float, default=100, help='Uniform jitter on the simulated latency')
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+    parser.add_argument('--output', type=Path, help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    inputs = load_corpus(args.corpus)
+    if not inputs:
+        print(f"❌ Error: No inputs found in {args.corpus}", file=sys.stderr)
+        sys.exit(1)
+    count = args.requests or len(inputs)
+
+    if args.target == 'service':
+        target = ServiceTarget(args.url, args.timeout)
+    else:
+        env = dict(os.environ)
+        if args.stub:
+            env[BACKEND_ENV] = 'stub'
+            env[LATENCY_ENV] = str(args.stub_latency_ms)
+            env[JITTER_ENV] = str(args.stub_jitter_ms)
+            env.setdefault('ANTHROPIC_API_KEY', 'stub')
+        elif not env.get('ANTHROPIC_API_KEY'):
+            print("❌ Error: ANTHROPIC_API_KEY not set (use --stub to run offline)", file=sys.stderr)
+            sys.exit(1)
+        target = CLITarget(env, args.timeout)
+
+    print(f"[*] Replaying {count} requests from {args.corpus} against {target.name} "
+          f"(concurrency {args.concurrency}, rate {args.rate or 'closed loop'})...", file=sys.stderr)
+    records, elapsed = run_load(target, inputs, count, args.concurrency, args.rate, args.poisson)
+
+    report = summarize(records, elapsed, target.name, args.concurrency, args.rate)
+    print_report(report)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-fork server mode for the recommendation service (Linux/macOS).
+The parent process loads the catalog, indexes and sentence-transformers
+model once, memory-maps the embedding matrix, opens the listening socket
+and then forks N workers. Workers share those pages copy-on-write, so each
+extra worker costs only its private memory. The parent reports per-worker
+RSS / PSS / private memory so the real overhead is visible.
+"""
+
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+from service import RecommendationService, build_arg_parser, run_server
+from vector_search import SearchResources
+
+MB = 1024 * 1024
+
+
+def memory_usage(pid):
+    """
+    Memory breakdown of a process from /proc/<pid>/smaps_rollup (Linux).
+
+    Returns:
+        dict: rss, pss, shared, private in bytes, or None if unavailable
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+    except OSError:
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def report_memory(parent_pid, worker_pids):
+    """Print the parent's footprint and each worker's RSS/PSS/private memory."""
+    parent = memory_usage(parent_pid)
+    if parent is None:
+        print("⚠️  Memory report unavailable (/proc/<pid>/smaps_rollup not readable)", file=sys.stderr)
+        return
+
+    print(f"📊 Parent {parent_pid}: RSS {parent['rss'] / MB:.1f}MB", file=sys.stderr)
+    privates = []
+    for pid in sorted(worker_pids):
+        usage = memory_usage(pid)
+        if usage is None:
+            continue
+        privates.append(usage['private'])
+        print(f"   Worker {pid}: RSS {usage['rss'] / MB:.1f}MB  PSS {usage['pss'] / MB:.1f}MB  "
+              f"shared {usage['shared'] / MB:.1f}MB  private {usage['private'] / MB:.1f}MB", file=sys.stderr)
+
+    if privates:
+        mean_private = sum(privates) / len(privates)
+        print(f"📊 Per-worker overhead (mean private): {mean_private / MB:.1f}MB "
+              f"vs {parent['rss'] / MB:.1f}MB for a standalone process", file=sys.stderr)
+
+
+def spawn_worker(service, sock):
+    """Fork one worker serving on the shared listening socket; returns its pid."""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Child
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        asyncio.run(run_server(service, None, None, sock=sock))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} crashed: {str(e)}", file=sys.stderr)
+        exit_code = 1
+    os._exit(exit_code)
+
+
+def main():
+    parser = build_arg_parser()
+    parser.description = 'Pre-fork book recommendation HTTP service'
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes to fork (default: CPU count)')
+    parser.add_argument('--report-interval', type=float, default=0,
+                        help='Seconds between memory reports (default: report once after startup)')
+    parser.add_argument('--lazy-model', action='store_true',
+                        help='Do not preload the model (each worker loads it on first out-of-vocabulary query)')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        print("❌ Error: pre-fork mode requires os.fork (Linux/macOS); use service.py instead", file=sys.stderr)
+        sys.exit(1)
+
+    project_root = Path(__file__).parent.parent
+
+    # Load everything shareable before forking
+    print("🔧 Loading catalog, indexes and model in parent...", file=sys.stderr)
+    resources = SearchResources(project_root, mmap_embeddings=True, multi_vector=args.multi_vector)
+    resources.graph  # Lazy properties: touch them so the data exists before fork
+    resources.vocab
+    if args.multi_vector:
+        resources.book_vectors
+    if not args.lazy_model:
+        resources.get_model()
+
+    service = RecommendationService(
+        project_root,
+        api_key=os.environ.get('ANTHROPIC_API_KEY'),
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        max_queue=args.max_queue,
+        presentation_variants=args.presentation_variants,
+        resources=resources,
+        mmr_lambda=args.mmr,
+        multi_vector=args.multi_vector,
+        catalog_memory=args.catalog_memory_mb * MB,
+        reload_interval=args.reload_interval,
+        encode_batch_size=args.encode_batch_size,
+        encode_max_wait_ms=args.encode_max_wait_ms,
+    )
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.set_inheritable(True)
+
+    # Move everything allocated so far out of the GC's reach: collections in
+    # workers would otherwise write to these objects and un-share their pages
+    gc.collect()
+    gc.freeze()
+
+    parent_pid = os.getpid()
+    workers = set(spawn_worker(service, sock) for _ in range(args.processes))
+    print(f"✓ {len(workers)} workers forked, serving on {sock.getsockname()}", file=sys.stderr)
+
+    stopping = False
+
+    def stop(_signum, _frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    next_report = time.monotonic() + 2.0
+    while not stopping:
+        try:
+            pid, _status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+
+        if pid:
+            workers.discard(pid)
+            print(f"⚠️  Worker {pid} exited, respawning", file=sys.stderr)
+            workers.add(spawn_worker(service, sock))
+            continue
+
+        if next_report is not None and time.monotonic() >= next_report:
+            report_memory(parent_pid, workers)
+            next_report = time.monotonic() + args.report_interval if args.report_interval > 0 else None
+
+        time.sleep(0.2)
+
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in workers:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+
+
+if __name__ == '__main__':
+    main()
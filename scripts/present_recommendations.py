@@ -6,15 +6,24 @@ Selects 3 personalized recommendations from search results and formats output.
 Uses Anthropic API with Sonnet for creative explanations.
 """
 
+import functools
 import json
 import sys
 import os
 import time
 import argparse
 from pathlib import Path
-from anthropic import Anthropic
+
 import jsonschema
 
+from fingerprint import catalog_data_dir, catalog_fingerprint
+from handoff import STDIN_MARKER, read_json
+from llm_client import get_client
+from presentation_cache import PresentationCache, presentation_namespace
+from profiling import StageProfiler, add_profile_argument, resolve_profile_dir
+from results_cache import ResultsCache
+from schema_registry import get_registry
+
 
 def load_file(path, encoding='utf-8'):
     """Load file content as string."""
@@ -28,13 +37,14 @@ def load_json(path, encoding='utf-8'):
         return json.load(f)
 
 
+@functools.lru_cache(maxsize=4)
 def build_system_prompt(project_root):
-    """Build the system prompt by combining all necessary reference files."""
+    """Build the system prompt by combining all necessary reference files (cached per process)."""
     # Load the presenter rules
     presenter_rules = load_file(project_root / '.claude' / 'agents' / 'recommendation-presenter.md')
 
     # Load the JSON schema
-    schema = load_json(project_root / 'schemas' / 'recommendation.schema.json')
+    schema = get_registry(project_root / 'schemas').schemas['recommendation']
     schema_str = json.dumps(schema, indent=2)
 
     # Load the format template
@@ -65,6 +75,7 @@ The JSON portion of your output MUST match this exact schema:
 5. Be specific and personalized - reference actual user preferences
 6. Follow the tone guidelines for each recommendation type (confident, intriguing, bridge-building)
 7. Keep explanations to 2-3 sentences maximum
+8. A candidate with a `relaxed` list does not meet those user constraints (language, maturity, genre); nothing closer was available, so say so briefly in its explanation
 """
 
     return system_prompt
@@ -72,9 +83,11 @@ The JSON portion of your output MUST match this exact schema:
 
 def build_user_message(criteria_path, results_path):
     """Build the user message from criteria and results files."""
-    criteria = load_json(criteria_path)
-    results = load_json(results_path)
+    return build_user_message_from_data(load_json(criteria_path), load_json(results_path))
+
 
+def build_user_message_from_data(criteria, results):
+    """Build the user message from in-memory criteria and results."""
     message = f"""Please select 3 books following the rules and format the response.
 
 # USER PROFILE
@@ -141,7 +154,7 @@ def parse_response(response_text):
     return json_data, markdown_text
 
 
-def present_recommendations(criteria_path, results_path, api_key, project_root):
+def present_recommendations(criteria_path, results_path, api_key, project_root, cache=None):
     """
     Present recommendations using Anthropic API.
 
@@ -152,28 +165,65 @@ def present_recommendations(criteria_path, results_path, api_key, project_root):
         - tokens_used: actual token count from API
         - time_ms: execution time in milliseconds
     """
-    start_time = time.time()
+    # Validate input files exist
+    if not Path(criteria_path).exists():
+        return {
+            "status": "error",
+            "message": f"Criteria file not found: {criteria_path}"
+        }
+
+    if not Path(results_path).exists():
+        return {
+            "status": "error",
+            "message": f"Results file not found: {results_path}"
+        }
 
     try:
-        # Validate input files exist
-        if not Path(criteria_path).exists():
-            return {
-                "status": "error",
-                "message": f"Criteria file not found: {criteria_path}"
-            }
+        criteria = load_json(criteria_path)
+        results = load_json(results_path)
+    except (OSError, json.JSONDecodeError) as e:
+        return {
+            "status": "error",
+            "message": f"Could not read input files: {str(e)}"
+        }
 
-        if not Path(results_path).exists():
+    return present_recommendations_data(criteria, results, api_key, project_root, cache=cache)
+
+
+def present_recommendations_data(criteria, results, api_key, project_root, client=None, cache=None):
+    """
+    Present recommendations from in-memory criteria and search results.
+    Same return contract as present_recommendations(), plus `recommendations`
+    (the validated JSON) and `cached` (True when served by a PresentationCache).
+
+    Args:
+        cache: Optional PresentationCache; hits skip the API call entirely
+    """
+    start_time = time.time()
+    candidate_ids = [book.get('id') for book in results]
+
+    if cache is not None:
+        cached = cache.get(criteria, candidate_ids)
+        if cached is not None:
+            elapsed_ms = int((time.time() - start_time) * 1000)
+            print(json.dumps({"tokens_used": 0, "model": "cache", "time_ms": elapsed_ms}), file=sys.stderr)
             return {
-                "status": "error",
-                "message": f"Results file not found: {results_path}"
+                "status": "success",
+                "markdown": cached["markdown"],
+                "recommendations": cached["recommendations"],
+                "tokens_used": 0,
+                "time_ms": elapsed_ms,
+                "cached": True
             }
 
-        # Initialize Anthropic client
-        client = Anthropic(api_key=api_key)
+    try:
+        # Initialize Anthropic client (long-running callers pass a shared one)
+        if client is None:
+            client = get_client(api_key)
 
         # Build system prompt and user message
         system_prompt = build_system_prompt(project_root)
-        user_message = build_user_message(criteria_path, results_path)
+        user_message = build_user_message_from_data(criteria, results)
 
         # Call API
         print("🔧 Calling Anthropic API (Sonnet)...", file=sys.stderr)
@@ -204,10 +254,9 @@ def present_recommendations(criteria_path, results_path, api_key, project_root):
                 "message": f"Failed to parse response: {str(e)}"
             }
 
-        # Validate JSON against schema
-        schema = load_json(project_root / 'schemas' / 'recommendation.schema.json')
+        # Validate JSON against schema (compiled validator cached per process)
         try:
-            jsonschema.validate(json_data, schema)
+            get_registry(project_root / 'schemas').validate(json_data, 'recommendation')
             validation_status = "passed"
             print("✓ Schema validation passed", file=sys.stderr)
         except jsonschema.ValidationError as e:
@@ -216,6 +265,9 @@ def present_recommendations(criteria_path, results_path, api_key, project_root):
                 "message": f"Schema validation failed: {e.message}"
             }
 
+        if cache is not None:
+            cache.put(criteria, candidate_ids, json_data, markdown_text)
+
         elapsed_ms = int((time.time() - start_time) * 1000)
 
         # Log metrics to stderr
@@ -230,8 +282,10 @@ def present_recommendations(criteria_path, results_path, api_key, project_root):
         return {
             "status": "success",
             "markdown": markdown_text,
+            "recommendations": json_data,
             "tokens_used": tokens_used,
-            "time_ms": elapsed_ms
+            "time_ms": elapsed_ms,
+            "cached": False
         }
 
     except Exception as e:
@@ -245,11 +299,19 @@ def main():
     """Main entry point."""
     # Parse arguments
     parser = argparse.ArgumentParser(description='Present personalized book recommendations')
-    parser.add_argument('--criteria', required=True, help='Path to criteria JSON file')
-    parser.add_argument('--results', required=True, help='Path to search results JSON file')
+    parser.add_argument('--criteria', help='Path to criteria JSON file')
+    parser.add_argument('--results', help='Path to search results JSON file')
+    parser.add_argument('--bundle', help="Path to a vector_search.py --bundle message, or '-' for stdin")
+    parser.add_argument('--cache-variants', type=int, default=0, metavar='N',
+                        help='Cache validated responses per profile and candidate set, '
+                             'keeping up to N phrasings per key (default: off)')
+    add_profile_argument(parser)
 
     args = parser.parse_args()
 
+    if not args.bundle and not (args.criteria and args.results):
+        parser.error('either --bundle or both --criteria and --results are required')
+
     # Get API key from environment
     api_key = os.environ.get('ANTHROPIC_API_KEY')
     if not api_key:
@@ -263,8 +325,41 @@ def main():
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
 
+    profiler = StageProfiler(resolve_profile_dir(args.profile, project_root), 'present_recommendations')
+
+    def open_cache(catalog_id=None):
+        if args.cache_variants <= 0:
+            return None
+        try:
+            fingerprint = catalog_fingerprint(project_root, data_dir=catalog_data_dir(project_root, catalog_id))
+        except ValueError:
+            return None  # Unknown catalog: present without caching
+        return PresentationCache(ResultsCache(project_root / '.cache' / 'results'), fingerprint,
+                                 variants=args.cache_variants, namespace=presentation_namespace(catalog_id))
+
     # Present recommendations
-    result = present_recommendations(args.criteria, args.results, api_key, project_root)
+    if args.bundle:
+        with profiler.stage('client'):
+            client = get_client(api_key)
+        if args.bundle == STDIN_MARKER:
+            # Upstream stages are still running: assemble the prompt while waiting
+            with profiler.stage('prompt'):
+                try:
+                    build_system_prompt(project_root)
+                except OSError:
+                    pass  # Reported by present_recommendations_data below
+
+        with profiler.stage('read_bundle'):
+            bundle = read_json(args.bundle)
+        with profiler.stage('present'):
+            result = present_recommendations_data(bundle['criteria'], bundle['results'], api_key,
+                                                  project_root, client=client,
+                                                  cache=open_cache(bundle.get('catalog')))
+    else:
+        with profiler.stage('present'):
+            result = present_recommendations(args.criteria, args.results, api_key, project_root,
+                                             cache=open_cache())
+    profiler.report()
 
     if result["status"] == "success":
         # Output markdown to stdout
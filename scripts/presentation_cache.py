@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in cache of presenter output (validated recommendation JSON + markdown).
+
+Key: interaction language, the profile fields the presenter writes about and
+the ordered candidate ids (fingerprint.presentation_hash). Each key holds a
+bounded pool of variants: the first `variants` requests for a key still call
+the API and add their phrasing to the pool, later ones are served a random
+variant from it. Entries live in a ResultsCache namespace, so they share its
+LRU eviction, disk tier and catalog-fingerprint invalidation.
+"""
+
+import random
+import threading
+
+from fingerprint import DEFAULT_CATALOG, presentation_hash
+
+PRESENTATION_NAMESPACE = 'presentation'
+DEFAULT_VARIANTS = 3
+
+
+def presentation_namespace(catalog_id=None):
+    """Cache namespace of a catalog's presenter responses."""
+    if catalog_id in (None, DEFAULT_CATALOG):
+        return PRESENTATION_NAMESPACE
+    return f"{PRESENTATION_NAMESPACE}-{catalog_id}"
+
+
+class PresentationCache:
+    """Variant pools of presenter responses on top of a ResultsCache."""
+
+    def __init__(self, results_cache, fingerprint, variants=DEFAULT_VARIANTS, namespace=PRESENTATION_NAMESPACE):
+        """
+        Args:
+            fingerprint: Catalog fingerprint, or a callable returning the current one
+                (long-running processes whose catalog may change)
+            namespace: Cache namespace (one per catalog when several are served)
+        """
+        self.results_cache = results_cache
+        self.namespace = namespace
+        self._fingerprint = fingerprint
+        self.variants = max(1, variants)
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint() if callable(self._fingerprint) else self._fingerprint
+
+    def get(self, criteria, candidate_ids):
+        """Return a cached {'recommendations', 'markdown'} variant, or None while the pool is filling."""
+        pool = self.results_cache.get(self.namespace, self.fingerprint,
+                                      presentation_hash(criteria, candidate_ids))
+        if not pool or len(pool) < self.variants:
+            return None
+        return random.choice(pool)
+
+    def put(self, criteria, candidate_ids, recommendations, markdown):
+        """Add one validated response to the key's pool (ignored once the pool is full)."""
+        key = presentation_hash(criteria, candidate_ids)
+        with self._lock:
+            pool = list(self.results_cache.get(self.namespace, self.fingerprint, key) or [])
+            if len(pool) >= self.variants:
+                return
+            pool.append({'recommendations': recommendations, 'markdown': markdown})
+            self.results_cache.put(self.namespace, self.fingerprint, key, pool)
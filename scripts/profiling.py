@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-stage CPU and memory profiling for the pipeline scripts.
+
+With --profile, each script wraps its stages (catalog load, model load,
+search, API call, ...) in StageProfiler.stage(). For every stage it writes:
+    <label>-<stage>.pstats      cProfile stats (snakeviz, `python -m pstats`)
+    <label>-<stage>.tracemalloc tracemalloc snapshot (tracemalloc.Snapshot.load)
+    <label>-<stage>.top.txt     top allocation sites as plain text
+and a <label>-summary.json with wall time, CPU time and peak traced memory.
+Without --profile the profiler is a no-op.
+"""
+
+import cProfile
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+TOP_ALLOCATIONS = 25
+
+
+def default_profile_dir(project_root):
+    """Fresh directory under .cache/profiles/ named by timestamp."""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return Path(project_root) / '.cache' / 'profiles' / stamp
+
+
+def resolve_profile_dir(value, project_root):
+    """
+    Map a --profile argument to an output directory.
+
+    None (flag absent) disables profiling; '' (flag without a value) picks
+    a fresh directory under .cache/profiles/.
+    """
+    if value is None:
+        return None
+    return Path(value) if value else default_profile_dir(project_root)
+
+
+def add_profile_argument(parser):
+    """Add the shared --profile [DIR] option to an argparse parser."""
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='DIR',
+                        help='Write per-stage cProfile/tracemalloc output to DIR '
+                             '(default: .cache/profiles/<timestamp>/)')
+
+
+class StageProfiler:
+    """Collects one CPU profile and one allocation snapshot per stage."""
+
+    def __init__(self, output_dir, label):
+        self.enabled = output_dir is not None
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.label = label
+        self.stages = []
+        # CPU time spent before profiling began: interpreter start-up and imports
+        self.startup_cpu_ms = round(time.process_time() * 1000, 1)
+
+        if self.enabled:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Profile the enclosed block as one stage (stages must not nest)."""
+        if not self.enabled:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall_ms = (time.perf_counter() - wall_start) * 1000
+            cpu_ms = (time.process_time() - cpu_start) * 1000
+            current, peak = tracemalloc.get_traced_memory()
+            self._save(name, profile, wall_ms, cpu_ms, current, peak)
+
+    def _save(self, name, profile, wall_ms, cpu_ms, current, peak):
+        base = self.output_dir / f'{self.label}-{name}'
+        profile.dump_stats(f'{base}.pstats')
+
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(f'{base}.tracemalloc')
+        with open(f'{base}.top.txt', 'w', encoding='utf-8') as f:
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f'{stat}\n')
+
+        self.stages.append({
+            'stage': name,
+            'wall_ms': round(wall_ms, 1),
+            'cpu_ms': round(cpu_ms, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'retained_kb': round(current / 1024, 1),
+            'pstats': f'{base.name}.pstats',
+            'snapshot': f'{base.name}.tracemalloc',
+        })
+
+    def report(self):
+        """Write <label>-summary.json and print a stage table to stderr."""
+        if not self.enabled:
+            return
+
+        summary = {
+            'label': self.label,
+            'startup_cpu_ms': self.startup_cpu_ms,
+            'stages': self.stages,
+        }
+        with open(self.output_dir / f'{self.label}-summary.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        print_summary(summary)
+        print(f"📁 Profiles written to {self.output_dir}", file=sys.stderr)
+
+
+def print_summary(summary):
+    """Print one process's stage table to stderr."""
+    print(f"⏱️  [{summary['label']}] start-up + imports: {summary['startup_cpu_ms']:.0f}ms CPU", file=sys.stderr)
+    for s in summary['stages']:
+        print(f"   {s['stage']:<16} wall {s['wall_ms']:>9.1f}ms  cpu {s['cpu_ms']:>9.1f}ms  "
+              f"peak {s['peak_kb'] / 1024:>8.1f}MB", file=sys.stderr)
+
+
+def load_summaries(output_dir):
+    """Read every *-summary.json in a profile directory."""
+    summaries = []
+    for path in sorted(Path(output_dir).glob('*-summary.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            summaries.append(json.load(f))
+    return summaries
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request-scoped working directories.
+Each pipeline run gets its own .cache/requests/<request_id>/ directory for
+intermediate files, so concurrent runs on one checkout never overwrite each
+other. Directories are removed when the request finishes; ones left behind
+by crashed runs are pruned after STALE_AFTER_SECONDS.
+"""
+
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+STALE_AFTER_SECONDS = 3600
+
+
+def new_request_id():
+    """Return a unique, filesystem-safe request id."""
+    return uuid.uuid4().hex
+
+
+def requests_root(project_root):
+    return Path(project_root) / '.cache' / 'requests'
+
+
+def prune_stale_workspaces(project_root, max_age_seconds=STALE_AFTER_SECONDS):
+    """Delete request directories older than max_age_seconds."""
+    root = requests_root(project_root)
+    if not root.is_dir():
+        return
+    cutoff = time.time() - max_age_seconds
+    for child in root.iterdir():
+        try:
+            if child.is_dir() and child.stat().st_mtime < cutoff:
+                shutil.rmtree(child, ignore_errors=True)
+        except OSError:
+            pass
+
+
+class RequestWorkspace:
+    """
+    Private working directory for one request.
+
+    Usage:
+        with RequestWorkspace(project_root) as ws:
+            criteria_path = ws.path('criteria.json')
+            ...
+        # directory removed here (unless keep=True)
+    """
+
+    def __init__(self, project_root, request_id=None, keep=False):
+        self.request_id = request_id or new_request_id()
+        self.directory = requests_root(project_root) / self.request_id
+        self.keep = keep
+
+    def __enter__(self):
+        self.directory.mkdir(parents=True, exist_ok=False)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.keep:
+            self.cleanup()
+        return False
+
+    def path(self, name):
+        """Path of a file inside this request's directory."""
+        return self.directory / name
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
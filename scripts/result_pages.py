@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cursor pagination over cached search rankings.
+
+search() keeps the top 10 primary and 5 secondary candidates, so "show me
+more" used to mean searching again with a bigger k. first_page() runs the
+search MAX_PAGES pages deep once and caches the ranking (ids and scores
+only, a few KB) under a random token for RANKING_TTL_SECONDS. Later pages
+are served by next_page() from an opaque cursor: slice the cached ranking
+and copy the books out of the catalog, with no encoding, scoring or filtering.
+
+Page n holds primary rows [10n, 10n+10) and secondary rows [5n, 5n+5), so
+page 0 is exactly what search() returns. With MMR the whole ranking is put
+in page order once, in first_page(): each page picks 4 + 2 rows from a
+10 + 5 window the way search() does, and the rows it passes over stay in the
+window for the next page, so none is lost. Rankings live in a disk-backed
+ResultsCache versioned by the catalog fingerprint: any process can serve a
+cursor, and a regenerated catalog invalidates every outstanding one.
+"""
+
+import base64
+import binascii
+import secrets
+
+from results_cache import ResultsCache
+from vector_search import MMR_PRIMARY_K, MMR_SECONDARY_K, mmr_pool_indices, search
+
+MAX_PAGES = 20
+RANKING_TTL_SECONDS = 15 * 60
+PRIMARY_PAGE_SIZE = 10
+SECONDARY_PAGE_SIZE = 5
+
+
+class CursorError(ValueError):
+    """Malformed, expired or foreign cursor."""
+
+
+def ranking_cache(project_root):
+    """Shared cache of paginated rankings under .cache/rankings."""
+    return ResultsCache(project_root / '.cache' / 'rankings', max_age_seconds=RANKING_TTL_SECONDS)
+
+
+def encode_cursor(token, page):
+    return base64.urlsafe_b64encode(f'{token}.{page}'.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (token, page) or raise CursorError."""
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        token, page = text.rsplit('.', 1)
+        page = int(page)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise CursorError('Invalid cursor')
+    if not token.isascii() or not token.replace('-', '').replace('_', '').isalnum() or page < 0:
+        raise CursorError('Invalid cursor')
+    return token, page
+
+
+def ranked_rows(results):
+    """Compact [id, similarity, relaxed] rows of a ranked pool."""
+    return [[b['id'], b['similarity'], b.get('relaxed')] for b in results]
+
+
+def catalog_books(rows, pool, resources):
+    """Catalog entries (embeddings included) for cached rows."""
+    books = []
+    for book_id, similarity, relaxed in rows:
+        book = dict(resources.books[resources.row_of[book_id]], similarity=similarity, genre_pool=pool)
+        if relaxed:
+            book['relaxed'] = relaxed
+        books.append(book)
+    return books
+
+
+def mmr_page_order(primary, secondary, resources, mmr_lambda):
+    """
+    Reorder the ranked rows so that consecutive MMR_PRIMARY_K / MMR_SECONDARY_K
+    slices are the MMR pages.
+
+    Each page diversifies a window of the next PRIMARY_PAGE_SIZE primary and
+    SECONDARY_PAGE_SIZE secondary rows, as search() does for the first one.
+    Rows a page passes over stay in the window, which is then refilled from
+    the ranking, so every row ends up on some page.
+
+    Returns:
+        tuple: (primary rows, secondary rows) in page order
+    """
+    remaining = (list(primary), list(secondary))
+    windows = ([], [])
+    ordered = ([], [])
+    while any(windows) or any(remaining):
+        for window, rest, size in zip(windows, remaining, (PRIMARY_PAGE_SIZE, SECONDARY_PAGE_SIZE)):
+            refill = max(0, size - len(window))
+            window.extend(rest[:refill])
+            del rest[:refill]
+
+        picks = mmr_pool_indices(catalog_books(windows[0], 'primary', resources),
+                                 catalog_books(windows[1], 'secondary', resources),
+                                 resources.unit_vectors, mmr_lambda, MMR_PRIMARY_K, MMR_SECONDARY_K)
+        for window, rows, picked in zip(windows, ordered, picks):
+            rows.extend(window[i] for i in picked)
+            picked = set(picked)
+            window[:] = [row for i, row in enumerate(window) if i not in picked]
+    return ordered
+
+
+def page_results(ranking, page, resources):
+    """Rebuild one page of catalog entries from the cached rows."""
+    results = []
+    for pool, size in zip(('primary', 'secondary'), ranking['page_sizes']):
+        results.extend(catalog_books(ranking[pool][page * size:(page + 1) * size], pool, resources))
+    for book in results:
+        book.pop('embedding', None)
+    return results
+
+
+def has_page(ranking, page):
+    primary_size, secondary_size = ranking['page_sizes']
+    return len(ranking['primary']) > page * primary_size or len(ranking['secondary']) > page * secondary_size
+
+
+def first_page(criteria, resources, cache, namespace, mmr_lambda=None, relax=True, scores=None,
+               exclude_ids=()):
+    """
+    Search MAX_PAGES deep, cache the ranking and return the first page.
+
+    Returns:
+        tuple: (results, next cursor or None)
+    """
+    results = search(criteria, resources, None, relax, scores, exclude_ids,
+                     PRIMARY_PAGE_SIZE * MAX_PAGES, SECONDARY_PAGE_SIZE * MAX_PAGES)
+    primary = ranked_rows([b for b in results if b['genre_pool'] == 'primary'])
+    secondary = ranked_rows([b for b in results if b['genre_pool'] == 'secondary'])
+    page_sizes = [PRIMARY_PAGE_SIZE, SECONDARY_PAGE_SIZE]
+    if mmr_lambda is not None:
+        primary, secondary = mmr_page_order(primary, secondary, resources, mmr_lambda)
+        page_sizes = [MMR_PRIMARY_K, MMR_SECONDARY_K]
+
+    ranking = {
+        'criteria': criteria,
+        'page_sizes': page_sizes,
+        'primary': primary,
+        'secondary': secondary,
+    }
+    token = secrets.token_urlsafe(12)
+    cache.put(namespace, resources.version, token, ranking)
+    return page_results(ranking, 0, resources), encode_cursor(token, 1) if has_page(ranking, 1) else None
+
+
+def next_page(cursor, resources, cache, namespace):
+    """
+    Serve the page a cursor points to from the cached ranking.
+
+    Returns:
+        tuple: (criteria, results, next cursor or None)
+
+    Raises:
+        CursorError: Malformed cursor, or ranking expired / built on another catalog version
+    """
+    token, page = decode_cursor(cursor)
+    ranking = cache.get(namespace, resources.version, token)
+    if ranking is None:
+        raise CursorError('Cursor expired or the catalog has changed; search again')
+    if not has_page(ranking, page):
+        raise CursorError('Cursor is past the end of the ranking')
+    next_cursor = encode_cursor(token, page + 1) if has_page(ranking, page + 1) else None
+    return ranking['criteria'], page_results(ranking, page, resources), next_cursor
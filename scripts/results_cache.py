@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache for deterministic pipeline outputs (search candidates, optionally
+presenter markdown), keyed by canonical criteria hash plus the catalog
+fingerprint.
+
+Entries live in a bounded in-memory LRU and, when a directory is given, on
+disk under <cache_dir>/<namespace>/<fingerprint>/<key>.json so separate CLI
+processes share them. When the catalog fingerprint changes, directories for
+older fingerprints are deleted: a regenerated catalog can never serve stale
+results.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 24 * 3600
+
+
+class ResultsCache:
+    """Size- and age-bounded LRU with optional disk persistence."""
+
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self._entries = OrderedDict()  # (namespace, fingerprint, key) -> (stored_at, size, value)
+        self._bytes = 0
+        self._fingerprints = {}  # namespace -> last fingerprint seen
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Public API
+
+    def get(self, namespace, fingerprint, key):
+        """Return the cached value or None (missing, expired or stale fingerprint)."""
+        self._check_fingerprint(namespace, fingerprint)
+        entry_key = (namespace, fingerprint, key)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                stored_at, _size, value = entry
+                if now - stored_at <= self.max_age_seconds:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return value
+                self._remove(entry_key)
+
+        value = self._read_disk(namespace, fingerprint, key, now)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._store(entry_key, value, len(json.dumps(value, ensure_ascii=False)), now)
+        self.hits += 1
+        return value
+
+    def put(self, namespace, fingerprint, key, value):
+        """Store a JSON-serializable value."""
+        self._check_fingerprint(namespace, fingerprint)
+        encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        self._store((namespace, fingerprint, key), value, len(encoded), time.time())
+        self._write_disk(namespace, fingerprint, key, encoded)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    # Memory tier
+
+    def _store(self, entry_key, value, size, stored_at):
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            self._entries[entry_key] = (stored_at, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_key):
+        _stored_at, size, _value = self._entries.pop(entry_key)
+        self._bytes -= size
+
+    def _check_fingerprint(self, namespace, fingerprint):
+        """Drop everything cached for older catalog versions of this namespace."""
+        if self._fingerprints.get(namespace) == fingerprint:
+            return
+
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == namespace and k[1] != fingerprint]
+            for entry_key in stale:
+                self._remove(entry_key)
+            self._fingerprints[namespace] = fingerprint
+
+        if self.cache_dir is not None:
+            namespace_dir = self.cache_dir / namespace
+            if namespace_dir.is_dir():
+                for child in namespace_dir.iterdir():
+                    if child.is_dir() and child.name != fingerprint:
+                        shutil.rmtree(child, ignore_errors=True)
+
+    # Disk tier
+
+    def _path(self, namespace, fingerprint, key):
+        return self.cache_dir / namespace / fingerprint / f'{key}.json'
+
+    def _read_disk(self, namespace, fingerprint, key, now):
+        if self.cache_dir is None:
+            return None
+        path = self._path(namespace, fingerprint, key)
+        try:
+            if now - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink()
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_disk(self, namespace, fingerprint, key, encoded):
+        if self.cache_dir is None:
+            return
+        directory = self._path(namespace, fingerprint, key).parent
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            # Atomic write: concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(encoded)
+            os.replace(tmp_path, self._path(namespace, fingerprint, key))
+            self._prune_disk(directory)
+        except OSError:
+            pass  # Disk tier is best-effort
+
+    def _prune_disk(self, directory):
+        """Keep at most max_entries files per directory, dropping the oldest."""
+        files = list(directory.glob('*.json'))
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared JSON schema registry.
+Loads every schemas/*.schema.json once per process, checks each schema and
+compiles its validator, so pipeline stages stop re-reading schema files and
+rebuilding validators on every call.
+
+Two validation modes:
+    - validate(): fast-fail, raises the first jsonschema.ValidationError (hot paths)
+    - errors():   full report, every error sorted by location (tests, ingestion)
+"""
+
+import json
+import threading
+from pathlib import Path
+
+import jsonschema
+from jsonschema.validators import validator_for
+
+DEFAULT_SCHEMA_DIR = Path(__file__).parent.parent / 'schemas'
+
+_registries = {}
+_lock = threading.Lock()
+
+
+class SchemaRegistry:
+    """Compiled validators for all schemas in one directory, keyed by name ('user-profile')."""
+
+    def __init__(self, schema_dir):
+        self.schema_dir = Path(schema_dir)
+        self.schemas = {}
+        self.validators = {}
+
+        for path in sorted(self.schema_dir.glob('*.schema.json')):
+            name = path.name[:-len('.schema.json')]
+            with open(path, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            self.schemas[name] = schema
+            self.validators[name] = cls(schema)
+
+    def validator(self, name):
+        """Return the compiled validator for a schema name."""
+        try:
+            return self.validators[name]
+        except KeyError:
+            raise KeyError(f"Unknown schema '{name}' (available: {sorted(self.validators)})")
+
+    def validate(self, data, name):
+        """Fast-fail validation: raise the first jsonschema.ValidationError found."""
+        error = next(self.validator(name).iter_errors(data), None)
+        if error is not None:
+            raise error
+
+    def is_valid(self, data, name):
+        """Return True if data matches the schema."""
+        return self.validator(name).is_valid(data)
+
+    def errors(self, data, name):
+        """Full report: every validation error, sorted by location in the document."""
+        return sorted(self.validator(name).iter_errors(data), key=lambda e: list(e.absolute_path))
+
+    def validate_many(self, items, name, fast=True):
+        """
+        Validate a batch of documents against one schema.
+
+        Args:
+            fast: Report only the first error per item instead of all of them
+
+        Returns:
+            list: (index, [ValidationError, ...]) for each invalid item
+        """
+        validator = self.validator(name)
+        failures = []
+        for i, item in enumerate(items):
+            if fast:
+                error = next(validator.iter_errors(item), None)
+                item_errors = [error] if error is not None else []
+            else:
+                item_errors = self.errors(item, name)
+            if item_errors:
+                failures.append((i, item_errors))
+        return failures
+
+
+def get_registry(schema_dir=DEFAULT_SCHEMA_DIR):
+    """Return the process-wide registry for a schema directory (built on first use)."""
+    key = Path(schema_dir).resolve()
+    registry = _registries.get(key)
+    if registry is None:
+        with _lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = SchemaRegistry(key)
+                _registries[key] = registry
+    return registry
+
+
+def format_error(error):
+    """One-line description of a validation error: '<path>: <message>'."""
+    location = '/'.join(str(p) for p in error.absolute_path) or '<root>'
+    return f"{location}: {error.message}"
+
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio HTTP recommendation service.
+Runs the three pipeline stages (extract_profile, vector_search,
+present_recommendations) in one warm process: the catalog, indexes and
+model are loaded once, blocking API calls and CPU-bound scoring run in a
+thread pool, and admission control rejects work beyond the queue limit
+with 503 instead of letting latency grow without bound.
+
+Endpoints (JSON in, JSON out):
+    POST /profile    {"input": "..."}                    -> {"criteria": {...}, "tokens_used": N}
+    POST /search     {"criteria": {...}, "catalog": "id"?} -> {"results": [...]}
+                     add "paginate": true              -> {"results": [...], "next_cursor": "..."|null}
+                     {"cursor": "...", "catalog": "id"?} -> next page, same shape
+    POST /recommend  {"input": "...", "catalog": "id"?}    -> {"markdown": "...", "criteria": {...}, ...}
+    GET  /health                                         -> {"status": "ok", ...}
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from extract_profile import extract_profile
+from batch_encoder import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS
+from catalog_registry import DEFAULT_MEMORY_BUDGET, MB, CatalogRegistry
+from fingerprint import DEFAULT_CATALOG, input_hash, presentation_hash
+from handoff import project
+from llm_client import get_client
+from present_recommendations import present_recommendations_data
+from presentation_cache import PresentationCache, presentation_namespace
+from result_pages import CursorError, first_page, next_page, ranking_cache
+from results_cache import ResultsCache
+from single_flight import SingleFlight
+from vector_search import MMR_LAMBDA, SearchResources, search, search_cache_key, search_namespace
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+
+HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    502: 'Bad Gateway',
+    503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    """Error that maps directly to an HTTP status and JSON body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Overloaded(HTTPError):
+    def __init__(self):
+        super().__init__(503, 'Server overloaded, retry later')
+
+
+class AdmissionController:
+    """
+    Bounds concurrent work to `max_inflight` and waiting work to `max_queue`.
+    Requests beyond inflight + queue are rejected immediately.
+    """
+
+    def __init__(self, max_inflight, max_queue):
+        self.semaphore = asyncio.Semaphore(max_inflight)
+        self.max_pending = max_inflight + max_queue
+        self.pending = 0
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+        self.pending += 1
+        try:
+            async with self.semaphore:
+                yield
+        finally:
+            self.pending -= 1
+
+
+class RecommendationService:
+    """Holds warm resources and runs pipeline stages for HTTP handlers."""
+
+    def __init__(self, project_root, api_key, workers, max_inflight, max_queue, preload_model=False,
+                 presentation_variants=0, resources=None, mmr_lambda=None,
+                 catalog_memory=DEFAULT_MEMORY_BUDGET, reload_interval=0, encode_batch_size=0,
+                 encode_max_wait_ms=DEFAULT_MAX_WAIT_MS, multi_vector=None):
+        self.project_root = Path(project_root)
+        self.api_key = api_key
+        self._client = None
+        self._client_pid = None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stage')
+        self.admission = AdmissionController(max_inflight, max_queue)
+        self.flights = SingleFlight()
+        self.cache = ResultsCache(self.project_root / '.cache' / 'results')
+        self.rankings = ranking_cache(self.project_root)
+        self.presentation_variants = presentation_variants
+        self.presentations = {}  # catalog id -> PresentationCache
+        self.mmr_lambda = mmr_lambda
+        self.multi_vector = multi_vector
+        # The default catalog is loaded up front; others on first request
+        self.catalogs = CatalogRegistry(
+            self.project_root, catalog_memory,
+            preloaded=resources or SearchResources(self.project_root, multi_vector=multi_vector),
+            multi_vector=multi_vector
+        )
+        self.reload_interval = reload_interval
+        if encode_batch_size > 1:
+            self.catalogs.encoder.enable_batching(encode_batch_size, encode_max_wait_ms)
+        if preload_model:
+            self.catalogs.encoder.get_model()
+
+    @property
+    def client(self):
+        """Anthropic client, created per process (HTTP connections must not cross a fork)."""
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = get_client(self.api_key) if self.api_key else None
+            self._client_pid = os.getpid()
+        return self._client
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking stage in the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def catalog_data_dir(self, catalog_id):
+        try:
+            return self.catalogs.data_dir(catalog_id)
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+
+    async def catalog(self, catalog_id=None):
+        """Loaded SearchResources for a catalog (loading it in the pool if needed)."""
+        self.catalog_data_dir(catalog_id)
+        resources = self.catalogs.peek(catalog_id)
+        if resources is None:
+            resources = await self.run_blocking(self.catalogs.get, catalog_id)
+        return resources
+
+    async def watch_catalogs(self):
+        """Check for regenerated catalogs every reload_interval seconds (rebuilds run in background)."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.run_blocking(self.catalogs.check_for_updates)
+            except Exception as e:
+                print(f"⚠️  Catalog update check failed: {str(e)}", file=sys.stderr)
+
+    def presentation_cache(self, catalog_id):
+        """Per-catalog presenter cache, or None when disabled."""
+        if self.presentation_variants <= 0:
+            return None
+        catalog_id = catalog_id or DEFAULT_CATALOG
+        cache = self.presentations.get(catalog_id)
+        if cache is None:
+            # Versioned by the index actually serving, which may lag the files during a reload
+            cache = PresentationCache(self.cache, lambda: self.catalogs.get(catalog_id).version,
+                                      self.presentation_variants, namespace=presentation_namespace(catalog_id))
+            self.presentations[catalog_id] = cache
+        return cache
+
+    def require_api_key(self):
+        if not self.api_key:
+            raise HTTPError(500, 'ANTHROPIC_API_KEY environment variable not set')
+
+    # Stages (identical concurrent calls are coalesced into one execution each)
+
+    async def profile(self, user_input):
+        self.require_api_key()
+
+        async def run():
+            result = await self.run_blocking(
+                lambda: extract_profile(user_input, self.api_key, self.project_root,
+                                        client=self.client)
+            )
+            if result['status'] != 'success':
+                raise HTTPError(502, result.get('message', 'Profile extraction failed'))
+            return result
+
+        return await self.flights.do(('profile', input_hash(user_input)), run)
+
+    async def search(self, criteria, catalog_id=None):
+        key = search_cache_key(criteria, self.mmr_lambda, multi_vector=self.multi_vector)
+        namespace = search_namespace(catalog_id)
+
+        async def run():
+            # Cache entries are versioned by the index that produced them, so a
+            # query finishing on the old index during a reload never poisons the new one
+            resources = await self.catalog(catalog_id)
+            fingerprint = resources.version
+            cached = self.cache.get(namespace, fingerprint, key)
+            if cached is not None:
+                return project(cached)
+            results = await self.run_blocking(search, criteria, resources, self.mmr_lambda)
+            self.cache.put(namespace, fingerprint, key, results)
+            return project(results)
+
+        return await self.flights.do(('search', namespace, key), run)
+
+    async def search_page(self, criteria=None, cursor=None, catalog_id=None):
+        """First page of a cached ranking, or the page a cursor points to (no re-scoring)."""
+        resources = await self.catalog(catalog_id)
+        namespace = search_namespace(catalog_id)
+        if cursor is None:
+            results, next_cursor = await self.run_blocking(
+                lambda: first_page(criteria, resources, self.rankings, namespace, self.mmr_lambda)
+            )
+        else:
+            try:
+                _criteria, results, next_cursor = await self.run_blocking(
+                    next_page, cursor, resources, self.rankings, namespace)
+            except CursorError as e:
+                raise HTTPError(400, str(e))
+        return project(results), next_cursor
+
+    async def present(self, criteria, results, catalog_id=None):
+        self.require_api_key()
+        cache = self.presentation_cache(catalog_id)
+
+        async def run():
+            result = await self.run_blocking(
+                lambda: present_recommendations_data(criteria, results, self.api_key, self.project_root,
+                                                     client=self.client, cache=cache)
+            )
+            if result['status'] != 'success':
+                raise HTTPError(502, result.get('message', 'Presentation failed'))
+            return result
+
+        key = ('present', catalog_id, presentation_hash(criteria, [b['id'] for b in results]))
+        return await self.flights.do(key, run)
+
+    # Endpoints
+
+    async def handle(self, method, path, body):
+        if path == '/health':
+            return {
+                'status': 'ok',
+                'catalogs': self.catalogs.stats(),
+                'pending': self.admission.pending,
+                'rejected': self.admission.rejected,
+                'single_flight': self.flights.stats(),
+                'cache': self.cache.stats(),
+                'rankings': self.rankings.stats(),
+                'encode_batching': self.catalogs.encoder.batch_stats(),
+            }
+
+        routes = {
+            '/profile': self.handle_profile,
+            '/search': self.handle_search,
+            '/recommend': self.handle_recommend,
+        }
+        handler = routes.get(path)
+        if handler is None:
+            raise HTTPError(404, f'Unknown endpoint: {path}')
+        if method != 'POST':
+            raise HTTPError(405, f'{path} requires POST')
+
+        async with self.admission.admit():
+            return await handler(body)
+
+    async def handle_profile(self, body):
+        result = await self.profile(require_field(body, 'input', str))
+        return {'criteria': result['criteria'], 'tokens_used': result.get('tokens_used', 0)}
+
+    async def handle_search(self, body):
+        if isinstance(body, dict) and 'cursor' in body:
+            results, next_cursor = await self.search_page(cursor=require_field(body, 'cursor', str),
+                                                          catalog_id=optional_field(body, 'catalog', str))
+            return {'results': results, 'next_cursor': next_cursor}
+
+        criteria = require_field(body, 'criteria', dict)
+        catalog_id = optional_field(body, 'catalog', str)
+        if optional_field(body, 'paginate', bool):
+            results, next_cursor = await self.search_page(criteria, catalog_id=catalog_id)
+            return {'results': results, 'next_cursor': next_cursor}
+        return {'results': await self.search(criteria, catalog_id)}
+
+    async def handle_recommend(self, body):
+        user_input = require_field(body, 'input', str)
+        catalog_id = optional_field(body, 'catalog', str)
+        self.catalog_data_dir(catalog_id)  # Unknown catalog: 404 before any API call
+        timings = {}
+
+        start = time.perf_counter()
+        profile = await self.profile(user_input)
+        timings['profile'] = elapsed_ms(start)
+
+        start = time.perf_counter()
+        results = await self.search(profile['criteria'], catalog_id)
+        timings['search'] = elapsed_ms(start)
+
+        start = time.perf_counter()
+        presented = await self.present(profile['criteria'], results, catalog_id)
+        timings['present'] = elapsed_ms(start)
+
+        return {
+            'markdown': presented['markdown'],
+            'criteria': profile['criteria'],
+            'tokens_used': profile.get('tokens_used', 0) + presented.get('tokens_used', 0),
+            'timings_ms': timings,
+        }
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def require_field(body, name, expected_type):
+    """Fetch a required field from the request body or raise 400."""
+    if not isinstance(body, dict) or not isinstance(body.get(name), expected_type):
+        raise HTTPError(400, f"Request body must contain '{name}' ({expected_type.__name__})")
+    value = body[name]
+    if isinstance(value, str) and not value.strip():
+        raise HTTPError(400, f"'{name}' must not be empty")
+    return value
+
+
+def optional_field(body, name, expected_type):
+    """Fetch an optional field from the request body (None if absent) or raise 400."""
+    value = body.get(name)
+    if value is not None and not isinstance(value, expected_type):
+        raise HTTPError(400, f"'{name}' must be {expected_type.__name__}")
+    return value
+
+
+async def read_request(reader):
+    """
+    Parse one HTTP/1.1 request.
+
+    Returns:
+        tuple: (method, path, headers, body) or None on clean EOF
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, target, _version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line')
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(400, 'Too many headers')
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise HTTPError(400, 'Invalid Content-Length')
+    if length < 0:
+        raise HTTPError(400, 'Invalid Content-Length')
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f'Body exceeds {MAX_BODY_BYTES} bytes')
+
+    body = None
+    if length:
+        raw = await reader.readexactly(length)
+        try:
+            body = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f'Invalid JSON body: {str(e)}')
+
+    path = target.split('?', 1)[0]
+    return method.upper(), path, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    head = [
+        f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}',
+        'Content-Type: application/json; charset=utf-8',
+        f'Content-Length: {len(data)}',
+        f'Connection: {"keep-alive" if keep_alive else "close"}',
+    ]
+    if status == 503:
+        head.append('Retry-After: 1')
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+
+
+async def serve_connection(service, reader, writer):
+    """Serve requests on one connection until the client closes it."""
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = 200, await service.handle(method, path, body)
+            except HTTPError as e:
+                status, payload = e.status, {'status': 'error', 'message': e.message}
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as e:
+                status, payload = 500, {'status': 'error', 'message': str(e)}
+
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def run_server(service, host, port, sock=None):
+    handler = lambda r, w: serve_connection(service, r, w)
+    if sock is not None:
+        server = await asyncio.start_server(handler, sock=sock)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+
+    addresses = ', '.join(str(s.getsockname()) for s in server.sockets)
+    print(f"✓ Serving on {addresses} (pid {os.getpid()})", file=sys.stderr)
+    watcher = asyncio.create_task(service.watch_catalogs()) if service.reload_interval > 0 else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Book recommendation HTTP service')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port (default: 8080)')
+    parser.add_argument('--workers', type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help='Thread pool size for API calls and scoring')
+    parser.add_argument('--max-inflight', type=int, default=16,
+                        help='Requests processed concurrently (default: 16)')
+    parser.add_argument('--max-queue', type=int, default=64,
+                        help='Requests allowed to wait before returning 503 (default: 64)')
+    parser.add_argument('--preload-model', action='store_true',
+                        help='Load the sentence-transformers model at startup')
+    parser.add_argument('--presentation-variants', type=int, default=0, metavar='N',
+                        help='Cache presenter responses per profile and candidate set, '
+                             'keeping up to N phrasings per key (default: off)')
+    parser.add_argument('--mmr', type=float, nargs='?', const=MMR_LAMBDA, default=None, metavar='LAMBDA',
+                        help=f'Send the presenter a diverse candidate subset (default lambda: {MMR_LAMBDA})')
+    parser.add_argument('--multi-vector', nargs='?', const='max', choices=('max', 'weighted'), default=None,
+                        help='Score with several vectors per book (book_vectors.npz), pooled by max '
+                             '(default) or a weighted mean')
+    parser.add_argument('--catalog-memory-mb', type=int, default=DEFAULT_MEMORY_BUDGET // MB,
+                        help='Memory budget for loaded catalogs; least recently used ones are evicted '
+                             f'(default: {DEFAULT_MEMORY_BUDGET // MB})')
+    parser.add_argument('--reload-interval', type=float, default=10,
+                        help='Seconds between checks for regenerated catalogs to hot-reload (0 disables; default: 10)')
+    parser.add_argument('--encode-batch-size', type=int, default=DEFAULT_MAX_BATCH, metavar='N',
+                        help='Batch query encodes from concurrent requests, up to N texts per model call '
+                             f'(0 disables; default: {DEFAULT_MAX_BATCH})')
+    parser.add_argument('--encode-max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS, metavar='MS',
+                        help='How long the first text in a batch waits for others to join '
+                             f'(default: {DEFAULT_MAX_WAIT_MS:g})')
+    return parser
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    project_root = Path(__file__).parent.parent
+
+    print("🔧 Loading catalog and search indexes...", file=sys.stderr)
+    service = RecommendationService(
+        project_root,
+        api_key=os.environ.get('ANTHROPIC_API_KEY'),
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        max_queue=args.max_queue,
+        preload_model=args.preload_model,
+        presentation_variants=args.presentation_variants,
+        mmr_lambda=args.mmr,
+        multi_vector=args.multi_vector,
+        catalog_memory=args.catalog_memory_mb * MB,
+        reload_interval=args.reload_interval,
+        encode_batch_size=args.encode_batch_size,
+        encode_max_wait_ms=args.encode_max_wait_ms,
+    )
+
+    try:
+        asyncio.run(run_server(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversation sessions: follow-up messages refine the previous turn instead
+of starting over.
+
+The first turn runs the full pipeline in one process and keeps, under
+.cache/sessions/<id>/, the extracted profile, the query vector, the score of
+every catalog book and the books shown. A follow-up ("algo más ligero",
+"ese no") is extracted as a profile delta with a short prompt (the current
+profile and the shown books instead of the full extraction rules), then:
+    - changes that only filter (language, genre, rejected books) re-filter
+      the stored scores: no encoding, no scoring
+    - changes to query terms (mood, tropes, themes) move the stored query
+      vector by the terms that changed and re-score with one mat-vec
+Only the presenter call costs as much as on the first turn.
+
+Usage:
+    python scripts/session.py --session lucia "Quiero fantasía oscura"
+    python scripts/session.py --session lucia "algo más ligero"
+    python scripts/session.py --session lucia --reset "I love space opera"
+"""
+
+import argparse
+import copy
+import functools
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import jsonschema
+import numpy as np
+
+from extract_profile import extract_profile, strip_markdown_fences
+from fingerprint import DEFAULT_CATALOG, catalog_data_dir
+from llm_client import FOLLOW_UP_MARKER, SHOWN_MARKER, get_client
+from present_recommendations import present_recommendations_data
+from schema_registry import get_registry
+from vector_search import (
+    MMR_LAMBDA, SearchResources, build_query_terms, compose_query_embedding, search,
+)
+
+# Force UTF-8 output encoding on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+SESSION_TTL_SECONDS = 7 * 24 * 3600
+DELTA_MODEL = "claude-haiku-4-5-20251001"
+CURRENT_PROFILE_MARKER = '# CURRENT PROFILE'
+
+# Search-only criteria fields the profile schema does not describe
+SEARCH_FIELDS = {
+    'mood': 'list of book moods, used as search terms',
+    'tropes': 'list of narrative tropes (e.g. found-family, slow-burn), used as search terms',
+    'pacing': 'one of slow, moderate, fast',
+    'maturity_level': 'integer 1-5, minimum maturity of the books',
+}
+
+
+def sessions_root(project_root):
+    return Path(project_root) / '.cache' / 'sessions'
+
+
+def prune_stale_sessions(project_root, max_age_seconds=SESSION_TTL_SECONDS):
+    """Delete sessions untouched for max_age_seconds."""
+    root = sessions_root(project_root)
+    if not root.is_dir():
+        return
+    cutoff = time.time() - max_age_seconds
+    for child in root.iterdir():
+        try:
+            if child.is_dir() and child.stat().st_mtime < cutoff:
+                shutil.rmtree(child, ignore_errors=True)
+        except OSError:
+            pass
+
+
+class Session:
+    """
+    Persistent state of one conversation.
+    state.json holds the profile, exclusions, shown books and turn log;
+    vectors.npz holds the query vector and the per-book score array.
+    """
+
+    def __init__(self, project_root, session_id):
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        self.directory = sessions_root(project_root) / session_id
+        self.state = None
+        self.query = None
+        self.scores = None
+
+    @property
+    def exists(self):
+        return self.state is not None
+
+    def load(self):
+        try:
+            with open(self.directory / 'state.json', 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+            with np.load(self.directory / 'vectors.npz', allow_pickle=False) as data:
+                self.query = data['query']
+                self.scores = data['scores']
+        except (FileNotFoundError, KeyError, ValueError):
+            self.state = self.query = self.scores = None  # Missing or unreadable: start over
+        return self
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so an interrupted turn leaves the previous state intact
+        tmp = self.directory / f'vectors.{os.getpid()}.tmp.npz'
+        np.savez(tmp, query=self.query, scores=self.scores)
+        os.replace(tmp, self.directory / 'vectors.npz')
+        tmp = self.directory / f'state.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.directory / 'state.json')
+
+    def reset(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.state = self.query = self.scores = None
+
+
+def describe_fields(profile_schema, book_schema):
+    """One line per editable field with its type and allowed values."""
+    lines = []
+    for name, spec in profile_schema['properties'].items():
+        if name == 'raw_input':
+            continue
+        values = spec.get('enum') or spec.get('items', {}).get('enum')
+        kind = 'list' if spec.get('type') == 'array' else ('one' if values else spec.get('type', 'value'))
+        lines.append(f"- {name}: {kind}" + (f" of {', '.join(map(str, values))}" if values else ''))
+    moods = book_schema['properties']['mood']['items']['enum']
+    for name, description in SEARCH_FIELDS.items():
+        if name == 'mood':
+            description += f" ({', '.join(moods)})"
+        lines.append(f"- {name}: {description}")
+    return '\n'.join(lines)
+
+
+@functools.lru_cache(maxsize=4)
+def build_delta_prompt(project_root):
+    """System prompt for follow-up extraction (cached per process)."""
+    schemas = get_registry(project_root / 'schemas').schemas
+    fields = describe_fields(schemas['user-profile'], schemas['book-entry'])
+
+    return f"""You update a reader's book recommendation profile from a follow-up message in an ongoing conversation.
+
+# PROFILE FIELDS
+
+{fields}
+
+# OUTPUT
+
+Return ONLY a JSON object with any of these keys (omit keys that do not change anything):
+- "set": {{field: value}} to replace a field (scalars, or a whole list)
+- "add": {{list field: [values]}} to append to a list field
+- "remove": {{list field: [values]}} to drop values from a list field
+- "exclude": [ids of SHOWN BOOKS the user rejects or has already read]
+
+Change only what the message asks for. Examples:
+- "algo más ligero" -> {{"set": {{"mood_preference": "light", "mood": ["light"]}}}}
+- "ese no, ya lo leí" about the first shown book -> {{"exclude": ["<its id>"], "add": {{"books_read": ["<its title>"]}}}}
+- "in Spanish please" -> {{"set": {{"language_preference": "es"}}}}
+- "more romance" -> {{"add": {{"secondary_genres": ["romance"]}}}}
+
+No markdown code fences, no explanation.
+"""
+
+
+def build_delta_message(profile, shown, message):
+    return (f"{CURRENT_PROFILE_MARKER}\n\n{json.dumps(profile, indent=2, ensure_ascii=False)}\n\n"
+            f"{SHOWN_MARKER}\n\n{json.dumps(shown, ensure_ascii=False)}\n\n"
+            f"{FOLLOW_UP_MARKER}\n\n{message}")
+
+
+def extract_delta(message, profile, shown, project_root, client):
+    """
+    Ask the model how a follow-up message changes the profile.
+
+    Returns dict with status, delta (if success), message (if error), tokens_used.
+    """
+    try:
+        print("🔧 Calling Anthropic API (Haiku, follow-up)...", file=sys.stderr)
+        response = client.messages.create(
+            model=DELTA_MODEL,
+            max_tokens=500,
+            temperature=0,
+            system=build_delta_prompt(project_root),
+            messages=[{"role": "user", "content": build_delta_message(profile, shown, message)}]
+        )
+        tokens_used = response.usage.input_tokens + response.usage.output_tokens
+        print(f"📊 Tokens used: {tokens_used} (input: {response.usage.input_tokens}, output: {response.usage.output_tokens})", file=sys.stderr)
+        delta = json.loads(strip_markdown_fences(response.content[0].text))
+    except json.JSONDecodeError as e:
+        return {"status": "error", "message": f"Invalid JSON from API: {str(e)}"}
+    except Exception as e:
+        return {"status": "error", "message": f"API error: {str(e)}"}
+    return {"status": "success", "delta": delta, "tokens_used": tokens_used}
+
+
+def apply_delta(profile, delta):
+    """
+    Apply a profile delta.
+
+    Returns:
+        tuple: (new profile, ids to exclude, sorted names of changed fields)
+
+    Raises:
+        ValueError: Malformed delta
+    """
+    if not isinstance(delta, dict):
+        raise ValueError("delta must be a JSON object")
+    updated = copy.deepcopy(profile)
+
+    for field, value in (delta.get('set') or {}).items():
+        updated[field] = value
+    for key, merge in (('add', lambda current, values: current + [v for v in values if v not in current]),
+                       ('remove', lambda current, values: [v for v in current if v not in values])):
+        for field, values in (delta.get(key) or {}).items():
+            if not isinstance(values, list):
+                raise ValueError(f"'{key}.{field}' must be a list")
+            current = updated.get(field) or []
+            if not isinstance(current, list):
+                raise ValueError(f"'{field}' is not a list field")
+            updated[field] = merge(list(current), values)
+
+    excluded = delta.get('exclude') or []
+    if not isinstance(excluded, list):
+        raise ValueError("'exclude' must be a list of book ids")
+    changed = sorted(k for k in set(profile) | set(updated) if profile.get(k) != updated.get(k))
+    return updated, [str(i) for i in excluded], changed
+
+
+def unit_term_vectors(terms, vocab, get_model):
+    """Unit vectors of query terms: from the vocabulary table, the rest in one encode call."""
+    index, matrix = vocab
+    vectors = {t: matrix[index[t]] for t in terms if t in index}
+    unknown = [t for t in terms if t not in index]
+    if unknown:
+        vectors.update(zip(unknown, np.asarray(get_model().encode(unknown), dtype=np.float32)))
+    return {t: v / (np.linalg.norm(v) or 1.0) for t, v in vectors.items()}
+
+
+def update_query_vector(query, old_criteria, new_criteria, vocab, get_model):
+    """
+    Move the query vector by the query terms that changed.
+
+    compose_query_embedding() is a weighted sum of unit term vectors, so
+    adding the new terms and subtracting the dropped ones yields the vector a
+    full recomposition would. A query that was (or becomes) a full-text
+    encode is recomposed.
+
+    Returns:
+        tuple: (query vector, 'unchanged' | 'updated' | 'recomposed')
+    """
+    old_terms = Counter(build_query_terms(old_criteria))
+    new_terms = Counter(build_query_terms(new_criteria))
+    if old_terms == new_terms:
+        return query, 'unchanged'
+    if vocab is None or not old_terms or not new_terms:
+        return compose_query_embedding(new_criteria, vocab, get_model), 'recomposed'
+
+    added, removed = new_terms - old_terms, old_terms - new_terms
+    vectors = unit_term_vectors(sorted({t for t, _w in added} | {t for t, _w in removed}), vocab, get_model)
+    query = np.array(query, dtype=np.float32)
+    for (term, weight), n in added.items():
+        query += n * weight * vectors[term]
+    for (term, weight), n in removed.items():
+        query -= n * weight * vectors[term]
+    return query, 'updated'
+
+
+def shown_books(recommendations):
+    """id/title/author of the books the presenter picked."""
+    shown = []
+    for kind in ('best_match', 'discovery', 'secondary_match'):
+        book = (recommendations.get(kind) or {}).get('book') or {}
+        if book.get('id'):
+            shown.append({k: book.get(k) for k in ('id', 'title', 'author')})
+    return shown
+
+
+def run_turn(session, message, api_key, project_root, catalog_id=DEFAULT_CATALOG, mmr_lambda=MMR_LAMBDA,
+             relax=True):
+    """
+    Run one conversation turn and persist the session.
+
+    Returns dict with status, markdown, tokens_used, mode ('full' or 'refine'),
+    changed (profile fields) and message (if error).
+    """
+    start = time.perf_counter()
+    client = get_client(api_key)
+    if session.exists:
+        catalog_id = session.state.get('catalog', catalog_id)
+    resources = SearchResources(project_root, data_dir=catalog_data_dir(project_root, catalog_id))
+    tokens = 0
+
+    if not session.exists:
+        result = extract_profile(message, api_key, project_root, client=client)
+        if result['status'] != 'success':
+            return result
+        tokens += result['tokens_used']
+        profile, excluded, changed = result['criteria'], [], []
+        query = compose_query_embedding(profile, resources.vocab, resources.get_model)
+        scores = resources.score_all(query)
+        mode = 'full'
+    else:
+        state = session.state
+        result = extract_delta(message, state['profile'], state['shown'], project_root, client)
+        if result['status'] != 'success':
+            return result
+        tokens += result['tokens_used']
+        try:
+            profile, newly_excluded, changed = apply_delta(state['profile'], result['delta'])
+            get_registry(project_root / 'schemas').validate(profile, 'user-profile')
+        except ValueError as e:
+            return {"status": "error", "message": f"Invalid profile delta: {str(e)}"}
+        except jsonschema.ValidationError as e:
+            return {"status": "error", "message": f"Schema validation failed: {e.message}"}
+        excluded = state['excluded'] + [i for i in newly_excluded if i not in state['excluded']]
+        if newly_excluded:
+            changed.append('excluded')
+
+        query, how = update_query_vector(session.query, state['profile'], profile,
+                                         resources.vocab, resources.get_model)
+        stale = state['version'] != resources.version or len(session.scores) != len(resources.books)
+        scores = resources.score_all(query) if how != 'unchanged' or stale else session.scores
+        mode = 'refine'
+        print(f"🔁 Follow-up changed: {', '.join(changed) or 'nothing'} (query {how}"
+              f"{', catalog changed: re-scored' if stale and how == 'unchanged' else ''})", file=sys.stderr)
+
+    results = search(profile, resources, mmr_lambda, relax, scores=scores, exclude_ids=set(excluded))
+    if not results:
+        return {"status": "error", "message": "No books match the criteria", "tokens_used": tokens}
+
+    presented = present_recommendations_data(profile, results, api_key, project_root, client=client)
+    if presented['status'] != 'success':
+        return presented
+    tokens += presented['tokens_used']
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+
+    turns = session.state['turns'] if session.exists else []
+    turns.append({'message': message, 'mode': mode, 'changed': changed, 'tokens_used': tokens,
+                  'time_ms': elapsed_ms})
+    session.state = {
+        'catalog': catalog_id,
+        'version': resources.version,
+        'profile': profile,
+        'excluded': excluded,
+        'shown': shown_books(presented['recommendations']),
+        'turns': turns,
+    }
+    session.query, session.scores = np.asarray(query, dtype=np.float32), np.asarray(scores, dtype=np.float32)
+    session.save()
+
+    return {"status": "success", "markdown": presented['markdown'], "tokens_used": tokens, "mode": mode,
+            "changed": changed, "time_ms": elapsed_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-turn recommendations: follow-ups refine the previous turn')
+    parser.add_argument('message', help='First request or follow-up message (ES or EN)')
+    parser.add_argument('--session', required=True, metavar='ID', help='Conversation id (letters, digits, - and _)')
+    parser.add_argument('--reset', action='store_true', help='Forget the session and start over with this message')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG, metavar='ID',
+                        help='Catalog for a new session: data/catalogs/<ID>/ (default: data/)')
+    parser.add_argument('--no-mmr', action='store_true', help='Send every candidate to the presenter')
+    parser.add_argument('--no-relax', action='store_true', help='Never relax language, maturity or genre filters')
+    args = parser.parse_args()
+
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        print(json.dumps({"status": "error", "message": "ANTHROPIC_API_KEY environment variable not set"}),
+              file=sys.stderr)
+        sys.exit(1)
+
+    project_root = Path(__file__).parent.parent
+    prune_stale_sessions(project_root)
+    try:
+        session = Session(project_root, args.session)
+        if args.reset:
+            session.reset()
+        session.load()
+        result = run_turn(session, args.message, api_key, project_root, args.catalog,
+                          None if args.no_mmr else MMR_LAMBDA, not args.no_relax)
+    except ValueError as e:
+        result = {"status": "error", "message": str(e)}
+
+    if result['status'] != 'success':
+        print(f"ERROR: {result['message']}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps({k: result[k] for k in ('tokens_used', 'mode', 'changed', 'time_ms')}, ensure_ascii=False),
+          file=sys.stderr)
+    print(result['markdown'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-flight request coalescing for asyncio.
+While a computation for a key is running, later callers with the same key
+await the same task instead of starting their own. The key is forgotten as
+soon as the task finishes, so this deduplicates concurrent work only; it is
+not a cache.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    """Share one in-flight task per key among concurrent callers."""
+
+    def __init__(self):
+        self._inflight = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key, func):
+        """
+        Run `func()` (a coroutine function) for `key`, or join the run already in flight.
+
+        Results are shared between callers and must be treated as read-only.
+        Exceptions propagate to every caller of that flight.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+
+        # Shield so one caller's cancellation does not cancel the shared task
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {'executed': self.executed, 'shared': self.shared, 'inflight': len(self._inflight)}
@@ -3,14 +3,23 @@
 """
 End-to-end pipeline testing for book recommendation system.
 Tests both Spanish and English inputs through the full pipeline.
+
+With --record the API calls are saved as fixtures (see llm_client.py).
+Per-stage wall times are printed after the run (median of --repeat runs).
 """
 
+import argparse
 import json
+import statistics
 import subprocess
 import sys
 import os
+import time
 from pathlib import Path
-import jsonschema
+
+from llm_client import BACKEND_ENV, FIXTURES_ENV, fixtures_dir
+from request_state import RequestWorkspace
+from schema_registry import format_error, get_registry
 
 # Force UTF-8 output encoding on Windows
 if sys.platform == 'win32':
@@ -61,17 +70,12 @@ def run_command(cmd, check_return_code=True):
     return result.stdout, result.stderr, result.returncode
 
 
-def validate_json_schema(data, schema_path):
-    """Validate JSON data against a schema file."""
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
-
-    try:
-        jsonschema.validate(data, schema)
-        return True
-    except jsonschema.ValidationError as e:
-        print(f"❌ Schema validation failed: {e.message}", file=sys.stderr)
-        return False
+def validate_json_schema(data, schema_name, project_root):
+    """Validate JSON data against a named schema, reporting every error."""
+    errors = get_registry(project_root / 'schemas').errors(data, schema_name)
+    for error in errors:
+        print(f"❌ Schema validation failed: {format_error(error)}", file=sys.stderr)
+    return not errors
 
 
 def extract_tokens_from_json(output):
@@ -95,8 +99,19 @@ def extract_tokens_from_stderr(stderr):
     return 0
 
 
-def run_test_case(test_case, project_root):
-    """Run a single test case through the full pipeline."""
+def timed_command(cmd, timings, stage):
+    """run_command() that records the stage's wall time in ms."""
+    start = time.perf_counter()
+    output = run_command(cmd)
+    timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+    return output
+
+
+def run_test_case(test_case, project_root, workspace, timings):
+    """
+    Run a single test case through the full pipeline, keeping files in `workspace`.
+    Stage wall times (ms) are stored in `timings`.
+    """
     print(f"\n=== Test: {test_case['name']} ===")
     print(f"Input: \"{test_case['input']}\"")
 
@@ -104,8 +119,8 @@ def run_test_case(test_case, project_root):
 
     # Step 1: Extract profile
     print("  Step 1: extract_profile...", end=' ')
-    cmd = f'python scripts/extract_profile.py "{test_case["input"]}"'
-    stdout, stderr, returncode = run_command(cmd)
+    cmd = f'python scripts/extract_profile.py --output "{workspace.path("criteria.json")}" "{test_case["input"]}"'
+    stdout, stderr, returncode = timed_command(cmd, timings, 'extract_profile')
 
     if returncode != 0:
         print(f"❌ Failed")
@@ -130,8 +145,7 @@ def run_test_case(test_case, project_root):
         criteria = json.load(f)
 
     # Validate schema
-    schema_path = project_root / 'schemas' / 'user-profile.schema.json'
-    if not validate_json_schema(criteria, schema_path):
+    if not validate_json_schema(criteria, 'user-profile', project_root):
         return False
 
     # Validate expectations
@@ -145,9 +159,9 @@ def run_test_case(test_case, project_root):
 
     # Step 2: Vector search
     print("  Step 2: vector_search...", end=' ')
-    results_path = project_root / '.cache' / 'search_results.json'
+    results_path = workspace.path('search_results.json')
     cmd = f'python scripts/vector_search.py "{criteria_path}" > "{results_path}"'
-    stdout, stderr, returncode = run_command(cmd)
+    stdout, stderr, returncode = timed_command(cmd, timings, 'vector_search')
 
     if returncode != 0:
         print(f"❌ Failed")
@@ -170,7 +184,7 @@ def run_test_case(test_case, project_root):
     # Step 3: Present recommendations
     print("  Step 3: present_recommendations...", end=' ')
     cmd = f'python scripts/present_recommendations.py --criteria "{criteria_path}" --results "{results_path}"'
-    stdout, stderr, returncode = run_command(cmd)
+    stdout, stderr, returncode = timed_command(cmd, timings, 'present_recommendations')
 
     if returncode != 0:
         print(f"❌ Failed")
@@ -202,12 +216,40 @@ def run_test_case(test_case, project_root):
     return True
 
 
+def median_timings(runs):
+    """Per-stage median over repeated runs of one case."""
+    return {stage: round(statistics.median(run[stage] for run in runs), 1) for stage in runs[0]}
+
+
+def print_timings(current):
+    print("\nStage timings (ms):")
+    for name, stages in current.items():
+        print(f"  {name}")
+        for stage, ms in stages.items():
+            print(f"    {stage:<25} {ms:>9.1f}")
+
+
 def main():
     """Main test runner."""
+    parser = argparse.ArgumentParser(description='End-to-end pipeline tests')
+    parser.add_argument('--record', action='store_true',
+                        help='Call the API and save every request/response as a fixture')
+    parser.add_argument('--fixtures', metavar='DIR', help='Fixture directory (default: fixtures/llm/)')
+    parser.add_argument('--repeat', type=int, default=1, metavar='N',
+                        help='Run each case N times and report median stage timings (default: 1)')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Book Recommendation Pipeline Test Suite")
     print("=" * 60)
 
+    # Stage subprocesses inherit the backend selection
+    if args.fixtures:
+        os.environ[FIXTURES_ENV] = str(Path(args.fixtures).resolve())
+    if args.record:
+        os.environ[BACKEND_ENV] = 'record'
+        print(f"✓ Recording API responses to {fixtures_dir()}")
+
     # Check API key is set
     api_key = os.environ.get('ANTHROPIC_API_KEY')
     if not api_key:
@@ -226,17 +268,30 @@ def main():
     # Run test cases
     passed = 0
     failed = 0
+    timings = {}
 
     for test_case in TEST_CASES:
+        runs = []
         try:
-            if run_test_case(test_case, project_root):
+            for _ in range(max(1, args.repeat)):
+                run = {}
+                with RequestWorkspace(project_root) as workspace:
+                    passed_case = run_test_case(test_case, project_root, workspace, run)
+                if not passed_case:
+                    break
+                runs.append(run)
+            if passed_case:
                 passed += 1
+                timings[test_case['name']] = median_timings(runs)
             else:
                 failed += 1
         except Exception as e:
             print(f"❌ Test failed with exception: {str(e)}")
             failed += 1
 
+    if timings:
+        print_timings(timings)
+
     # Summary
     print("\n" + "=" * 60)
     print(f"Test Results: {passed} passed, {failed} failed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Normalized title/author index for matching user-supplied book titles
+against the catalog. Titles are accent-stripped, case-folded, stripped of
+punctuation and leading articles, and translated titles are added from
+data/title-aliases.json, so "Fundación", "fundacion" and "Foundation" all
+resolve to the same book in O(1).
+"""
+
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+LEADING_ARTICLES = {'the', 'a', 'an', 'el', 'la', 'los', 'las', 'lo', 'un', 'una'}
+
+# "<title> by <author>", "<title> de <author>", "<title> - <author>", "<title>, <author>"
+AUTHOR_SEPARATOR = re.compile(r'\s+(?:by|de|por)\s+|\s*[-–—,(]\s*')
+
+
+def fold(text):
+    """Strip accents, case-fold and reduce punctuation to single spaces."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'[^\w]+', ' ', text.casefold())
+    return ' '.join(text.split())
+
+
+def normalize_title(title):
+    """Normalize a title for lookup ("The Hobbit" and "El Hobbit" -> "hobbit")."""
+    words = fold(title).split()
+    if len(words) > 1 and words[0] in LEADING_ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+
+def normalize_author(author):
+    """Normalize an author name for lookup."""
+    return fold(author)
+
+
+def load_title_aliases(path):
+    """Load {book_id: [alias, ...]}; returns {} if the file is missing."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('aliases', {})
+
+
+class TitleIndex:
+    """Hash index from normalized titles (and aliases) to catalog book ids."""
+
+    def __init__(self, books, aliases=None):
+        self.by_title = {}
+        self.authors = {}
+
+        for book in books:
+            self._add(book['title'], book['id'])
+            author = normalize_author(book.get('author', ''))
+            self.authors[book['id']] = {author, author.split()[-1]} if author else set()
+
+        for book_id, titles in (aliases or {}).items():
+            if book_id in self.authors:
+                for title in titles:
+                    self._add(title, book_id)
+
+    def _add(self, title, book_id):
+        key = normalize_title(title)
+        if key:
+            self.by_title.setdefault(key, set()).add(book_id)
+
+    def lookup(self, text):
+        """
+        Resolve a user-supplied title (optionally with author) to book ids.
+
+        Returns:
+            set: Matching book ids (empty if unknown)
+        """
+        ids = self.by_title.get(normalize_title(text))
+        if ids:
+            return ids
+
+        # Try "<title> by <author>" style splits, keeping only author-confirmed hits
+        for match in AUTHOR_SEPARATOR.finditer(text):
+            title_part = text[:match.start()]
+            author_part = normalize_author(text[match.end():].rstrip(')'))
+            ids = self.by_title.get(normalize_title(title_part), set())
+            confirmed = {i for i in ids if author_part in self.authors[i]}
+            if confirmed:
+                return confirmed
+
+        return set()
+
+    def resolve_ids(self, titles):
+        """Union of lookup() over a list of titles."""
+        ids = set()
+        for title in titles:
+            ids |= self.lookup(title)
+        return ids
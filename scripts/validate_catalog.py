@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming validator for catalog_with_embeddings.json.
+
+The catalog is parsed incrementally (one book at a time with
+JSONDecoder.raw_decode over a sliding read buffer), so memory stays bounded
+by one chunk of books regardless of file size. Books are checked in chunks:
+    - schema: schemas/book-entry.schema.json via the shared registry
+    - embeddings (vectorized per chunk): missing, wrong dimension, non-numeric,
+      NaN/inf, all-zero, norm away from 1 (the model emits unit vectors)
+    - duplicates: id collisions, same normalized title + author under
+      different ids, identical embedding vectors
+
+Only ids and short hashes are kept across chunks.
+
+Usage:
+    python scripts/validate_catalog.py
+    python scripts/validate_catalog.py --catalog es --strict
+    python scripts/validate_catalog.py big_catalog.json --chunk-size 8192 --json report.json
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from fingerprint import DEFAULT_CATALOG, catalog_data_dir
+from schema_registry import format_error, get_registry
+from title_index import normalize_author, normalize_title
+
+# Force UTF-8 output encoding on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+READ_SIZE = 1024 * 1024  # Characters read per refill
+MAX_ENTRY_SIZE = 64 * 1024 * 1024  # A single book larger than this is treated as corrupt
+CHUNK_SIZE = 4096  # Books checked per vectorized batch
+NORM_TOLERANCE = 0.01
+MAX_EXAMPLES = 10  # Examples kept per issue kind
+
+# Issue kinds that make the catalog invalid; the rest are warnings (fatal with --strict)
+ERROR_KINDS = ('invalid_json', 'schema', 'duplicate_id', 'dimension', 'non_numeric', 'non_finite')
+WARNING_KINDS = ('missing_embedding', 'zero_embedding', 'norm', 'duplicate_book', 'duplicate_embedding')
+
+WHITESPACE = re.compile(r'\s*')
+BOOKS_KEY = re.compile(r'"books"\s*:\s*\[')
+
+
+def iter_catalog_entries(f, read_size=READ_SIZE, max_entry_size=MAX_ENTRY_SIZE):
+    """
+    Yield the books of a catalog file one at a time.
+    Accepts the same layouts as vector_search.load_catalog(): a top-level
+    array, or an object with a "books" array.
+
+    Raises:
+        ValueError: Malformed JSON or unrecognized layout (message includes the offset)
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, offset, eof = '', 0, 0, False
+
+    def fill():
+        nonlocal buf, pos, offset, eof
+        chunk = f.read(read_size)
+        eof = not chunk
+        offset += pos
+        buf, pos = buf[pos:] + chunk, 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if buf[pos:pos + 1] == '[':
+        pos += 1
+    elif buf[pos:pos + 1] == '{':
+        while not (match := BOOKS_KEY.search(buf, pos)):
+            if eof or len(buf) - pos > max_entry_size:
+                raise ValueError('Catalog object has no "books" array')
+            fill()
+        pos = match.end()
+    else:
+        raise ValueError("Catalog format not recognized (expected an array or {\"books\": [...]})")
+
+    first = True
+    while True:
+        skip_whitespace()
+        if buf[pos:pos + 1] == ']':
+            return
+        if not first:
+            if buf[pos:pos + 1] != ',':
+                raise ValueError(f"Expected ',' or ']' at offset {offset + pos}")
+            pos += 1
+            skip_whitespace()
+        first = False
+
+        while True:
+            try:
+                entry, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f"{e.msg} (offset {offset + e.pos})") from None
+                if len(buf) - pos > max_entry_size:
+                    raise ValueError(f"Entry at offset {offset + pos} exceeds {max_entry_size} characters") from None
+                fill()
+        pos = end
+        yield entry
+
+
+class CatalogChecker:
+    """Accumulates per-chunk checks into one report."""
+
+    def __init__(self, dim=None, chunk_size=CHUNK_SIZE, norm_tolerance=NORM_TOLERANCE, max_examples=MAX_EXAMPLES):
+        self.dim = dim
+        self.chunk_size = max(1, chunk_size)
+        self.norm_tolerance = norm_tolerance
+        self.max_examples = max_examples
+        self.validator = get_registry().validator('book-entry')
+
+        self.entries = 0
+        self.embedded = 0
+        self.counts = Counter()
+        self.examples = {}
+        self.norm_min = float('inf')
+        self.norm_max = 0.0
+        self.norm_sum = 0.0
+
+        self._pending = []
+        self._ids = {}  # id -> first index
+        self._books = {}  # (title, author) -> first id
+        self._vectors = {}  # embedding digest -> first id
+
+    def issue(self, kind, index, book_id, message):
+        self.counts[kind] += 1
+        examples = self.examples.setdefault(kind, [])
+        if len(examples) < self.max_examples:
+            examples.append({'index': index, 'id': book_id, 'message': message})
+
+    def add(self, entry):
+        self._pending.append((self.entries, entry))
+        self.entries += 1
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._check_chunk(self._pending)
+            self._pending = []
+
+    def _check_chunk(self, chunk):
+        vectors = []  # (index, id, embedding list) with the expected length
+        for index, entry in chunk:
+            if not isinstance(entry, dict):
+                self.issue('schema', index, None, f"<root>: expected an object, got {type(entry).__name__}")
+                continue
+            book_id = entry.get('id')
+
+            # The embedding is checked below as a matrix; validating it item by item is the slow part
+            error = next(self.validator.iter_errors({k: v for k, v in entry.items() if k != 'embedding'}), None)
+            if error is not None:
+                self.issue('schema', index, book_id, format_error(error))
+
+            if isinstance(book_id, str):
+                if book_id in self._ids:
+                    self.issue('duplicate_id', index, book_id, f"id already used by entry {self._ids[book_id]}")
+                else:
+                    self._ids[book_id] = index
+
+            if isinstance(entry.get('title'), str) and isinstance(entry.get('author'), str):
+                key = (normalize_title(entry['title']), normalize_author(entry['author']))
+                if key in self._books and self._books[key] != book_id:
+                    self.issue('duplicate_book', index, book_id, f"same title and author as '{self._books[key]}'")
+                else:
+                    self._books.setdefault(key, book_id)
+
+            embedding = entry.get('embedding')
+            if not isinstance(embedding, list) or not embedding:
+                self.issue('missing_embedding', index, book_id, 'no embedding')
+                continue
+            if self.dim is None:
+                self.dim = len(embedding)
+            if len(embedding) != self.dim:
+                self.issue('dimension', index, book_id, f"embedding has {len(embedding)} dimensions, expected {self.dim}")
+                continue
+            vectors.append((index, book_id, embedding))
+
+        if vectors:
+            self._check_embeddings(vectors)
+
+    def _check_embeddings(self, vectors):
+        try:
+            matrix = np.array([v for _, _, v in vectors], dtype=np.float64)
+        except (TypeError, ValueError):
+            # Rare: find the offending rows one by one
+            numeric = []
+            for item in vectors:
+                try:
+                    np.array(item[2], dtype=np.float64)
+                    numeric.append(item)
+                except (TypeError, ValueError):
+                    self.issue('non_numeric', item[0], item[1], 'embedding contains non-numeric values')
+            if numeric:
+                self._check_embeddings(numeric)
+            return
+
+        finite = np.isfinite(matrix).all(axis=1)
+        for i in np.flatnonzero(~finite):
+            self.issue('non_finite', vectors[i][0], vectors[i][1], 'embedding contains NaN or infinity')
+        if not finite.all():
+            vectors = [v for v, ok in zip(vectors, finite) if ok]
+            matrix = matrix[finite]
+            if not vectors:
+                return
+
+        norms = np.linalg.norm(matrix, axis=1)
+        for i in np.flatnonzero(norms == 0):
+            self.issue('zero_embedding', vectors[i][0], vectors[i][1], 'embedding is all zeros')
+        off = np.flatnonzero((norms > 0) & (np.abs(norms - 1.0) > self.norm_tolerance))
+        for i in off:
+            self.issue('norm', vectors[i][0], vectors[i][1], f"embedding norm {norms[i]:.4f}")
+
+        nonzero = norms[norms > 0]
+        self.embedded += len(vectors)
+        if len(nonzero):
+            self.norm_min = min(self.norm_min, float(nonzero.min()))
+            self.norm_max = max(self.norm_max, float(nonzero.max()))
+            self.norm_sum += float(nonzero.sum())
+
+        rows = matrix.astype(np.float32)
+        for (index, book_id, _embedding), row, norm in zip(vectors, rows, norms):
+            if norm == 0:
+                continue
+            digest = hashlib.blake2b(row.tobytes(), digest_size=8).digest()
+            first = self._vectors.setdefault(digest, book_id)
+            if first != book_id:
+                self.issue('duplicate_embedding', index, book_id, f"identical embedding to '{first}'")
+
+    def report(self):
+        self.flush()
+        errors = {k: self.counts[k] for k in ERROR_KINDS if self.counts[k]}
+        warnings = {k: self.counts[k] for k in WARNING_KINDS if self.counts[k]}
+        measured = self.embedded - self.counts['zero_embedding']
+        return {
+            'entries': self.entries,
+            'embedded': self.embedded,
+            'dimension': self.dim,
+            'errors': errors,
+            'warnings': warnings,
+            'examples': self.examples,
+            'norm': {
+                'min': round(self.norm_min, 4) if measured else None,
+                'max': round(self.norm_max, 4) if measured else None,
+                'mean': round(self.norm_sum / measured, 4) if measured else None,
+            },
+        }
+
+
+def check_catalog(path, dim=None, chunk_size=CHUNK_SIZE, norm_tolerance=NORM_TOLERANCE, max_examples=MAX_EXAMPLES):
+    """
+    Stream-check one catalog file.
+
+    Returns:
+        dict: Report (see CatalogChecker.report) plus 'path' and 'elapsed_s';
+        a parse failure stops the scan and is reported as an 'invalid_json' error.
+    """
+    start = time.perf_counter()
+    checker = CatalogChecker(dim, chunk_size, norm_tolerance, max_examples)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry in iter_catalog_entries(f):
+                checker.add(entry)
+    except ValueError as e:
+        checker.flush()
+        checker.issue('invalid_json', checker.entries, None, str(e))
+    except UnicodeDecodeError as e:
+        checker.flush()
+        checker.issue('invalid_json', checker.entries, None, f"not UTF-8: {str(e)}")
+
+    report = checker.report()
+    report['path'] = str(path)
+    report['elapsed_s'] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def print_report(report, strict=False):
+    print(f"Catalog: {report['path']}")
+    print(f"Books: {report['entries']}  embedded: {report['embedded']}  dimension: {report['dimension']}  "
+          f"({report['elapsed_s']}s)")
+    norm = report['norm']
+    if norm['mean'] is not None:
+        print(f"Embedding norms: min {norm['min']}  mean {norm['mean']}  max {norm['max']}")
+
+    for kinds, symbol in ((report['errors'], '❌'), (report['warnings'], '❌' if strict else '⚠️ ')):
+        for kind, count in kinds.items():
+            print(f"{symbol} {kind}: {count}")
+            for example in report['examples'].get(kind, []):
+                print(f"     #{example['index']} {example['id'] or '-'}: {example['message']}")
+
+
+def catalog_ok(report, strict=False):
+    return not report['errors'] and not (strict and report['warnings'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream-validate a catalog with embeddings')
+    parser.add_argument('path', nargs='?', type=Path,
+                        help='Catalog file (default: the --catalog data directory)')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG, metavar='ID',
+                        help='Catalog to check: data/catalogs/<ID>/ (default: data/)')
+    parser.add_argument('--dim', type=int, help='Expected embedding dimension (default: from the first book)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f'Books checked per vectorized batch (default: {CHUNK_SIZE})')
+    parser.add_argument('--norm-tolerance', type=float, default=NORM_TOLERANCE,
+                        help=f'Allowed distance of embedding norms from 1 (default: {NORM_TOLERANCE})')
+    parser.add_argument('--max-examples', type=int, default=MAX_EXAMPLES,
+                        help=f'Examples listed per issue kind (default: {MAX_EXAMPLES})')
+    parser.add_argument('--strict', action='store_true', help='Fail on warnings too')
+    parser.add_argument('--json', type=Path, metavar='PATH', help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        try:
+            path = catalog_data_dir(Path(__file__).parent.parent, args.catalog) / 'catalog_with_embeddings.json'
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            sys.exit(1)
+    if not path.exists():
+        print(f"❌ Catalog not found: {path}")
+        sys.exit(1)
+
+    report = check_catalog(path, args.dim, args.chunk_size, args.norm_tolerance, args.max_examples)
+    print_report(report, args.strict)
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if catalog_ok(report, args.strict):
+        print("\n✓ Catalog is valid")
+        sys.exit(0)
+    print("\n❌ Catalog has problems")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
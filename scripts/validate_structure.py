@@ -38,6 +38,26 @@ def validate_json_file(path, name):
         return False
 
 
+def validate_catalog_file(path, name):
+    """Stream-check the catalog: parsing, book-entry schema, embedding health, duplicates."""
+    from validate_catalog import catalog_ok, check_catalog
+
+    if not Path(path).exists():
+        print(f"❌ {name} invalid: file not found")
+        return False
+    report = check_catalog(path, max_examples=3)
+    if catalog_ok(report):
+        print(f"✓ {name} is valid ({report['entries']} books, {report['dimension']}-d embeddings)")
+    else:
+        print(f"❌ {name} invalid")
+    for kinds, symbol in ((report['errors'], '❌'), (report['warnings'], '⚠️ ')):
+        for kind, count in kinds.items():
+            print(f"   {symbol} {kind}: {count}")
+            for example in report['examples'].get(kind, []):
+                print(f"        #{example['index']} {example['id'] or '-'}: {example['message']}")
+    return catalog_ok(report)
+
+
 def validate_python_syntax(path, name):
     """Check if a Python file has valid syntax."""
     try:
@@ -104,7 +124,9 @@ def main():
         checks_total += 2
         if validate_file_exists(full_path, name):
             checks_passed += 1
-        if validate_json_file(full_path, name):
+        # The catalog can be large: streamed and checked entry by entry instead of json.load
+        validate = validate_catalog_file if name == 'catalog_with_embeddings.json' else validate_json_file
+        if validate(full_path, name):
             checks_passed += 1
 
     # Reference files
@@ -5,29 +5,70 @@ Takes user criteria JSON and returns top-k most similar books using
 cosine similarity on pre-computed embeddings.
 """
 
+import argparse
 import json
 import sys
 import os
 import io
+import threading
 import numpy as np
+from collections import Counter
 from pathlib import Path
 
+from batch_encoder import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS, BatchEncoder
+from build_book_vectors import load_book_vectors, pool_scores
+from build_neighbor_graph import load_neighbor_graph
+from build_vocab_embeddings import load_vocab_table
+from fingerprint import (
+    DEFAULT_CATALOG, catalog_data_dir, catalog_fingerprint, criteria_hash, genre_adjacency_path, stable_hash,
+)
+from handoff import STDIN_MARKER, dumps, make_bundle, project, read_json
+from profiling import StageProfiler, add_profile_argument, resolve_profile_dir
+from results_cache import ResultsCache
+from title_index import TitleIndex, load_title_aliases
+
+SEARCH_NAMESPACE = 'search'
+
 os.environ['TRANSFORMERS_NO_ADVISORY_WARNINGS'] = '1'
 os.environ['HF_HUB_DISABLE_PROGRESS_BARS'] = '1'
 
 
+# Maximal marginal relevance: candidates per pool sent to the presenter
+MMR_LAMBDA = 0.7
+MMR_PRIMARY_K = 4  # Best Match and Discovery come from these
+MMR_SECONDARY_K = 2  # Secondary Match comes from these
+SAME_AUTHOR_REDUNDANCY = 0.9
+
+
 def cosine_similarity(a, b):
     """Calculate cosine similarity between two vectors."""
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
 
-def filter_books(books, criteria):
+def exclude_read_books(books, criteria, title_index=None):
+    """
+    Drop books listed in criteria['books_read'].
+    Titles are resolved once through the normalized title index, so the
+    cost is O(books + read) instead of O(books x read).
+    """
+    if not criteria.get('books_read'):
+        return books
+
+    if title_index is None:
+        title_index = TitleIndex(books)
+    read_ids = title_index.resolve_ids(criteria['books_read'])
+    return [b for b in books if b['id'] not in read_ids]
+
+
+def filter_books(books, criteria, title_index=None):
     """Apply programmatic filters (genre, maturity, language, books_read)."""
     filtered = books
 
-    # Filter 1: Primary genre
+    # Filter 1: Primary genre (a list once relax_criteria() widened it to adjacent genres)
     if 'primary_genre' in criteria and criteria['primary_genre']:
-        filtered = [b for b in filtered if b.get('genre') == criteria['primary_genre']]
+        genre = criteria['primary_genre']
+        genres = set(genre) if isinstance(genre, list) else {genre}
+        filtered = [b for b in filtered if b.get('genre') in genres]
 
     # Filter 2: Maturity level (>=)
     if 'maturity_level' in criteria and criteria['maturity_level']:
@@ -45,14 +86,12 @@ def filter_books(books, criteria):
         ]
 
     # Filter 4: Exclude already read books
-    if 'books_read' in criteria and criteria['books_read']:
-        read_titles_lower = [title.lower() for title in criteria['books_read']]
-        filtered = [b for b in filtered if b['title'].lower() not in read_titles_lower]
+    filtered = exclude_read_books(filtered, criteria, title_index)
 
     return filtered
 
 
-def filter_books_by_genre(books, genre, criteria):
+def filter_books_by_genre(books, genre, criteria, title_index=None):
     """
     Filter books by a specific genre while applying other criteria filters.
     Similar to filter_books but allows specifying the genre instead of using primary_genre.
@@ -78,42 +117,227 @@ def filter_books_by_genre(books, genre, criteria):
         ]
 
     # Filter 4: Exclude already read books
-    if 'books_read' in criteria and criteria['books_read']:
-        read_titles_lower = [title.lower() for title in criteria['books_read']]
-        filtered = [b for b in filtered if b['title'].lower() not in read_titles_lower]
+    filtered = exclude_read_books(filtered, criteria, title_index)
 
     return filtered
 
 
-def build_query_text(criteria):
-    """Build search query from user criteria."""
-    query_parts = []
+# Constraints dropped or widened, in this order, when the filters leave too few candidates
+RELAXATION_LADDER = ('language', 'maturity', 'genre')
+RELAX_MIN_RESULTS = 3  # The presenter picks three books
+
+
+def load_genre_adjacency(path):
+    """Load {genre: [adjacent genres]} from genre-adjacency.json; {} if missing."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('adjacency_map', {})
+
+
+def book_passes(genre, maturity, language, criteria):
+    """The genre/maturity/language part of filter_books() for one book."""
+    if criteria.get('primary_genre'):
+        wanted = criteria['primary_genre']
+        if genre not in (set(wanted) if isinstance(wanted, list) else {wanted}):
+            return False
+    if criteria.get('maturity_level') and maturity < criteria['maturity_level']:
+        return False
+    if 'language_preference' in criteria and criteria['language_preference'] != 'any':
+        if language not in (criteria['language_preference'], 'both', 'any'):
+            return False
+    return True
+
+
+class FilterCounts:
+    """
+    Book counts per (genre, maturity level, language) cell. The number of
+    candidates a filter combination leaves is a sum over a few dozen cells
+    instead of a catalog scan, so every relaxation step can be priced up front.
+    """
+
+    def __init__(self, books):
+        self.cell_of = {b['id']: (b.get('genre'), b.get('maturity_level', 4), b.get('language', 'en')) for b in books}
+        self.cells = Counter(self.cell_of.values())
+
+    def count(self, criteria, excluded_ids=()):
+        """Books filter_books() keeps for `criteria` (excluded_ids: the resolved books_read)."""
+        total = sum(n for cell, n in self.cells.items() if book_passes(*cell, criteria))
+        excluded = {i for i in excluded_ids if i in self.cell_of}
+        return total - sum(1 for i in excluded if book_passes(*self.cell_of[i], criteria))
+
+
+def relax_step(criteria, constraint, adjacency):
+    """Relax one constraint of `criteria` in place; False if it was not active."""
+    if constraint == 'language':
+        if criteria.get('language_preference', 'any') == 'any':
+            return False
+        criteria['language_preference'] = 'any'
+    elif constraint == 'maturity':
+        if not criteria.get('maturity_level'):
+            return False
+        del criteria['maturity_level']
+    elif constraint == 'genre':
+        genre = criteria.get('primary_genre')
+        if not isinstance(genre, str) or not adjacency.get(genre):
+            return False
+        criteria['primary_genre'] = [genre] + [g for g in adjacency[genre] if g != genre]
+    return True
+
+
+def relax_criteria(criteria, counts, adjacency, excluded_ids=(), min_results=RELAX_MIN_RESULTS):
+    """
+    Walk RELAXATION_LADDER (cumulatively) until the filters leave `min_results`
+    candidates, using FilterCounts so no step has to be searched to be tried.
+    If no step is enough, the step with the most candidates wins.
+
+    Returns:
+        tuple: (criteria to filter with, list of relaxed constraint names)
+    """
+    best = (counts.count(criteria, excluded_ids), criteria, [])
+    if best[0] >= min_results:
+        return criteria, []
+
+    relaxed, steps = dict(criteria), []
+    for constraint in RELAXATION_LADDER:
+        if not relax_step(relaxed, constraint, adjacency):
+            continue
+        steps.append(constraint)
+        available = counts.count(relaxed, excluded_ids)
+        if available > best[0]:
+            best = (available, dict(relaxed), list(steps))
+        if available >= min_results:
+            break
+    return best[1], best[2]
+
+
+def mark_relaxed(results, criteria, steps):
+    """
+    Add `relaxed` to each result that only qualifies through a relaxed
+    constraint, listing which (secondary-pool books are never flagged for genre).
+    """
+    for book in results:
+        failed = []
+        for constraint in steps:
+            if constraint == 'language':
+                ok = book.get('language', 'en') in (criteria['language_preference'], 'both', 'any')
+            elif constraint == 'maturity':
+                ok = book.get('maturity_level', 4) >= criteria['maturity_level']
+            else:
+                ok = book.get('genre_pool') == 'secondary' or book.get('genre') == criteria.get('primary_genre')
+            if not ok:
+                failed.append(constraint)
+        if failed:
+            book['relaxed'] = failed
+
+
+# Relative weight of each criteria field when composing a query vector
+TERM_WEIGHTS = {
+    'tropes': 1.0,
+    'mood': 1.0,
+    'pacing': 0.5,
+    'themes_liked': 1.0,
+    'primary_genre': 1.0,
+}
+
+
+def build_query_terms(criteria):
+    """
+    Collect the vocabulary terms that make up the search query.
+
+    Returns:
+        list: (term, weight) tuples in query order
+    """
+    terms = []
 
     # Add tropes
     if 'tropes' in criteria and criteria['tropes']:
-        query_parts.extend(criteria['tropes'])
+        terms.extend((t, TERM_WEIGHTS['tropes']) for t in criteria['tropes'])
 
     # Add mood preferences
     if 'mood' in criteria:
         mood = criteria['mood']
         if isinstance(mood, list):
-            query_parts.extend(mood)
+            terms.extend((m, TERM_WEIGHTS['mood']) for m in mood)
         elif isinstance(mood, str) and mood != 'any':
-            query_parts.append(mood)
+            terms.append((mood, TERM_WEIGHTS['mood']))
 
     # Add pacing
     if 'pacing' in criteria and criteria['pacing'] and criteria['pacing'] != 'any':
-        query_parts.append(criteria['pacing'])
+        terms.append((criteria['pacing'], TERM_WEIGHTS['pacing']))
 
     # Add themes liked
     if 'themes_liked' in criteria and criteria['themes_liked']:
-        query_parts.extend(criteria['themes_liked'])
+        terms.extend((t, TERM_WEIGHTS['themes_liked']) for t in criteria['themes_liked'])
 
     # Fallback: if no query parts, use genre
-    if not query_parts and 'primary_genre' in criteria:
-        query_parts.append(criteria['primary_genre'])
+    if not terms and 'primary_genre' in criteria:
+        terms.append((criteria['primary_genre'], TERM_WEIGHTS['primary_genre']))
+
+    return terms
+
+
+def build_query_text(criteria):
+    """Build search query from user criteria."""
+    return ' '.join(term for term, _weight in build_query_terms(criteria))
+
+
+def load_model():
+    """Load the sentence-transformers model (suppress stdout to keep JSON output clean)."""
+    print("🔧 Loading model...", file=sys.stderr)
+    _stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer('all-MiniLM-L6-v2')
+    finally:
+        sys.stdout = _stdout
+
+
+def compose_query_embedding(criteria, vocab, get_model):
+    """
+    Build the query vector as a weighted sum of precomputed term embeddings.
+
+    Args:
+        criteria: User criteria dict
+        vocab: (term -> row, matrix) from load_vocab_table(), or None
+        get_model: Zero-arg callable returning the model; only called when
+            the table is missing or some terms are out of vocabulary
+
+    Returns:
+        np.ndarray: Query embedding (unnormalized; cosine scoring ignores scale)
+    """
+    terms = build_query_terms(criteria)
+    if vocab is None or not terms:
+        return get_model().encode(build_query_text(criteria))
+
+    index, matrix = vocab
+    known = [(index[t], w) for t, w in terms if t in index]
+    unknown = [(t, w) for t, w in terms if t not in index]
+
+    query = np.zeros(matrix.shape[1], dtype=np.float32)
+    for row, weight in known:
+        query += weight * matrix[row] / (np.linalg.norm(matrix[row]) or 1.0)
+
+    if unknown:
+        print(f"🔧 Encoding {len(unknown)} out-of-vocabulary term(s): {[t for t, _ in unknown]}", file=sys.stderr)
+        vectors = get_model().encode([t for t, _ in unknown])
+        for vector, (_term, weight) in zip(vectors, unknown):
+            query += weight * vector / (np.linalg.norm(vector) or 1.0)
 
-    return ' '.join(query_parts)
+    return query
+
+
+def vocab_query_embedding(criteria, vocab):
+    """
+    compose_query_embedding() when every query term is in the vocabulary
+    table, else None: callers that must not load the model use this.
+    """
+    terms = build_query_terms(criteria)
+    if vocab is None or not terms or any(t not in vocab[0] for t, _w in terms):
+        return None
+    return compose_query_embedding(criteria, vocab, None)
 
 
 def vector_search(filtered_books, query_text, model, top_k=10):
@@ -124,90 +348,104 @@ def vector_search(filtered_books, query_text, model, top_k=10):
     # Generate query embedding
     query_embedding = model.encode(query_text)
 
+    return rank_by_embedding(filtered_books, query_embedding, top_k)
+
+
+def has_embedding(book):
+    """True if the book carries a non-empty embedding (list or numpy row)."""
+    embedding = book.get('embedding')
+    return embedding is not None and len(embedding) > 0
+
+
+def rank_by_embedding(filtered_books, query_embedding, top_k=10):
+    """Score books against an already computed query embedding and return top_k."""
+    if not filtered_books:
+        return []
+
     # Calculate similarity for each book
+    scored = []
     for book in filtered_books:
-        if 'embedding' not in book or not book['embedding']:
+        if not has_embedding(book):
             print(f"⚠️  Warning: {book['title']} has no embedding, skipping", file=sys.stderr)
-            book['similarity'] = 0.0
+            similarity = 0.0
         else:
-            book['similarity'] = float(cosine_similarity(query_embedding, book['embedding']))
+            similarity = float(cosine_similarity(query_embedding, book['embedding']))
+        scored.append((similarity, book))
 
-    # Sort by similarity and return top_k
-    sorted_books = sorted(filtered_books, key=lambda b: b.get('similarity', 0), reverse=True)
-    return sorted_books[:top_k]
+    # Sort by similarity and return top_k (copies, so the shared catalog is never mutated)
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [dict(book, similarity=similarity) for similarity, book in scored[:top_k]]
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python scripts/vector_search.py <criteria_json_file>", file=sys.stderr)
-        print("\nExample criteria JSON:", file=sys.stderr)
-        print(json.dumps({
-            "primary_genre": "sci-fi",
-            "maturity_level": 4,
-            "tropes": ["dystopian-society", "cyberpunk"],
-            "mood": ["dark", "tense"],
-            "pacing": "fast",
-            "language_preference": "any",
-            "books_read": []
-        }, indent=2), file=sys.stderr)
-        sys.exit(1)
+def find_books_by_title(books, titles, title_index=None):
+    """Return catalog books matching one of `titles` (accent/case/article-insensitive)."""
+    if not titles:
+        return []
+    if title_index is None:
+        title_index = TitleIndex(books)
+    wanted = title_index.resolve_ids(titles)
+    return [b for b in books if b['id'] in wanted]
 
-    # Load criteria
-    criteria_path = Path(sys.argv[1])
-    with open(criteria_path, 'r', encoding='utf-8') as f:
-        criteria = json.load(f)
 
-    # Determine project root
-    if criteria_path.is_absolute():
-        # Criteria file might be temporary, find project root from script location
-        project_root = Path(__file__).parent.parent
-    else:
-        project_root = Path.cwd()
+def centroid_embedding(books):
+    """Mean embedding of the given books, or None if none of them has one."""
+    vectors = [b['embedding'] for b in books if has_embedding(b)]
+    if not vectors:
+        return None
+    return np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
 
-    # Load catalog with embeddings
-    catalog_path = project_root / 'data' / 'catalog_with_embeddings.json'
 
-    if not catalog_path.exists():
-        print(f"❌ Error: Catalog with embeddings not found at {catalog_path}", file=sys.stderr)
-        print("   Run: python scripts/generate_embeddings.py first", file=sys.stderr)
-        sys.exit(1)
+LIKED_WEIGHT = 0.5  # Share of the liked-book centroid in a blended query (the rest: tropes, mood, themes)
 
-    with open(catalog_path, 'r', encoding='utf-8') as f:
-        catalog = json.load(f)
 
-    # Handle both formats
-    if isinstance(catalog, list):
-        books = catalog
-    elif isinstance(catalog, dict) and 'books' in catalog:
-        books = catalog['books']
-    else:
-        print("❌ Error: Catalog format not recognized", file=sys.stderr)
-        sys.exit(1)
+def blend_liked_query(centroid, query_embedding, weight=LIKED_WEIGHT):
+    """Weighted sum of the unit centroid and the unit composed query vector."""
+    centroid = np.asarray(centroid, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    return (weight * centroid / (np.linalg.norm(centroid) or 1.0)
+            + (1 - weight) * query / (np.linalg.norm(query) or 1.0))
 
-    # Load sentence-transformers model (suppress stdout to keep JSON output clean)
-    print("🔧 Loading model...", file=sys.stderr)
-    _stdout = sys.stdout
-    sys.stdout = io.StringIO()
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    sys.stdout = _stdout
 
+def neighbor_candidates(books, liked_books, graph):
+    """
+    Collect the precomputed neighbors of the liked books.
+    The lookups cost len(liked_books) * k; indexing `books` by id is one pass over them.
+    """
+    by_id = {b['id']: b for b in books}
+    liked_ids = {b['id'] for b in liked_books}
+    candidates = {}
+    for book in liked_books:
+        for neighbor_id, _score in graph.get(book['id'], []):
+            if neighbor_id not in liked_ids and neighbor_id in by_id:
+                candidates[neighbor_id] = by_id[neighbor_id]
+    return list(candidates.values())
+
+
+def search_pools(books, criteria, rank, primary_k=10, secondary_k=5, title_index=None):
+    """
+    Run the primary and secondary genre searches.
+
+    Args:
+        books: Candidate universe (full catalog or a neighbor subset)
+        criteria: User criteria dict
+        rank: Callable (filtered_books, top_k) -> sorted results
+        title_index: TitleIndex of the full catalog (for books_read exclusion)
+
+    Returns:
+        tuple: (primary_results, secondary_results)
+    """
     # 1. Apply programmatic filters for primary genre
-    primary_filtered = filter_books(books, criteria)
+    primary_filtered = filter_books(books, criteria, title_index)
     print(f"📊 Primary genre filtered: {len(primary_filtered)} candidates", file=sys.stderr)
 
-    # 2. Build query text
-    query_text = build_query_text(criteria)
-    print(f"🔍 Query: \"{query_text}\"", file=sys.stderr)
-
-    # 3. Vector similarity search on primary genre
-    primary_results = vector_search(primary_filtered, query_text, model, top_k=10)
+    # 2. Similarity search on primary genre
+    primary_results = rank(primary_filtered, primary_k)
 
     # Tag primary results
     for book in primary_results:
         book['genre_pool'] = 'primary'
 
-    # 4. Secondary genre search (if secondary_genres exist in criteria)
+    # 3. Secondary genre search (if secondary_genres exist in criteria)
     secondary_results = []
     if 'secondary_genres' in criteria and criteria['secondary_genres']:
         print(f"🔍 Secondary genres: {criteria['secondary_genres']}", file=sys.stderr)
@@ -217,17 +455,17 @@ def main():
 
         # Search each secondary genre
         for secondary_genre in criteria['secondary_genres']:
-            genre_filtered = filter_books_by_genre(books, secondary_genre, criteria)
+            genre_filtered = filter_books_by_genre(books, secondary_genre, criteria, title_index)
             # Remove books already in primary results
             genre_filtered = [b for b in genre_filtered if b['id'] not in primary_ids]
 
             if genre_filtered:
-                genre_results = vector_search(genre_filtered, query_text, model, top_k=5)
+                genre_results = rank(genre_filtered, secondary_k)
                 secondary_results.extend(genre_results)
 
-        # Sort combined secondary results by similarity and take top 5
+        # Sort combined secondary results by similarity and take top secondary_k
         secondary_results.sort(key=lambda b: b.get('similarity', 0), reverse=True)
-        secondary_results = secondary_results[:5]
+        secondary_results = secondary_results[:secondary_k]
 
         # Tag secondary results
         for book in secondary_results:
@@ -235,21 +473,674 @@ def main():
 
         print(f"📊 Secondary genre filtered: {len(secondary_results)} candidates", file=sys.stderr)
 
-    # 5. Combine results (primary + secondary)
+    return primary_results, secondary_results
+
+
+def mmr_select(relevance, similarity, k, lambda_=MMR_LAMBDA, redundancy=None):
+    """
+    Greedy maximal-marginal-relevance selection.
+
+    Args:
+        relevance: (n,) similarity of each candidate to the query
+        similarity: (n, n) pairwise similarity between candidates
+        lambda_: 1.0 ranks by relevance only, lower values favour diversity
+        redundancy: (n,) similarity to items already chosen elsewhere (optional)
+
+    Returns:
+        list: Indices of the selected candidates, in selection order
+    """
+    n = len(relevance)
+    max_sim = np.zeros(n, dtype=np.float32) if redundancy is None else np.array(redundancy, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(min(k, n)):
+        scores = lambda_ * relevance - (1 - lambda_) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_sim, similarity[best], out=max_sim)
+    return selected
+
+
+def diversify_pools(primary, secondary, unit_vectors, lambda_=MMR_LAMBDA,
+                    primary_k=MMR_PRIMARY_K, secondary_k=MMR_SECONDARY_K):
+    """
+    Shrink the ranked pools to a small, diverse candidate set with MMR.
+
+    The primary pick order starts with the most relevant book (Best Match),
+    followed by the candidates that add the most variety (Discovery). The
+    secondary pool is diversified against the primary picks (Secondary Match).
+    Books by the same author count as near-duplicates.
+
+    Args:
+        unit_vectors: Callable (books) -> (n, d) array of normalized embeddings
+    """
+    if not primary and not secondary:
+        return primary, secondary
+
+    primary_idx, secondary_idx = mmr_pool_indices(primary, secondary, unit_vectors, lambda_, primary_k, secondary_k)
+    kept = len(primary_idx) + len(secondary_idx)
+    print(f"🎯 MMR (λ={lambda_}): {len(primary) + len(secondary)} -> {kept} candidates", file=sys.stderr)
+    return [primary[i] for i in primary_idx], [secondary[i] for i in secondary_idx]
+
+
+def mmr_pool_indices(primary, secondary, unit_vectors, lambda_, primary_k, secondary_k):
+    """
+    The selection behind diversify_pools().
+
+    Returns:
+        tuple: (primary indices, secondary indices), each in pick order
+    """
+    candidates = primary + secondary
+    vectors = unit_vectors(candidates)
+    similarity = vectors @ vectors.T
+    authors = np.array([b.get('author', '') for b in candidates], dtype=object)
+    same_author = (authors[:, None] == authors[None, :]) & (authors[:, None] != '')
+    similarity = np.where(same_author, np.maximum(similarity, SAME_AUTHOR_REDUNDANCY), similarity)
+    relevance = np.array([b.get('similarity', 0.0) for b in candidates], dtype=np.float32)
+
+    n_primary = len(primary)
+    primary_idx = mmr_select(relevance[:n_primary], similarity[:n_primary, :n_primary], primary_k, lambda_)
+
+    secondary_idx = []
+    if secondary:
+        redundancy = (similarity[n_primary:, primary_idx].max(axis=1) if primary_idx
+                      else np.zeros(len(secondary), dtype=np.float32))
+        secondary_idx = mmr_select(relevance[n_primary:], similarity[n_primary:, n_primary:],
+                                   secondary_k, lambda_, redundancy)
+    return primary_idx, secondary_idx
+
+
+def liked_books_search(books, criteria, liked_books, graph, title_index=None, rank_fn=rank_by_embedding,
+                       primary_k=10, secondary_k=5, query_embedding=None):
+    """
+    Answer a "more like the books I liked" request.
+
+    Candidates come from the precomputed neighbor graph when available and are
+    scored against the centroid of the liked books' embeddings, blended with
+    `query_embedding` (the composed tropes/mood/themes query) when given.
+    Falls back to scoring the whole catalog if the neighborhood yields fewer
+    than RELAX_MIN_RESULTS primary matches.
+    """
+    centroid = centroid_embedding(liked_books)
+    if centroid is None:
+        return None
+
+    target = centroid if query_embedding is None else blend_liked_query(centroid, query_embedding)
+    liked_ids = {b['id'] for b in liked_books}
+    rank = lambda filtered, top_k: rank_fn(filtered, target, top_k)
+
+    if graph:
+        candidates = neighbor_candidates(books, liked_books, graph)
+        print(f"🕸️  Neighbor graph candidates: {len(candidates)}", file=sys.stderr)
+        primary_results, secondary_results = search_pools(candidates, criteria, rank, primary_k, secondary_k,
+                                                          title_index=title_index)
+        if len(primary_results) >= RELAX_MIN_RESULTS:
+            return primary_results, secondary_results
+        print(f"⚠️  Neighborhood has {len(primary_results)} primary matches, scoring full catalog",
+              file=sys.stderr)
+
+    universe = [b for b in books if b['id'] not in liked_ids]
+    return search_pools(universe, criteria, rank, primary_k, secondary_k, title_index=title_index)
+
+
+def load_catalog(catalog_path):
+    """Load the book list from a catalog file (array or {"books": [...]} format)."""
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    # Handle both formats
+    if isinstance(catalog, list):
+        return catalog
+    if isinstance(catalog, dict) and 'books' in catalog:
+        return catalog['books']
+    raise ValueError("Catalog format not recognized")
+
+
+# Rough Python object overhead per byte of catalog JSON (dicts, strings, lists)
+BOOK_MEMORY_FACTOR = 4
+
+
+class QueryEncoder:
+    """
+    Vocabulary table and sentence-transformers model, both loaded lazily.
+    One encoder is shared by every catalog in a process.
+    """
+
+    def __init__(self, project_root):
+        self.project_root = Path(project_root)
+        self.vocab_path = self.project_root / 'data' / 'vocab_embeddings.npz'
+        self._vocab = None
+        self._vocab_stat = None
+        self._model = None
+        self._batcher = None
+        self._lock = threading.Lock()
+
+    def _stat_vocab(self):
+        try:
+            st = self.vocab_path.stat()
+            return st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def vocab(self):
+        if self._vocab is None:
+            with self._lock:
+                if self._vocab is None:
+                    self._vocab_stat = self._stat_vocab()
+                    self._vocab = load_vocab_table(self.vocab_path) or False
+        return self._vocab or None
+
+    def refresh(self):
+        """Reload the vocabulary table if its file changed; the swap is a single assignment."""
+        if self._vocab is None or self._stat_vocab() == self._vocab_stat:
+            return False
+        stat = self._stat_vocab()
+        vocab = load_vocab_table(self.vocab_path) or False
+        with self._lock:
+            self._vocab, self._vocab_stat = vocab, stat
+        return True
+
+    def get_model(self):
+        """
+        Return the sentence-transformers model, loading it on first call
+        (behind the micro-batcher once enable_batching() was called).
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_model()
+        if self._batcher is not None:
+            if self._batcher.model is None:
+                self._batcher.model = self._model
+            return self._batcher
+        return self._model
+
+    def enable_batching(self, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        """Coalesce encodes from concurrent queries into batched model calls (long-running processes)."""
+        self._batcher = BatchEncoder(self._model, max_batch, max_wait_ms)
+
+    def batch_stats(self):
+        return self._batcher.stats() if self._batcher is not None else None
+
+
+def remove_stale_matrices(matrix_dir, current_path):
+    """Delete matrices of older catalog versions (processes still mapping them keep their pages)."""
+    for path in matrix_dir.glob('*.npy'):
+        if path != current_path:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # Still open elsewhere (Windows); retried after the next rebuild
+
+
+class SearchResources:
+    """
+    Catalog and search artifacts loaded once and reused across queries.
+    The neighbor graph, vocabulary table and model are loaded lazily on first use,
+    so a one-shot CLI run only pays for what its query needs.
+    """
+
+    def __init__(self, project_root, catalog_path=None, mmap_embeddings=False, data_dir=None, encoder=None,
+                 multi_vector=None):
+        self.project_root = Path(project_root)
+        self.data_dir = Path(data_dir or self.project_root / 'data')
+        self.catalog_path = Path(catalog_path or self.data_dir / 'catalog_with_embeddings.json')
+        self.encoder = encoder or QueryEncoder(self.project_root)
+        # Taken before reading, so a file rewritten mid-load still looks out of date
+        self.version = self.fingerprint()
+        self.books = load_catalog(self.catalog_path)
+
+        # Embeddings move into one float32 matrix; each book keeps a row view.
+        # With mmap_embeddings the matrix is a read-only memory map of a .npy
+        # file, so forked workers share its pages instead of copying them.
+        self.matrix = self._load_matrix(mmap_embeddings)
+        self.row_of = {}
+        for i, book in enumerate(self.books):
+            self.row_of[book['id']] = i
+            if has_embedding(book):
+                book['embedding'] = self.matrix[i]
+        norms = np.linalg.norm(self.matrix, axis=1)
+        norms[norms == 0] = 1.0
+        self.norms = norms
+
+        # Normalized title index for books_read / books_liked matching
+        self.title_index = TitleIndex(
+            self.books, load_title_aliases(self.data_dir / 'title-aliases.json')
+        )
+
+        # Candidate counts and genre adjacency for the relaxation ladder
+        self.filter_counts = FilterCounts(self.books)
+        self.genre_adjacency = load_genre_adjacency(genre_adjacency_path(self.project_root, self.data_dir))
+
+        # Multi-vector scoring ('max' or 'weighted' pooling over book_vectors.npz)
+        self.multi_vector = multi_vector
+        self._book_vectors = None
+
+        self._graph = None
+        self._lock = threading.Lock()
+
+    def _load_matrix(self, mmap_embeddings):
+        dim = next((len(b['embedding']) for b in self.books if has_embedding(b)), 0)
+        if not mmap_embeddings:
+            return self._stack_embeddings(dim)
+
+        # One directory per catalog, so a new version only replaces its own catalog's matrix
+        matrix_dir = (self.project_root / '.cache' / 'embeddings'
+                      / stable_hash(str(self.data_dir.resolve()))[:16])
+        matrix_path = matrix_dir / f"{self.version}.npy"
+        if not matrix_path.exists():
+            matrix_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = matrix_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self._stack_embeddings(dim))
+            os.replace(tmp_path, matrix_path)
+            remove_stale_matrices(matrix_dir, matrix_path)
+        return np.load(matrix_path, mmap_mode='r')
+
+    def _stack_embeddings(self, dim):
+        matrix = np.zeros((len(self.books), dim), dtype=np.float32)
+        for i, book in enumerate(self.books):
+            if has_embedding(book):
+                matrix[i] = book['embedding']
+        return matrix
+
+    def rank(self, filtered_books, query_embedding, top_k=10):
+        """Vectorized equivalent of rank_by_embedding() over the shared matrix."""
+        if not filtered_books:
+            return []
+
+        rows = np.fromiter((self.row_of[b['id']] for b in filtered_books), dtype=np.int64,
+                           count=len(filtered_books))
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+        similarities = (self.matrix[rows] @ query) / (self.norms[rows] * query_norm)
+
+        order = np.argsort(-similarities, kind='stable')[:top_k]
+        return [dict(filtered_books[i], similarity=float(similarities[i])) for i in order]
+
+    def score_all(self, query_embedding):
+        """
+        Cosine similarity of every catalog book to the query (one matrix-vector product).
+        In multi-vector mode, each book's score pools the similarities of its vectors.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+        book_vectors = self.book_vectors if self.multi_vector else None
+        if book_vectors is not None:
+            offsets, kinds, vectors = book_vectors
+            return pool_scores((vectors @ query) / query_norm, offsets, kinds, self.multi_vector)
+        return (self.matrix @ query) / (self.norms * query_norm)
+
+    def rank_scored(self, filtered_books, scores, top_k=10):
+        """rank() over precomputed score_all() output: no query vector, no re-scoring."""
+        if not filtered_books:
+            return []
+
+        rows = np.fromiter((self.row_of[b['id']] for b in filtered_books), dtype=np.int64,
+                           count=len(filtered_books))
+        similarities = scores[rows]
+        order = np.argsort(-similarities, kind='stable')[:top_k]
+        return [dict(filtered_books[i], similarity=float(similarities[i])) for i in order]
+
+    def unit_vectors(self, books):
+        """Normalized embedding rows for the given catalog books."""
+        rows = np.fromiter((self.row_of[b['id']] for b in books), dtype=np.int64, count=len(books))
+        return self.matrix[rows] / self.norms[rows][:, None]
+
+    def fingerprint(self):
+        """
+        Current fingerprint of this catalog's files (changes when they are regenerated).
+        `version` holds the value at load time; they differ once the files are stale.
+        """
+        return catalog_fingerprint(self.project_root, self.catalog_path, self.data_dir)
+
+    def memory_bytes(self):
+        """Approximate resident size: embedding matrix, norms and book metadata."""
+        matrix_bytes = 0 if isinstance(self.matrix, np.memmap) else self.matrix.nbytes
+        metadata = sum(len(json.dumps({k: v for k, v in b.items() if k != 'embedding'}, ensure_ascii=False))
+                       for b in self.books)
+        return matrix_bytes + self.norms.nbytes + metadata * BOOK_MEMORY_FACTOR
+
+    @property
+    def book_vectors(self):
+        """(offsets, kinds, vectors) aligned to catalog rows, or None without book_vectors.npz."""
+        if self._book_vectors is None:
+            with self._lock:
+                if self._book_vectors is None:
+                    self._book_vectors = self._load_book_vectors() or ()
+        return self._book_vectors or None
+
+    def _load_book_vectors(self):
+        stored = load_book_vectors(self.data_dir / 'book_vectors.npz')
+        if stored is None:
+            print("⚠️  book_vectors.npz not found, using single-vector scoring "
+                  "(run scripts/build_book_vectors.py)", file=sys.stderr)
+            return None
+        offsets, kinds, vectors = stored['offsets'], stored['kinds'], stored['vectors']
+        if stored['ids'] == [b['id'] for b in self.books]:
+            return offsets, kinds, vectors
+
+        # Built from another catalog revision: books it lacks fall back to their single vector
+        print("⚠️  book_vectors.npz does not match the catalog, realigning", file=sys.stderr)
+        position = {book_id: i for i, book_id in enumerate(stored['ids'])}
+        unit_matrix = self.matrix / self.norms[:, None]
+        parts_vectors, parts_kinds, new_offsets = [], [], [0]
+        for row, book in enumerate(self.books):
+            i = position.get(book['id'])
+            if i is None:
+                parts_vectors.append(unit_matrix[row:row + 1])
+                parts_kinds.append(np.zeros(1, dtype=np.int8))
+            else:
+                parts_vectors.append(vectors[offsets[i]:offsets[i + 1]])
+                parts_kinds.append(kinds[offsets[i]:offsets[i + 1]])
+            new_offsets.append(new_offsets[-1] + len(parts_vectors[-1]))
+        return (np.asarray(new_offsets, dtype=np.int64), np.concatenate(parts_kinds),
+                np.concatenate(parts_vectors).astype(np.float32, copy=False))
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = load_neighbor_graph(self.data_dir / 'neighbor_graph.npz') or {}
+        return self._graph
+
+    @property
+    def vocab(self):
+        return self.encoder.vocab
+
+    def get_model(self):
+        """Return the shared sentence-transformers model, loading it on first call."""
+        return self.encoder.get_model()
+
+
+def search_namespace(catalog_id=None):
+    """Results cache namespace of a catalog (each catalog keeps its own fingerprint)."""
+    if catalog_id in (None, DEFAULT_CATALOG):
+        return SEARCH_NAMESPACE
+    return f"{SEARCH_NAMESPACE}-{catalog_id}"
+
+
+def search_cache_key(criteria, mmr_lambda=None, relax=True, multi_vector=None):
+    """Results cache key: the canonical criteria hash, plus the MMR, relaxation and scoring settings."""
+    key = criteria_hash(criteria)
+    if mmr_lambda is not None:
+        key = f"{key}-mmr{mmr_lambda:g}"
+    if multi_vector:
+        key = f"{key}-mv{multi_vector}"
+    return key if relax else f"{key}-strict"
+
+
+def search(criteria, resources, mmr_lambda=None, relax=True, scores=None, exclude_ids=(), primary_k=10,
+           secondary_k=5):
+    """
+    Run the full search for one criteria dict.
+
+    Args:
+        mmr_lambda: If set, shrink the candidate pools with diversify_pools()
+        relax: Relax filters (RELAXATION_LADDER) when they leave too few candidates
+        scores: score_all() output to rank by instead of composing the query again
+        exclude_ids: Book ids to leave out (e.g. rejected earlier in a session)
+        primary_k, secondary_k: Pool sizes before MMR (deeper for paginated rankings)
+
+    Returns:
+        list: Primary then secondary results, each a copy of the catalog entry
+        with `similarity` and `genre_pool` added and `embedding` removed, plus
+        `relaxed` on books that only match through a relaxed constraint.
+    """
+    books = resources.books
+    title_index = resources.title_index
+    if exclude_ids:
+        books = [b for b in books if b['id'] not in exclude_ids]
+
+    # Filters may be relaxed; the query itself always comes from the user's criteria
+    filter_criteria, relaxed = criteria, []
+    if relax:
+        read_ids = title_index.resolve_ids(criteria['books_read']) if criteria.get('books_read') else set()
+        read_ids |= set(exclude_ids)
+        filter_criteria, relaxed = relax_criteria(criteria, resources.filter_counts, resources.genre_adjacency,
+                                                  read_ids)
+        if relaxed:
+            print(f"🪜 Too few matches, relaxed: {', '.join(relaxed)} "
+                  f"({resources.filter_counts.count(filter_criteria, read_ids)} candidates)", file=sys.stderr)
+
+    # Liked-book requests are answered from the neighbor graph without loading the model,
+    # steered by the composed query when the vocabulary table covers it
+    pools = None
+    liked_books = find_books_by_title(books, criteria.get('books_liked') or [], title_index)
+    if liked_books:
+        print(f"❤️  Liked books in catalog: {[b['title'] for b in liked_books]}", file=sys.stderr)
+        pools = liked_books_search(
+            books, filter_criteria, liked_books, resources.graph, title_index, rank_fn=resources.rank,
+            primary_k=primary_k, secondary_k=secondary_k,
+            query_embedding=vocab_query_embedding(criteria, resources.vocab)
+        )
+
+    if pools is None and scores is not None:
+        pools = search_pools(
+            books, filter_criteria,
+            lambda filtered, top_k: resources.rank_scored(filtered, scores, top_k),
+            primary_k, secondary_k, title_index=title_index
+        )
+
+    if pools is None:
+        # Query vector from the vocabulary table; the model loads only for unknown terms
+        query_text = build_query_text(criteria)
+        print(f"🔍 Query: \"{query_text}\"", file=sys.stderr)
+
+        query_embedding = compose_query_embedding(criteria, resources.vocab, resources.get_model)
+
+        if resources.multi_vector:
+            # Pooled scores come from one pass over all book vectors
+            scores = resources.score_all(query_embedding)
+            rank = lambda filtered, top_k: resources.rank_scored(filtered, scores, top_k)
+        else:
+            rank = lambda filtered, top_k: resources.rank(filtered, query_embedding, top_k)
+        pools = search_pools(books, filter_criteria, rank, primary_k, secondary_k, title_index=title_index)
+
+    primary_results, secondary_results = pools
+    if mmr_lambda is not None:
+        primary_results, secondary_results = diversify_pools(
+            primary_results, secondary_results, resources.unit_vectors, mmr_lambda
+        )
+
+    # 4. Combine results (primary + secondary)
     all_results = primary_results + secondary_results
+    if relaxed:
+        mark_relaxed(all_results, criteria, relaxed)
     print(f"📊 Total candidates: {len(all_results)} (primary: {len(primary_results)}, secondary: {len(secondary_results)})", file=sys.stderr)
 
     if not all_results:
         print("⚠️  No books match the criteria", file=sys.stderr)
-        print(json.dumps([]))
-        sys.exit(0)
 
-    # 6. Strip embeddings from output (not needed downstream, saves ~70KB)
+    # 5. Strip embeddings from output (not needed downstream, saves ~70KB)
     for book in all_results:
         book.pop('embedding', None)
 
-    # 7. Output JSON to stdout
-    print(json.dumps(all_results, indent=2, ensure_ascii=False))
+    return all_results
+
+
+def open_resources(project_root, catalog_path, data_dir=None, multi_vector=None):
+    """Load SearchResources or exit with a readable error."""
+    try:
+        return SearchResources(project_root, catalog_path, data_dir=data_dir, multi_vector=multi_vector)
+    except ValueError as e:
+        print(f"❌ Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+EXAMPLE_CRITERIA = {
+    "primary_genre": "sci-fi",
+    "maturity_level": 4,
+    "tropes": ["dystopian-society", "cyberpunk"],
+    "mood": ["dark", "tense"],
+    "pacing": "fast",
+    "language_preference": "any",
+    "books_read": []
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vector similarity search over the book catalog',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Example criteria JSON:\n" + json.dumps(EXAMPLE_CRITERIA, indent=2)
+    )
+    parser.add_argument('criteria', nargs='?',
+                        help="Path to criteria JSON file, or '-' to read it from stdin (not needed with --cursor)")
+    parser.add_argument('--compact', action='store_true',
+                        help='Emit minified JSON with only the fields the presenter needs')
+    parser.add_argument('--bundle', action='store_true',
+                        help='Emit one minified {"criteria", "results"} line for present_recommendations.py --bundle')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG, metavar='ID',
+                        help='Catalog to search: data/catalogs/<ID>/ (default: data/)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the results cache in .cache/results')
+    parser.add_argument('--warm-model', action='store_true',
+                        help='When reading criteria from stdin, load the model while waiting for it')
+    parser.add_argument('--mmr', type=float, nargs='?', const=MMR_LAMBDA, default=None, metavar='LAMBDA',
+                        help=f'Reduce candidates to a diverse set with maximal marginal relevance '
+                             f'(default lambda: {MMR_LAMBDA})')
+    parser.add_argument('--no-relax', action='store_true',
+                        help='Keep the filters as given even when they leave fewer than '
+                             f'{RELAX_MIN_RESULTS} candidates (default: relax language, maturity, then genre)')
+    parser.add_argument('--multi-vector', nargs='?', const='max', choices=('max', 'weighted'), default=None,
+                        help='Score with several vectors per book from book_vectors.npz, pooled by max '
+                             '(default) or a weighted mean')
+    parser.add_argument('--paginate', action='store_true',
+                        help='Cache the ranking for later pages and report a next-page cursor')
+    parser.add_argument('--cursor', metavar='CURSOR',
+                        help='Return the page a --paginate cursor points to (same --catalog)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.criteria is None and args.cursor is None:
+        parser.error('criteria is required unless --cursor is given')
+
+    # Determine project root
+    piped = args.criteria == STDIN_MARKER
+    if args.criteria is None or piped or Path(args.criteria).is_absolute():
+        # Criteria file might be temporary (or piped), find project root from script location
+        project_root = Path(__file__).parent.parent
+    else:
+        project_root = Path.cwd()
+
+    # Load catalog with embeddings
+    try:
+        data_dir = catalog_data_dir(project_root, args.catalog)
+    except ValueError as e:
+        print(f"❌ Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    catalog_path = data_dir / 'catalog_with_embeddings.json'
+
+    if not catalog_path.exists():
+        print(f"❌ Error: Catalog with embeddings not found at {catalog_path}", file=sys.stderr)
+        print("   Run: python scripts/generate_embeddings.py first", file=sys.stderr)
+        sys.exit(1)
+
+    profiler = StageProfiler(resolve_profile_dir(args.profile, project_root), 'vector_search')
+
+    resources = None
+    if piped:
+        # The upstream stage is still extracting the profile: warm up meanwhile
+        with profiler.stage('load_catalog'):
+            resources = open_resources(project_root, catalog_path, data_dir, args.multi_vector)
+        with profiler.stage('load_indexes'):
+            resources.graph
+            resources.vocab
+        if args.warm_model or resources.vocab is None:
+            with profiler.stage('load_model'):
+                try:
+                    resources.get_model()
+                except Exception as e:
+                    # Speculative: the query may not need the model at all
+                    print(f"⚠️  Model warm-up failed: {str(e)}", file=sys.stderr)
+
+    if args.paginate or args.cursor:
+        criteria, all_results, next_cursor = paginated_search(args, project_root, catalog_path, data_dir,
+                                                              resources, profiler)
+        with profiler.stage('output'):
+            if args.bundle:
+                print(dumps(dict(make_bundle(criteria, all_results, args.catalog), next_cursor=next_cursor)))
+            else:
+                print(json.dumps({'next_cursor': next_cursor}), file=sys.stderr)
+                print(dumps(project(all_results)) if args.compact
+                      else json.dumps(all_results, indent=2, ensure_ascii=False))
+        profiler.report()
+        return
+
+    # Load criteria
+    with profiler.stage('read_criteria'):
+        try:
+            criteria = read_json(args.criteria)
+        except json.JSONDecodeError as e:
+            print(f"❌ Error: Invalid criteria JSON: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+    # Repeat criteria against an unchanged catalog are served from the results cache
+    cache = None if args.no_cache else ResultsCache(project_root / '.cache' / 'results')
+    namespace = search_namespace(args.catalog)
+    fingerprint = catalog_fingerprint(project_root, catalog_path, data_dir)
+    cache_key = search_cache_key(criteria, args.mmr, not args.no_relax, args.multi_vector)
+    all_results = cache.get(namespace, fingerprint, cache_key) if cache else None
+
+    if all_results is not None:
+        print(f"⚡ Cache hit: {len(all_results)} candidates", file=sys.stderr)
+    else:
+        if resources is None:
+            with profiler.stage('load_catalog'):
+                resources = open_resources(project_root, catalog_path, data_dir, args.multi_vector)
+        with profiler.stage('search'):
+            all_results = search(criteria, resources, args.mmr, not args.no_relax)
+        if cache:
+            cache.put(namespace, fingerprint, cache_key, all_results)
+
+    # 6. Output JSON to stdout
+    with profiler.stage('output'):
+        if args.bundle:
+            print(dumps(make_bundle(criteria, all_results, args.catalog)))
+        elif args.compact:
+            print(dumps(project(all_results)))
+        else:
+            print(json.dumps(all_results, indent=2, ensure_ascii=False))
+
+    profiler.report()
+
+
+def paginated_search(args, project_root, catalog_path, data_dir, resources, profiler):
+    """
+    First page of a cached ranking (--paginate) or the page a cursor points to (--cursor).
+
+    Returns:
+        tuple: (criteria, results, next cursor or None)
+    """
+    from result_pages import CursorError, first_page, next_page, ranking_cache
+
+    if resources is None:
+        with profiler.stage('load_catalog'):
+            resources = open_resources(project_root, catalog_path, data_dir, args.multi_vector)
+    cache = ranking_cache(project_root)
+    namespace = search_namespace(args.catalog)
+
+    if args.cursor:
+        with profiler.stage('page'):
+            try:
+                return next_page(args.cursor, resources, cache, namespace)
+            except CursorError as e:
+                print(f"❌ Error: {str(e)}", file=sys.stderr)
+                sys.exit(1)
+
+    with profiler.stage('read_criteria'):
+        try:
+            criteria = read_json(args.criteria)
+        except json.JSONDecodeError as e:
+            print(f"❌ Error: Invalid criteria JSON: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+    with profiler.stage('search'):
+        results, next_cursor = first_page(criteria, resources, cache, namespace, args.mmr, not args.no_relax)
+    return criteria, results, next_cursor
 
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+"""
+Shared fixtures: the scripts/ directory on sys.path (the scripts import each
+other as siblings), a deterministic stand-in for the sentence-transformers
+model, and the bundled 30-book catalog loaded with it.
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+
+from vector_search import QueryEncoder, SearchResources  # noqa: E402
+
+DIM = 384
+
+
+class HashModel:
+    """model.encode() stand-in: a fixed pseudo-random vector per text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, sentences, **_kwargs):
+        self.calls += 1
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.stack([text_vector(t) for t in texts]) if texts else np.zeros((0, DIM), np.float32)
+        return vectors[0] if single else vectors
+
+
+def text_vector(text):
+    seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def vocab_table(terms):
+    """In-memory vocabulary table (as load_vocab_table() returns) of HashModel vectors."""
+    terms = sorted(terms)
+    return {t: i for i, t in enumerate(terms)}, np.stack([text_vector(t) for t in terms])
+
+
+class FakeQueryEncoder(QueryEncoder):
+    """
+    QueryEncoder with HashModel (never loads the real model) and, optionally,
+    a vocabulary table of the given terms instead of data/vocab_embeddings.npz.
+    """
+
+    def __init__(self, project_root=PROJECT_ROOT, vocab_terms=None):
+        super().__init__(project_root)
+        self.vocab_path = Path('/nonexistent/vocab_embeddings.npz')
+        self._model = HashModel()
+        if vocab_terms is not None:
+            self._vocab = vocab_table(vocab_terms)
+
+
+class NoModelEncoder(FakeQueryEncoder):
+    """Fails the test if anything asks for the model."""
+
+    def get_model(self):
+        raise AssertionError('the model must not be loaded on this path')
+
+
+@pytest.fixture(scope='session')
+def project_root():
+    return PROJECT_ROOT
+
+
+@pytest.fixture
+def encoder():
+    return FakeQueryEncoder()
+
+
+@pytest.fixture
+def resources(encoder):
+    return SearchResources(PROJECT_ROOT, encoder=encoder)
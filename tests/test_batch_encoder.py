@@ -0,0 +1,49 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batch_encoder import BatchEncoder
+from conftest import HashModel, text_vector
+
+
+def test_single_and_list_shapes():
+    encoder = BatchEncoder(HashModel(), max_wait_ms=0)
+    np.testing.assert_array_equal(encoder.encode('hola'), text_vector('hola'))
+    vectors = encoder.encode(['a', 'b'])
+    assert vectors.shape == (2, 384)
+    np.testing.assert_array_equal(vectors[1], text_vector('b'))
+    assert encoder.encode([]).shape[0] == 0
+
+
+def test_concurrent_callers_share_batches():
+    model = HashModel()
+    encoder = BatchEncoder(model, max_batch=64, max_wait_ms=200)
+    texts = [f'query {i}' for i in range(16)]
+    results = {}
+    start = threading.Barrier(len(texts))
+
+    def worker(text):
+        start.wait()
+        results[text] = encoder.encode(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for text in texts:
+        np.testing.assert_array_equal(results[text], text_vector(text))
+    assert encoder.stats()['items'] == len(texts)
+    assert model.calls < len(texts)
+
+
+def test_model_errors_reach_the_caller():
+    class Broken:
+        def encode(self, sentences, **_kwargs):
+            raise RuntimeError('model failed')
+
+    encoder = BatchEncoder(Broken(), max_wait_ms=0)
+    with pytest.raises(RuntimeError):
+        encoder.encode('hola')
@@ -0,0 +1,47 @@
+import pytest
+
+from batch_search import BatchSearcher, read_records
+from conftest import NoModelEncoder
+from vector_search import SearchResources, search
+
+QUERIES = [
+    {'primary_genre': 'sci-fi', 'secondary_genres': ['fantasy'], 'mood_preference': 'dark',
+     'language_preference': 'any', 'themes_liked': ['artificial intelligence']},
+    {'primary_genre': 'thriller', 'language_preference': 'es', 'books_read': ['Gone Girl']},
+    {'primary_genre': 'fantasy', 'secondary_genres': ['horror', 'sci-fi'], 'language_preference': 'any',
+     'books_liked': ['El Hobbit'], 'mood_preference': 'whimsical'},
+    {'primary_genre': 'romance', 'language_preference': 'any', 'books_liked': ['Orgullo y Prejuicio'],
+     'books_disliked': ['Beach Read']},
+    {'primary_genre': 'literary-fiction', 'language_preference': 'es', 'complexity_preference': 'complex'},
+]
+
+
+def ranked(results):
+    return [(b['id'], b['genre_pool'], b.get('relaxed')) for b in results]
+
+
+@pytest.mark.parametrize('mmr_lambda', [None, 0.7])
+def test_batch_matches_search(resources, mmr_lambda):
+    batch = BatchSearcher(resources, mmr_lambda=mmr_lambda).search_chunk(QUERIES)
+    for criteria, results in zip(QUERIES, batch):
+        expected = search(criteria, resources, mmr_lambda)
+        assert ranked(results) == ranked(expected)
+        assert [b['similarity'] for b in results] == pytest.approx([b['similarity'] for b in expected], abs=1e-5)
+
+
+def test_read_records_accepts_bare_and_wrapped_criteria():
+    lines = ['{"primary_genre": "horror"}', '', '{"id": "u7", "criteria": {"primary_genre": "romance"}}',
+             'not json', '[1]']
+    records = read_records(lines)
+    assert [(r[0], r[1]) for r in records[:2]] == [(1, {'primary_genre': 'horror'}),
+                                                  ('u7', {'primary_genre': 'romance'})]
+    assert [r[0] for r in records[2:]] == [4, 5]
+    assert all(r[1] is None and r[2] for r in records[2:])
+
+
+@pytest.mark.parametrize('vocab_terms', [None, ['whimsical', 'dark', 'romance']])
+def test_liked_queries_never_load_the_model(project_root, vocab_terms):
+    resources = SearchResources(project_root, encoder=NoModelEncoder(project_root, vocab_terms=vocab_terms))
+    liked = [c for c in QUERIES if c.get('books_liked')]
+    for criteria, results in zip(liked, BatchSearcher(resources).search_chunk(liked)):
+        assert ranked(results) == ranked(search(criteria, resources))
@@ -0,0 +1,72 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from build_book_vectors import (
+    KINDS, MAX_SYNOPSIS_CHUNKS, book_texts, build_book_vectors, chunk_synopsis, load_book_vectors, pool_scores,
+    save_book_vectors,
+)
+from conftest import FakeQueryEncoder, HashModel
+from vector_search import SearchResources
+
+OFFSETS = np.array([0, 3, 4, 6])
+KIND_ROWS = np.array([0, 1, 2, 0, 0, 2], dtype=np.int8)
+SIMILARITIES = np.array([0.1, 0.9, 0.3, 0.5, 0.2, 0.8], dtype=np.float32)
+
+
+def test_max_pooling_takes_best_part_per_book():
+    np.testing.assert_allclose(pool_scores(SIMILARITIES, OFFSETS, KIND_ROWS, 'max'), [0.9, 0.5, 0.8])
+
+
+def test_weighted_pooling_uses_kind_weights():
+    # metadata and tropes weigh 1.0, synopsis chunks 0.5
+    expected = [(0.1 + 0.9 + 0.5 * 0.3) / 2.5, 0.5, (0.2 + 0.5 * 0.8) / 1.5]
+    np.testing.assert_allclose(pool_scores(SIMILARITIES, OFFSETS, KIND_ROWS, 'weighted'), expected, rtol=1e-6)
+
+
+def test_chunk_synopsis_packs_sentences():
+    text = 'One. Two two. ' + 'x' * 25 + '. Four.'
+    assert chunk_synopsis(text, size=12) == ['One.', 'Two two.', 'x' * 12, 'x' * 12, 'x. Four.']
+    assert len(chunk_synopsis('A. ' * 1000, size=10)) == MAX_SYNOPSIS_CHUNKS
+
+
+def test_build_save_load_round_trip(tmp_path):
+    books = [
+        {'id': 'a', 'title': 'A', 'author': 'X', 'genre': 'fantasy', 'mood': 'dark', 'tropes': ['heist'],
+         'synopsis': 'First sentence. Second sentence.'},
+        {'id': 'b', 'title': 'B', 'author': 'Y', 'genre': 'horror'},
+    ]
+    assert [kind for kind, _text in book_texts(books[1])] == [KINDS.index('metadata')]
+
+    offsets, kinds, vectors = build_book_vectors(books, HashModel())
+    assert offsets.tolist() == [0, 3, 4]
+    assert kinds.tolist() == [0, 1, 2, 0]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    path = tmp_path / 'book_vectors.npz'
+    save_book_vectors(path, ['a', 'b'], offsets, kinds, vectors)
+    stored = load_book_vectors(path)
+    assert stored['ids'] == ['a', 'b']
+    np.testing.assert_array_equal(stored['vectors'], vectors)
+    assert load_book_vectors(tmp_path / 'missing.npz') is None
+
+
+def test_multi_vector_scoring_and_realignment(project_root, tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    shutil.copy(project_root / 'data' / 'catalog_with_embeddings.json', data_dir)
+    resources = SearchResources(tmp_path, data_dir=data_dir, encoder=FakeQueryEncoder(tmp_path), multi_vector='max')
+    books = resources.books
+
+    # Built before the last book was added: it keeps its single vector
+    offsets, kinds, vectors = build_book_vectors(books[:-1], HashModel())
+    save_book_vectors(data_dir / 'book_vectors.npz', [b['id'] for b in books[:-1]], offsets, kinds, vectors)
+
+    query = vectors[offsets[7] + 1]  # One part of book 7
+    scores = resources.score_all(query)
+    assert scores.shape == (len(books),)
+    assert int(np.argmax(scores)) == 7
+    np.testing.assert_allclose(scores[:-1], pool_scores(vectors @ query, offsets, kinds), atol=1e-5)
+    single = resources.matrix[-1] / resources.norms[-1]
+    assert scores[-1] == pytest.approx(float(single @ query), abs=1e-5)
@@ -0,0 +1,70 @@
+import shutil
+
+import pytest
+
+from catalog_registry import CatalogRegistry
+from conftest import FakeQueryEncoder
+
+
+@pytest.fixture
+def project(project_root, tmp_path):
+    """Scratch project with the bundled catalog as 'default' plus editions 'es' and 'en'."""
+    catalog = project_root / 'data' / 'catalog_with_embeddings.json'
+    for data_dir in (tmp_path / 'data', tmp_path / 'data' / 'catalogs' / 'es',
+                     tmp_path / 'data' / 'catalogs' / 'en'):
+        data_dir.mkdir(parents=True)
+        shutil.copy(catalog, data_dir)
+    return tmp_path
+
+
+def registry(project, memory_budget):
+    return CatalogRegistry(project, memory_budget=memory_budget, encoder=FakeQueryEncoder(project))
+
+
+def test_get_caches_and_shares_encoder(project):
+    catalogs = registry(project, memory_budget=1 << 30)
+    default = catalogs.get()
+    assert catalogs.get('default') is default
+    assert catalogs.get('es').encoder is default.encoder
+    assert catalogs.stats()['loads'] == 2
+
+
+def test_budget_evicts_least_recently_used(project):
+    catalogs = registry(project, memory_budget=1 << 30)
+    one_catalog = catalogs.get().memory_bytes()
+    catalogs.memory_budget = int(one_catalog * 2.5)
+
+    catalogs.get('es')
+    catalogs.peek('default')  # 'es' is now least recently used
+    catalogs.get('en')
+    assert list(catalogs.stats()['loaded']) == ['default', 'en']
+    assert catalogs.evictions == 1
+
+
+def test_tiny_budget_keeps_the_catalog_just_loaded(project):
+    catalogs = registry(project, memory_budget=1)
+    catalogs.get()
+    catalogs.get('es')
+    assert list(catalogs.stats()['loaded']) == ['es']
+
+
+def test_failed_load_can_be_retried(project):
+    catalogs = registry(project, memory_budget=1 << 30)
+    catalog = project / 'data' / 'catalogs' / 'es' / 'catalog_with_embeddings.json'
+    good = catalog.read_bytes()
+    catalog.write_text('{"books": [', encoding='utf-8')
+
+    with pytest.raises(Exception):
+        catalogs.get('es')
+    assert catalogs._loading == {}
+
+    catalog.write_bytes(good)
+    assert len(catalogs.get('es').books) == 30
+    assert catalogs._loading == {}
+
+
+def test_unknown_catalog_is_rejected(project):
+    catalogs = registry(project, memory_budget=1 << 30)
+    with pytest.raises(ValueError):
+        catalogs.get('missing')
+    assert catalogs._loading == {}
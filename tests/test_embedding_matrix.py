@@ -0,0 +1,29 @@
+import shutil
+
+import numpy as np
+
+from conftest import FakeQueryEncoder
+from vector_search import SearchResources
+
+
+def copy_catalog(project_root, tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    shutil.copy(project_root / 'data' / 'catalog_with_embeddings.json', data_dir)
+    return data_dir
+
+
+def test_mmap_matrix_replaces_older_versions(project_root, tmp_path):
+    data_dir = copy_catalog(project_root, tmp_path)
+    first = SearchResources(tmp_path, data_dir=data_dir, mmap_embeddings=True,
+                            encoder=FakeQueryEncoder(tmp_path))
+    [matrix_dir] = (tmp_path / '.cache' / 'embeddings').iterdir()
+    assert [p.name for p in matrix_dir.glob('*.npy')] == [f'{first.version}.npy']
+
+    # Regenerated catalog: new fingerprint, old matrix removed
+    (data_dir / 'title-aliases.json').write_text('{"aliases": {}}', encoding='utf-8')
+    second = SearchResources(tmp_path, data_dir=data_dir, mmap_embeddings=True,
+                             encoder=FakeQueryEncoder(tmp_path))
+    assert second.version != first.version
+    assert [p.name for p in matrix_dir.glob('*.npy')] == [f'{second.version}.npy']
+    np.testing.assert_array_equal(first.matrix, second.matrix)
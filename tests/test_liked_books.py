@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from conftest import NoModelEncoder
+from vector_search import (
+    LIKED_WEIGHT, RELAX_MIN_RESULTS, SearchResources, blend_liked_query, centroid_embedding, liked_books_search,
+    neighbor_candidates, search,
+)
+
+
+def test_blend_is_weighted_sum_of_unit_vectors():
+    centroid = np.array([3.0, 0.0], dtype=np.float32)
+    query = np.array([0.0, 10.0], dtype=np.float32)
+    blended = blend_liked_query(centroid, query)
+    np.testing.assert_allclose(blended, [LIKED_WEIGHT, 1 - LIKED_WEIGHT])
+
+
+def test_thin_neighborhood_falls_back_to_full_catalog(resources):
+    liked = resources.books[0]
+    # A graph where the liked book's only neighbor is itself: zero candidates
+    graph = {liked['id']: [(liked['id'], 1.0)]}
+    criteria = {'primary_genre': liked['genre'], 'language_preference': 'any'}
+
+    assert neighbor_candidates(resources.books, [liked], graph) == []
+    primary, _secondary = liked_books_search(resources.books, criteria, [liked], graph,
+                                             rank_fn=resources.rank)
+    same_genre = [b for b in resources.books if b['genre'] == liked['genre'] and b['id'] != liked['id']]
+    assert len(primary) == min(len(same_genre), 10) >= RELAX_MIN_RESULTS
+    assert liked['id'] not in {b['id'] for b in primary}
+
+
+def liked_criteria(resources, **extra):
+    liked = resources.books[0]
+    return dict({'primary_genre': liked['genre'], 'language_preference': 'any', 'books_liked': [liked['title']]},
+                **extra)
+
+
+def ranking(results):
+    return [(b['id'], round(b['similarity'], 5)) for b in results]
+
+
+@pytest.fixture
+def no_model_resources(project_root):
+    return SearchResources(project_root, encoder=NoModelEncoder(project_root))
+
+
+def test_liked_search_never_loads_the_model(no_model_resources):
+    resources = no_model_resources
+    centroid_only = search(liked_criteria(resources), resources)
+    assert centroid_only
+    # No vocabulary table: the mood cannot be composed, so the centroid alone ranks
+    assert ranking(search(liked_criteria(resources, mood=['dark']), resources)) == ranking(centroid_only)
+    # Thin neighborhood: the full-catalog fallback must not encode either
+    assert search(liked_criteria(resources, secondary_genres=['horror']), resources, 0.7)
+
+
+def test_liked_search_blends_vocabulary_terms(project_root, no_model_resources):
+    encoder = NoModelEncoder(project_root, vocab_terms=['dark', 'light', 'fantasy', 'sci-fi'])
+    resources = SearchResources(project_root, encoder=encoder)
+    dark = search(liked_criteria(resources, mood=['dark']), resources)
+    light = search(liked_criteria(resources, mood=['light']), resources)
+    assert ranking(dark) != ranking(light)
+
+    # One out-of-vocabulary term: centroid only, still no model
+    partial = search(liked_criteria(resources, mood=['dark', 'eerie']), resources)
+    assert ranking(partial) == ranking(search(liked_criteria(resources), no_model_resources))
+
+
+def test_query_embedding_none_ranks_by_centroid(resources):
+    liked = resources.books[0]
+    criteria = {'primary_genre': liked['genre'], 'language_preference': 'any'}
+    centroid_only, _ = liked_books_search(resources.books, criteria, [liked], {}, rank_fn=resources.rank)
+    same_direction, _ = liked_books_search(resources.books, criteria, [liked], {}, rank_fn=resources.rank,
+                                           query_embedding=centroid_embedding([liked]))
+    assert [b['id'] for b in centroid_only] == [b['id'] for b in same_direction]
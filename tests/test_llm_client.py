@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from llm_client import FixtureMissing, RecordingMessages, ReplayMessages, StubMessages, request_hash
+from present_recommendations import build_user_message_from_data
+
+CRITERIA = {'primary_genre': 'fantasy', 'interaction_language': 'en'}
+RESULTS = [
+    {'id': 'el-hobbit-tolkien', 'title': 'El Hobbit', 'author': 'J.R.R. Tolkien', 'genre': 'fantasy',
+     'similarity': 0.6123456789, 'genre_pool': 'primary'},
+    {'id': 'piranesi-clarke', 'title': 'Piranesi', 'author': 'Susanna Clarke', 'genre': 'fantasy',
+     'similarity': 0.5, 'genre_pool': 'primary'},
+    {'id': 'dune-herbert', 'title': 'Dune', 'author': 'Frank Herbert', 'genre': 'sci-fi',
+     'similarity': 0.41, 'genre_pool': 'secondary', 'relaxed': ['language']},
+]
+
+
+def presenter_hash(results, criteria=CRITERIA):
+    messages = [{'role': 'user', 'content': build_user_message_from_data(criteria, results)}]
+    return request_hash('model', 2000, 'system prompt', messages)
+
+
+def test_presenter_hash_ignores_similarity_digits():
+    jittered = [dict(b, similarity=b['similarity'] + 1e-9) for b in RESULTS]
+    assert presenter_hash(jittered) == presenter_hash(RESULTS)
+
+
+def test_presenter_hash_tracks_what_the_model_is_asked():
+    assert presenter_hash(RESULTS[::-1]) != presenter_hash(RESULTS)
+    assert presenter_hash(RESULTS[:2]) != presenter_hash(RESULTS)
+    assert presenter_hash([dict(b, relaxed=None) for b in RESULTS]) != presenter_hash(RESULTS)
+    assert presenter_hash(RESULTS, dict(CRITERIA, interaction_language='es')) != presenter_hash(RESULTS)
+
+
+def test_plain_messages_hash_their_text():
+    first = request_hash('model', 500, 'system', [{'role': 'user', 'content': 'quiero fantasía'}])
+    assert first == request_hash('model', 500, 'system', [{'role': 'user', 'content': 'quiero fantasía'}])
+    assert first != request_hash('model', 500, 'system', [{'role': 'user', 'content': 'quiero terror'}])
+    assert first != request_hash('model', 500, 'system', [{'role': 'user', 'content': 'quiero fantasía'}], 0.0)
+
+
+def test_record_then_replay(tmp_path):
+    messages = [{'role': 'user', 'content': build_user_message_from_data(CRITERIA, RESULTS)}]
+    recorded = RecordingMessages(StubMessages(0, 0), tmp_path).create(
+        model='model', max_tokens=2000, system='system prompt', messages=messages)
+    [fixture] = tmp_path.glob('*.json')
+    assert json.loads(fixture.read_text(encoding='utf-8'))['response']['text'] == recorded.content[0].text
+
+    replayed = ReplayMessages(tmp_path).create(model='model', max_tokens=2000, system='system prompt',
+                                               messages=messages)
+    assert replayed.content[0].text == recorded.content[0].text
+    assert replayed.usage.output_tokens == recorded.usage.output_tokens
+
+    with pytest.raises(FixtureMissing):
+        ReplayMessages(tmp_path).create(model='model', max_tokens=2000, system='other prompt', messages=messages)
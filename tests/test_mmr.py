@@ -0,0 +1,50 @@
+import numpy as np
+
+from vector_search import diversify_pools, mmr_select
+
+
+def unit_vectors(books):
+    vectors = np.array([b['vec'] for b in books], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def book(book_id, vec, similarity, author=''):
+    return {'id': book_id, 'vec': vec, 'similarity': similarity, 'author': author}
+
+
+def test_lambda_one_is_relevance_order():
+    relevance = np.array([0.2, 0.9, 0.5], dtype=np.float32)
+    assert mmr_select(relevance, np.eye(3, dtype=np.float32), 3, lambda_=1.0) == [1, 2, 0]
+
+
+def test_near_duplicate_is_demoted():
+    relevance = np.array([0.9, 0.89, 0.6], dtype=np.float32)
+    similarity = np.array([[1.0, 0.99, 0.0], [0.99, 1.0, 0.0], [0.0, 0.0, 1.0]], dtype=np.float32)
+    assert mmr_select(relevance, similarity, 2, lambda_=0.5) == [0, 2]
+
+
+def test_k_larger_than_pool_and_redundancy():
+    relevance = np.array([0.9, 0.8], dtype=np.float32)
+    # Candidate 0 duplicates something already picked elsewhere
+    picked = mmr_select(relevance, np.eye(2, dtype=np.float32), 5, lambda_=0.5, redundancy=[1.0, 0.0])
+    assert picked == [1, 0]
+
+
+def test_diversify_pools_same_author_and_secondary_redundancy():
+    primary = [
+        book('a1', [1, 0, 0], 0.9, 'Ann'),
+        book('a2', [0, 1, 0], 0.85, 'Ann'),  # Orthogonal, but same author as a1
+        book('b1', [0, 0, 1], 0.8, 'Bob'),
+    ]
+    secondary = [
+        book('s1', [1, 0.01, 0], 0.7, 'Cid'),  # Near-copy of the best primary pick
+        book('s2', [0, 1, 0.01], 0.6, 'Dee'),
+    ]
+    chosen_primary, chosen_secondary = diversify_pools(primary, secondary, unit_vectors, 0.5,
+                                                       primary_k=2, secondary_k=1)
+    assert [b['id'] for b in chosen_primary] == ['a1', 'b1']
+    assert [b['id'] for b in chosen_secondary] == ['s2']
+
+
+def test_empty_pools_pass_through():
+    assert diversify_pools([], [], unit_vectors) == ([], [])
@@ -0,0 +1,29 @@
+from presentation_cache import PresentationCache
+from results_cache import ResultsCache
+
+CRITERIA = {'primary_genre': 'fantasy', 'interaction_language': 'es', 'raw_input': 'hola'}
+
+
+def test_pool_fills_before_serving():
+    cache = PresentationCache(ResultsCache(), 'v1', variants=2)
+    assert cache.get(CRITERIA, ['a', 'b']) is None
+
+    cache.put(CRITERIA, ['a', 'b'], [{'id': 'a'}], 'first')
+    assert cache.get(CRITERIA, ['a', 'b']) is None  # Pool not full yet: caller still hits the API
+
+    cache.put(CRITERIA, ['a', 'b'], [{'id': 'b'}], 'second')
+    cache.put(CRITERIA, ['a', 'b'], [{'id': 'c'}], 'ignored')
+    served = {cache.get(CRITERIA, ['a', 'b'])['markdown'] for _ in range(50)}
+    assert served == {'first', 'second'}
+
+
+def test_key_covers_candidates_and_fingerprint():
+    fingerprint = ['v1']
+    results = ResultsCache()
+    cache = PresentationCache(results, lambda: fingerprint[0], variants=1)
+    cache.put(CRITERIA, ['a', 'b'], [], 'cached')
+
+    assert cache.get(dict(CRITERIA, raw_input='other words'), ['a', 'b'])['markdown'] == 'cached'
+    assert cache.get(CRITERIA, ['b', 'a']) is None
+    fingerprint[0] = 'v2'
+    assert cache.get(CRITERIA, ['a', 'b']) is None
@@ -0,0 +1,44 @@
+import argparse
+import json
+import tracemalloc
+
+from profiling import StageProfiler, add_profile_argument, load_summaries, resolve_profile_dir
+
+
+def test_profile_argument_resolution(tmp_path):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('user_input', nargs='?')
+    add_profile_argument(parser)
+
+    assert resolve_profile_dir(parser.parse_args(['hola']).profile, tmp_path) is None
+    assert resolve_profile_dir(parser.parse_args(['--profile', 'out']).profile, tmp_path).name == 'out'
+    bare = resolve_profile_dir(parser.parse_args(['hola', '--profile']).profile, tmp_path)
+    assert bare.parent == tmp_path / '.cache' / 'profiles'
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = StageProfiler(None, 'script')
+    with profiler.stage('work'):
+        sum(range(100))
+    profiler.report()
+    assert profiler.stages == [] and list(tmp_path.iterdir()) == []
+
+
+def test_stages_and_summary_are_written(tmp_path):
+    profiler = StageProfiler(tmp_path, 'script')
+    try:
+        with profiler.stage('load'):
+            data = [bytes(1024) for _ in range(100)]
+        with profiler.stage('search'):
+            sum(len(d) for d in data)
+        profiler.report()
+    finally:
+        tracemalloc.stop()
+
+    for stage in ('load', 'search'):
+        for suffix in ('pstats', 'tracemalloc', 'top.txt'):
+            assert (tmp_path / f'script-{stage}.{suffix}').exists()
+    [summary] = load_summaries(tmp_path)
+    assert summary == json.loads((tmp_path / 'script-summary.json').read_text(encoding='utf-8'))
+    assert [s['stage'] for s in summary['stages']] == ['load', 'search']
+    assert summary['stages'][0]['peak_kb'] >= 100
@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+
+@pytest.mark.parametrize('flags', [['--profile'], ['--profile', 'out'], ['--cache-variants', '3']])
+def test_session_rejects_flags_it_cannot_honour(flags):
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / 'recommend.py'), '--session', 'ana', 'algo ligero', *flags],
+        capture_output=True, text=True, env={'PATH': ''},
+    )
+    assert result.returncode == 2
+    assert 'cannot be combined with --session' in result.stderr
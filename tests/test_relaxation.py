@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+
+from conftest import FakeQueryEncoder
+from fingerprint import catalog_fingerprint
+from vector_search import FilterCounts, SearchResources, filter_books, mark_relaxed, relax_criteria
+
+BOOKS = [
+    {'id': 'es-horror', 'genre': 'horror', 'maturity_level': 4, 'language': 'es'},
+    {'id': 'en-horror', 'genre': 'horror', 'maturity_level': 4, 'language': 'en'},
+    {'id': 'kid-horror', 'genre': 'horror', 'maturity_level': 2, 'language': 'both'},
+    {'id': 'thriller-1', 'genre': 'thriller', 'maturity_level': 4, 'language': 'both'},
+    {'id': 'thriller-2', 'genre': 'thriller', 'maturity_level': 5, 'language': 'en'},
+]
+ADJACENCY = {'horror': ['thriller']}
+
+
+def test_counts_match_filter_books():
+    counts = FilterCounts(BOOKS)
+    for criteria in ({'primary_genre': 'horror'}, {'primary_genre': 'horror', 'language_preference': 'es'},
+                     {'primary_genre': ['horror', 'thriller'], 'maturity_level': 4}, {}):
+        assert counts.count(criteria) == len(filter_books(BOOKS, criteria))
+    assert counts.count({'primary_genre': 'horror'}, excluded_ids=['es-horror', 'unknown']) == 2
+
+
+def test_enough_candidates_leaves_criteria_alone():
+    criteria = {'primary_genre': 'horror', 'language_preference': 'any'}
+    assert relax_criteria(criteria, FilterCounts(BOOKS), ADJACENCY) == (criteria, [])
+
+
+def test_ladder_stops_at_first_sufficient_step():
+    criteria = {'primary_genre': 'horror', 'language_preference': 'es', 'maturity_level': 4}
+    relaxed, steps = relax_criteria(criteria, FilterCounts(BOOKS), ADJACENCY)
+    assert steps == ['language', 'maturity']
+    assert relaxed == {'primary_genre': 'horror', 'language_preference': 'any'}
+    assert criteria['language_preference'] == 'es'  # Input is not modified
+
+
+def test_genre_widens_to_adjacent_and_best_step_wins():
+    criteria = {'primary_genre': 'horror', 'maturity_level': 5}
+    counts = FilterCounts(BOOKS)
+    assert relax_criteria(criteria, counts, ADJACENCY)[1] == ['maturity']
+
+    relaxed, steps = relax_criteria(criteria, counts, ADJACENCY, excluded_ids=['es-horror'])
+    assert steps == ['maturity', 'genre']
+    assert relaxed['primary_genre'] == ['horror', 'thriller']
+
+    # No step is enough: the one with the most candidates is used
+    relaxed, steps = relax_criteria({'primary_genre': 'thriller', 'maturity_level': 5}, counts, ADJACENCY,
+                                    min_results=10)
+    assert steps == ['maturity']
+    assert relaxed == {'primary_genre': 'thriller'}
+
+
+def test_mark_relaxed_flags_only_failed_constraints():
+    criteria = {'primary_genre': 'horror', 'language_preference': 'es', 'maturity_level': 4}
+    results = [dict(b, genre_pool='primary') for b in BOOKS[:4]] + [dict(BOOKS[4], genre_pool='secondary')]
+    mark_relaxed(results, criteria, ['language', 'maturity', 'genre'])
+    assert [b.get('relaxed') for b in results] == [
+        None, ['language'], ['maturity'], ['genre'], ['language'],
+    ]
+
+
+def test_adjacency_is_per_catalog_and_fingerprinted(project_root, tmp_path):
+    shared = tmp_path / 'data' / 'genre-adjacency.json'
+    data_dir = tmp_path / 'data' / 'catalogs' / 'es'
+    data_dir.mkdir(parents=True)
+    shutil.copy(project_root / 'data' / 'catalog_with_embeddings.json', data_dir)
+    shared.write_text(json.dumps({'adjacency_map': {'horror': ['thriller']}}), encoding='utf-8')
+
+    def load():
+        return SearchResources(tmp_path, data_dir=data_dir, encoder=FakeQueryEncoder(tmp_path))
+
+    # No edition copy: the shared file is used and fingerprinted
+    assert load().genre_adjacency == {'horror': ['thriller']}
+    before = catalog_fingerprint(tmp_path, data_dir=data_dir)
+    shared.write_text(json.dumps({'adjacency_map': {}}), encoding='utf-8')
+    os.utime(shared, ns=(1, 1))
+    assert catalog_fingerprint(tmp_path, data_dir=data_dir) != before
+
+    # The edition's own copy takes precedence
+    before = catalog_fingerprint(tmp_path, data_dir=data_dir)
+    (data_dir / 'genre-adjacency.json').write_text(json.dumps({'adjacency_map': {'horror': ['sci-fi']}}),
+                                                  encoding='utf-8')
+    assert load().genre_adjacency == {'horror': ['sci-fi']}
+    assert catalog_fingerprint(tmp_path, data_dir=data_dir) != before
@@ -0,0 +1,31 @@
+import os
+import time
+
+from request_state import RequestWorkspace, prune_stale_workspaces, requests_root
+
+
+def test_workspaces_are_private_and_removed(tmp_path):
+    with RequestWorkspace(tmp_path) as first, RequestWorkspace(tmp_path) as second:
+        assert first.directory != second.directory
+        first.path('criteria.json').write_text('{}', encoding='utf-8')
+        assert not second.path('criteria.json').exists()
+    assert not first.directory.exists() and not second.directory.exists()
+
+
+def test_keep_leaves_directory(tmp_path):
+    with RequestWorkspace(tmp_path, request_id='debug', keep=True) as ws:
+        pass
+    assert ws.directory == requests_root(tmp_path) / 'debug' and ws.directory.is_dir()
+
+
+def test_prune_removes_only_stale_directories(tmp_path):
+    stale = requests_root(tmp_path) / 'stale'
+    fresh = requests_root(tmp_path) / 'fresh'
+    stale.mkdir(parents=True)
+    fresh.mkdir()
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+
+    prune_stale_workspaces(tmp_path, max_age_seconds=3600)
+    assert not stale.exists() and fresh.exists()
+    prune_stale_workspaces(tmp_path / 'missing')  # No .cache/requests yet
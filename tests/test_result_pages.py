@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from result_pages import (
+    MAX_PAGES, CursorError, decode_cursor, encode_cursor, first_page, next_page, ranking_cache,
+)
+from results_cache import ResultsCache
+from vector_search import MMR_PRIMARY_K, MMR_SECONDARY_K, search
+
+CRITERIA = {'primary_genre': 'fantasy', 'secondary_genres': ['sci-fi', 'horror', 'thriller'],
+            'language_preference': 'any', 'mood': ['dark']}
+
+
+def all_pages(resources, cache, mmr_lambda):
+    results, cursor = first_page(CRITERIA, resources, cache, 'search', mmr_lambda)
+    pages = [results]
+    while cursor:
+        _criteria, results, cursor = next_page(cursor, resources, cache, 'search')
+        pages.append(results)
+    return pages
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor('abc_-9', 3)) == ('abc_-9', 3)
+    for cursor in ('', '!!!', encode_cursor('abc', -1), encode_cursor('a/b', 1), 'YWJj'):
+        with pytest.raises(CursorError):
+            decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('mmr_lambda', [None, 0.7])
+def test_first_page_is_search_and_pages_cover_every_candidate(resources, mmr_lambda):
+    pages = all_pages(resources, ResultsCache(), mmr_lambda)
+    assert [b['id'] for b in pages[0]] == [b['id'] for b in search(CRITERIA, resources, mmr_lambda)]
+
+    deep = search(CRITERIA, resources, None, primary_k=10 * MAX_PAGES, secondary_k=5 * MAX_PAGES)
+    served = [b['id'] for page in pages for b in page]
+    assert sorted(served) == sorted(b['id'] for b in deep)
+    assert all('embedding' not in b for page in pages for b in page)
+    if mmr_lambda is not None:
+        assert all(sum(b['genre_pool'] == 'primary' for b in page) <= MMR_PRIMARY_K for page in pages)
+        assert all(sum(b['genre_pool'] == 'secondary' for b in page) <= MMR_SECONDARY_K for page in pages)
+
+
+def test_shared_expired_and_past_end_cursors(resources, tmp_path):
+    cache = ranking_cache(tmp_path)
+    _results, cursor = first_page(CRITERIA, resources, cache, 'search', 0.7)
+    token, _page = decode_cursor(cursor)
+
+    with pytest.raises(CursorError, match='past the end'):
+        next_page(encode_cursor(token, MAX_PAGES), resources, cache, 'search')
+
+    # Any process sharing the directory can serve the cursor
+    criteria, results, _next = next_page(cursor, resources, ranking_cache(tmp_path), 'search')
+    assert criteria == CRITERIA and results
+
+    cache.max_age_seconds = 0
+    time.sleep(0.01)
+    with pytest.raises(CursorError, match='expired'):
+        next_page(cursor, resources, cache, 'search')
@@ -0,0 +1,39 @@
+from results_cache import ResultsCache
+
+
+def test_new_fingerprint_evicts_memory_and_disk(tmp_path):
+    cache = ResultsCache(tmp_path)
+    cache.put('search', 'v1', 'key', {'ids': [1, 2]})
+    cache.put('other', 'v1', 'key', {'ids': [3]})
+    assert (tmp_path / 'search' / 'v1' / 'key.json').exists()
+
+    assert cache.get('search', 'v2', 'key') is None
+    assert not (tmp_path / 'search' / 'v1').exists()
+    # Other namespaces keep their entries
+    assert cache.get('other', 'v1', 'key') == {'ids': [3]}
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    ResultsCache(tmp_path).put('search', 'v1', 'key', {'ids': [1]})
+    reader = ResultsCache(tmp_path)
+    assert reader.get('search', 'v1', 'key') == {'ids': [1]}
+    assert reader.stats()['hits'] == 1
+
+
+def test_fresh_process_drops_stale_fingerprint_directories(tmp_path):
+    ResultsCache(tmp_path).put('search', 'v1', 'key', {'ids': [1]})
+    cache = ResultsCache(tmp_path)
+    cache.put('search', 'v2', 'key', {'ids': [2]})
+    assert sorted(p.name for p in (tmp_path / 'search').iterdir()) == ['v2']
+
+
+def test_lru_and_age_bounds():
+    cache = ResultsCache(max_entries=2)
+    for key in 'abc':
+        cache.put('search', 'v1', key, key)
+    assert cache.get('search', 'v1', 'a') is None
+    assert cache.get('search', 'v1', 'c') == 'c'
+
+    expired = ResultsCache(max_age_seconds=-1)
+    expired.put('search', 'v1', 'a', 'a')
+    assert expired.get('search', 'v1', 'a') is None
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from service import HTTPError, read_request
+
+
+def parse(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(run())
+
+
+def test_reads_json_body():
+    body = b'{"user_input": "hola"}'
+    raw = b'POST /search?x=1 HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+    assert parse(raw) == ('POST', '/search', {'content-length': str(len(body))}, {'user_input': 'hola'})
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5', b'1.5'])
+def test_bad_content_length_is_400(length):
+    with pytest.raises(HTTPError) as excinfo:
+        parse(b'POST /search HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n')
+    assert excinfo.value.status == 400
+
+
+def test_clean_eof_returns_none():
+    assert parse(b'') is None
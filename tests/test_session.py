@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from conftest import HashModel, vocab_table
+from session import Session, apply_delta, update_query_vector
+from vector_search import compose_query_embedding
+
+PROFILE = {'primary_genre': 'fantasy', 'mood': ['dark'], 'themes_liked': ['war'], 'language_preference': 'any'}
+
+
+def test_apply_delta_set_add_remove_exclude():
+    delta = {'set': {'language_preference': 'es'}, 'add': {'mood': ['hopeful', 'dark']},
+             'remove': {'themes_liked': ['war']}, 'exclude': ['book-1', 7]}
+    updated, excluded, changed = apply_delta(PROFILE, delta)
+    assert updated == {'primary_genre': 'fantasy', 'mood': ['dark', 'hopeful'], 'themes_liked': [],
+                       'language_preference': 'es'}
+    assert excluded == ['book-1', '7']
+    assert changed == ['language_preference', 'mood', 'themes_liked']
+    assert PROFILE['mood'] == ['dark']  # Input is not modified
+
+
+def test_apply_delta_adds_to_missing_list_field():
+    updated, _excluded, changed = apply_delta(PROFILE, {'add': {'tropes': ['heist']}})
+    assert updated['tropes'] == ['heist'] and changed == ['tropes']
+
+
+@pytest.mark.parametrize('delta', [[], {'add': {'mood': 'light'}}, {'add': {'primary_genre': ['x']}},
+                                   {'exclude': 'book-1'}])
+def test_apply_delta_rejects_malformed(delta):
+    with pytest.raises(ValueError):
+        apply_delta(PROFILE, delta)
+
+
+def test_update_matches_full_recomposition():
+    model = HashModel()
+    vocab = vocab_table(['dark', 'light', 'war'])  # 'betrayal' is out of vocabulary
+    old = PROFILE
+    new = dict(PROFILE, mood=['light'], themes_liked=['war', 'betrayal'])
+    query = compose_query_embedding(old, vocab, lambda: model)
+
+    updated, how = update_query_vector(query, old, new, vocab, lambda: model)
+    assert how == 'updated'
+    np.testing.assert_allclose(updated, compose_query_embedding(new, vocab, lambda: model), atol=1e-5)
+
+
+def test_update_unchanged_and_recomposed():
+    model = HashModel()
+    query = np.ones(384, dtype=np.float32)
+    same = dict(PROFILE, language_preference='es')  # Filter-only change
+    assert update_query_vector(query, PROFILE, same, None, lambda: model) == (query, 'unchanged')
+
+    new = dict(PROFILE, mood=['light'])
+    updated, how = update_query_vector(query, PROFILE, new, None, lambda: model)
+    assert how == 'recomposed'
+    np.testing.assert_array_equal(updated, model.encode('light war'))
+
+
+def test_session_round_trip(tmp_path):
+    session = Session(tmp_path, 'ana')
+    session.state = {'profile': PROFILE}
+    session.query = np.arange(4, dtype=np.float32)
+    session.scores = np.ones(3, dtype=np.float32)
+    session.save()
+
+    loaded = Session(tmp_path, 'ana').load()
+    assert loaded.exists and loaded.state == {'profile': PROFILE}
+    np.testing.assert_array_equal(loaded.query, session.query)
+    loaded.reset()
+    assert not Session(tmp_path, 'ana').load().exists
+    with pytest.raises(ValueError):
+        Session(tmp_path, '../escape')
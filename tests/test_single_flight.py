@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return {'value': 42}
+
+        waiters = [asyncio.ensure_future(flight.do('k', compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.stats() == {'executed': 1, 'shared': 4, 'inflight': 1}
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats()['inflight'] == 0
+
+
+def test_key_is_forgotten_after_completion():
+    async def run():
+        flight = SingleFlight()
+        counter = iter(range(10))
+
+        async def compute():
+            return next(counter)
+
+        return await flight.do('k', compute), await flight.do('k', compute), flight.stats()
+
+    first, second, stats = asyncio.run(run())
+    assert (first, second) == (0, 1)
+    assert stats == {'executed': 2, 'shared': 0, 'inflight': 0}
+
+
+def test_exception_reaches_every_caller_and_cancellation_is_isolated():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            raise RuntimeError('boom')
+
+        cancelled = asyncio.ensure_future(flight.do('k', compute))
+        survivor = asyncio.ensure_future(flight.do('k', compute))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(RuntimeError):
+            await survivor
+        assert cancelled.cancelled()
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+import pytest
+
+from extract_profile import extract_profile
+from llm_client import StubClient, stub_profile
+from load_test import arrival_offsets, percentile
+from present_recommendations import present_recommendations_data
+from vector_search import search
+
+
+def test_stub_profile_keywords():
+    profile = stub_profile('Quiero una novela de fantasía oscura')
+    assert profile['primary_genre'] == 'fantasy'
+    assert profile['mood_preference'] == 'dark'
+    assert profile['interaction_language'] == 'es'
+    assert stub_profile('Something calm')['primary_genre'] == 'literary-fiction'
+
+
+@pytest.fixture
+def prompt_root(project_root, tmp_path):
+    """Project root with the real schemas, data and templates plus stand-in agent rules."""
+    for name in ('schemas', 'data', 'prompts'):
+        (tmp_path / name).symlink_to(project_root / name)
+    agents = tmp_path / '.claude' / 'agents'
+    agents.mkdir(parents=True)
+    for name in ('profile-extractor.md', 'recommendation-presenter.md'):
+        (agents / name).write_text('Test rules.\n', encoding='utf-8')
+    return tmp_path
+
+
+def test_offline_pipeline_produces_valid_output(prompt_root, resources):
+    client = StubClient()
+    profile = extract_profile('I love dark science fiction', 'stub', prompt_root, client=client)
+    assert profile['status'] == 'success'
+
+    results = search(profile['criteria'], resources, 0.7)
+    presented = present_recommendations_data(profile['criteria'], results, 'stub', prompt_root, client=client)
+    assert presented['status'] == 'success'
+    assert presented['recommendations']['best_match']['book']['id'] == results[0]['id']
+    assert '### Best Match' in presented['markdown']
+
+
+def test_load_test_helpers():
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+    assert arrival_offsets(3, None, False) == [0.0, 0.0, 0.0]
+    assert arrival_offsets(3, 2.0, False) == [0.0, 0.5, 1.0]
@@ -0,0 +1,39 @@
+from title_index import TitleIndex, normalize_title
+
+BOOKS = [
+    {'id': 'foundation', 'title': 'Foundation', 'author': 'Isaac Asimov'},
+    {'id': 'hobbit', 'title': 'The Hobbit', 'author': 'J.R.R. Tolkien'},
+    {'id': 'dune', 'title': 'Dune', 'author': 'Frank Herbert'},
+    {'id': 'dune-other', 'title': 'Dune', 'author': 'Someone Else'},
+]
+
+
+def test_normalize_title_folds_accents_case_punctuation_and_articles():
+    assert normalize_title('  The Hobbit! ') == 'hobbit'
+    assert normalize_title('El Hobbit') == 'hobbit'
+    assert normalize_title('Fundación') == 'fundacion'
+    # A lone article is a title, not a prefix
+    assert normalize_title('The') == 'the'
+
+
+def test_lookup_by_title_and_alias():
+    index = TitleIndex(BOOKS, aliases={'foundation': ['Fundación'], 'unknown-id': ['Ignored']})
+    assert index.lookup('fundacion') == {'foundation'}
+    assert index.lookup('FOUNDATION') == {'foundation'}
+    assert index.lookup('el hobbit') == {'hobbit'}
+    assert index.lookup('Ignored') == set()
+    assert index.lookup('Neuromancer') == set()
+
+
+def test_author_suffix_disambiguates():
+    index = TitleIndex(BOOKS)
+    assert index.lookup('Dune') == {'dune', 'dune-other'}
+    assert index.lookup('Dune by Frank Herbert') == {'dune'}
+    assert index.lookup('Dune de Herbert') == {'dune'}
+    assert index.lookup('Dune (Herbert)') == {'dune'}
+    assert index.lookup('Dune by Nobody') == set()
+
+
+def test_resolve_ids_unions_lookups():
+    index = TitleIndex(BOOKS)
+    assert index.resolve_ids(['The Hobbit', 'Foundation', 'Unknown']) == {'hobbit', 'foundation'}
@@ -0,0 +1,37 @@
+import io
+import json
+
+import pytest
+
+from validate_catalog import check_catalog, iter_catalog_entries
+
+BOOKS = [{'id': f'book-{i}', 'title': f'Título {i}', 'tags': ['a', 'b'] * i} for i in range(20)]
+
+
+@pytest.mark.parametrize('layout', [BOOKS, {'version': 2, 'books': BOOKS}])
+@pytest.mark.parametrize('read_size', [1, 7, 1 << 20])
+def test_streams_both_layouts_at_any_read_size(layout, read_size):
+    text = json.dumps(layout, ensure_ascii=False, indent=2)
+    assert list(iter_catalog_entries(io.StringIO(text), read_size=read_size)) == BOOKS
+
+
+def test_empty_array():
+    assert list(iter_catalog_entries(io.StringIO(' [ ] '))) == []
+
+
+@pytest.mark.parametrize('text', ['"books"', '{"items": []}', '[{"id": 1} {"id": 2}]', '[{"id": 1},'])
+def test_malformed_catalogs_raise_value_error(text):
+    with pytest.raises(ValueError):
+        list(iter_catalog_entries(io.StringIO(text), read_size=4))
+
+
+def test_oversized_entry_is_rejected():
+    text = json.dumps([{'id': 'x', 'synopsis': 'y' * 100}])
+    with pytest.raises(ValueError, match='exceeds'):
+        list(iter_catalog_entries(io.StringIO(text), read_size=8, max_entry_size=32))
+
+
+def test_bundled_catalog_is_valid(project_root):
+    report = check_catalog(project_root / 'data' / 'catalog_with_embeddings.json')
+    assert report['entries'] == 30
+    assert report['errors'] == {}